@@ -797,6 +797,7 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from improved_main import MCPAnalyticsPlatform
+from improved_outputs.calendar_buckets import data_columns
 import time
 from datetime import datetime
 import json
@@ -1192,10 +1193,18 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ==================== INITIALIZE SESSION STATE ====================
+@st.cache_resource
+def load_platform():
+    # One platform per server process: every session shares its loader, caches
+    # and dataset watcher, so a changed file is reloaded once, not once per session
+    # (shared_store is for a separate `python improved_main.py --publish-shared`
+    # process; without one running it would only fall back to a private load)
+    return MCPAnalyticsPlatform(use_local_llm=True, watch=True)
+
 if 'platform' not in st.session_state:
     with st.spinner('🚀 Initializing Analytics Platform...'):
         try:
-            st.session_state.platform = MCPAnalyticsPlatform(use_local_llm=True)
+            st.session_state.platform = load_platform()
             st.session_state.chat_history = []
             st.session_state.initialized = True
         except Exception as e:
@@ -1225,7 +1234,7 @@ with st.sidebar:
         st.markdown(f"""
         <div class='sidebar-card'>
             <h4 class='sidebar-title'>{name.upper()}</h4>
-            <p class='sidebar-text'>📊 {len(df):,} rows • {len(df.columns)} columns</p>
+            <p class='sidebar-text'>📊 {len(df):,} rows • {len(data_columns(df.columns))} columns</p>
         </div>
         """, unsafe_allow_html=True)
     
@@ -1480,6 +1489,14 @@ else:
                             "Filters": response['plan'].get('filters', {}),
                             "Group By": response['plan'].get('group_by', 'None')
                         })
+                    if response.get('execution'):
+                        execution = response['execution']
+                        st.markdown(f"**Strategy:** `{execution.get('strategy')}` — {execution.get('reason', '')}")
+                        st.json({
+                            "Table Rows": execution.get('table_rows'),
+                            "Estimated Rows": execution.get('estimated_rows'),
+                            "Predicates (evaluation order)": execution.get('predicates', [])
+                        })
                 
             else:
                 st.markdown(f"""
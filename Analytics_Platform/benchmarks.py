@@ -0,0 +1,1032 @@
+"""
+Benchmarks for the MCP Analytics Platform data path.
+
+Usage:
+    python benchmarks.py cache  [--data-dir .] [--scale 100]
+    python benchmarks.py schema [--data-dir .] [--scale 100]
+    python benchmarks.py ingest [--data-dir .] [--scale 100] [--append-rows 3650]
+    python benchmarks.py stream [--data-dir .] [--scale 1000] [--max-memory 64]
+    python benchmarks.py startup [--data-dir .] [--scale 100]
+    python benchmarks.py partition [--data-dir .] [--scale 100]
+    python benchmarks.py rollup [--data-dir .] [--scale 100]
+    python benchmarks.py execute [--rows 10000000]
+    python benchmarks.py index [--rows 10000000]
+    python benchmarks.py growth [--rows 1000000]
+    python benchmarks.py batch [--rows 5000000]
+    python benchmarks.py groupagg [--rows 2000000]
+    python benchmarks.py views [--rows 2000000] [--append-rows 10000]
+    python benchmarks.py approx [--rows 5000000]
+    python benchmarks.py shards [--rows 5000000] [--branches 2000] [--workers 1 2 4 8]
+    python benchmarks.py granularity [--rows 5000000]
+    python benchmarks.py window [--rows 5000000]
+    python benchmarks.py wide [--branches 2000] [--days 730]
+    python benchmarks.py topk [--groups 1000000] [--limit 1 10 100]
+"""
+
+import argparse
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from improved_outputs.data_loader import DataLoader
+from improved_outputs.column_store import ColumnStore
+from improved_outputs.schemas import DATASET_SCHEMAS, read_csv_kwargs, apply_schema, memory_savings
+
+
+DATASET_FILES = {
+    "loan":     "loan_deposit_performance.csv",
+    "payment":  "digital_payments_data.csv",
+    "customer": "customer_credit_data.csv",
+}
+
+
+# ── Helpers ─────────────────────────────────────────────────────────────────
+
+def _best_of(fn: Callable[[], object], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _scaled_copy(src: Path, dst: Path, scale: int):
+    """Write src repeated `scale` times (header once) to dst."""
+    df = pd.read_csv(src)
+    pd.concat([df] * scale, ignore_index=True).to_csv(dst, index=False)
+
+
+def _scaled_copy_streaming(src: Path, dst: Path, scale: int):
+    """Like _scaled_copy but without holding the scaled data in memory."""
+    with open(src, "rb") as f:
+        header, body = f.readline(), f.read()
+    if not body.endswith(b"\n"):
+        body += b"\n"
+    with open(dst, "wb") as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(body)
+
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def _print_table(title: str, rows: Dict[str, Dict[str, float]]):
+    print(f"\n{title}")
+    cols = list(next(iter(rows.values())).keys())
+    print(f"  {'dataset':<18}" + "".join(f"{c:>14}" for c in cols))
+    for name, vals in rows.items():
+        print(f"  {name:<18}" + "".join(f"{vals[c]:>14.2f}" for c in cols))
+
+
+# ── cache ───────────────────────────────────────────────────────────────────
+
+def bench_cache(data_dir: Path, scale: int, repeat: int):
+    """Pickle cache vs memory-mapped column store load time (ms)."""
+    work = Path(tempfile.mkdtemp(prefix="bench_cache_"))
+    try:
+        files = {}
+        for name, fname in DATASET_FILES.items():
+            files[name] = data_dir / fname
+            scaled = work / f"{Path(fname).stem}_x{scale}.csv"
+            _scaled_copy(data_dir / fname, scaled, scale)
+            files[f"{name} x{scale}"] = scaled
+
+        loader = DataLoader(data_dir=str(work), cache_dir=str(work / ".cache"))
+        store  = ColumnStore(work / ".cache")
+        rows = {}
+        for name, path in files.items():
+            df = loader._preprocess_dataframe(pd.read_csv(path))
+            pkl = work / f"{path.stem}.pkl"
+            with open(pkl, "wb") as f:
+                pickle.dump(df, f)
+            store.save(path.stem, df)
+
+            def load_pickle():
+                with open(pkl, "rb") as f:
+                    return pickle.load(f)
+
+            rows[name] = {
+                "csv parse": _best_of(lambda: loader._preprocess_dataframe(pd.read_csv(path)), repeat),
+                "pickle":    _best_of(load_pickle, repeat),
+                "mmap":      _best_of(lambda: store.load(path.stem), repeat),
+            }
+        _print_table("Load time (ms, best of %d)" % repeat, rows)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# ── schema ──────────────────────────────────────────────────────────────────
+
+def bench_schema(data_dir: Path, scale: int, repeat: int):
+    """Inferred vs schema-typed parse time (ms) and resident size (MB)."""
+    work = Path(tempfile.mkdtemp(prefix="bench_schema_"))
+    try:
+        loader = DataLoader(data_dir=str(work), cache_dir=str(work / ".cache"))
+        rows = {}
+        for name, schema in DATASET_SCHEMAS.items():
+            path = work / f"{name}_x{scale}.csv"
+            _scaled_copy(data_dir / schema["file"], path, scale)
+
+            inferred = loader._preprocess_dataframe(pd.read_csv(path))
+            typed    = apply_schema(pd.read_csv(path, **read_csv_kwargs(schema)), schema)
+            typed32  = apply_schema(pd.read_csv(path, **read_csv_kwargs(schema, True)), schema, True)
+            rows[f"{name} x{scale}"] = {
+                "inferred ms": _best_of(lambda: loader._preprocess_dataframe(pd.read_csv(path)), repeat),
+                "schema ms":   _best_of(lambda: apply_schema(pd.read_csv(path, **read_csv_kwargs(schema)), schema), repeat),
+                "inferred MB": inferred.memory_usage(deep=True).sum() / 1e6,
+                "schema MB":   typed.memory_usage(deep=True).sum() / 1e6,
+                "f32 MB":      typed32.memory_usage(deep=True).sum() / 1e6,
+                "est saved MB": memory_savings(typed, schema)["saved_bytes"] / 1e6,
+            }
+        _print_table("Schema-typed parsing (best of %d)" % repeat, rows)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# ── ingest ──────────────────────────────────────────────────────────────────
+
+def bench_ingest(data_dir: Path, scale: int, append_rows: int):
+    """Full reparse vs incremental tail ingest after appending rows (ms)."""
+    work = Path(tempfile.mkdtemp(prefix="bench_ingest_"))
+    try:
+        rows = {}
+        for name, schema in DATASET_SCHEMAS.items():
+            path = work / schema["file"]
+            _scaled_copy(data_dir / schema["file"], path, scale)
+            loader = DataLoader(data_dir=str(work), cache_dir=str(work / f".cache_{name}"))
+            loader.load_csv(schema["file"], schema=schema)
+
+            extra = pd.read_csv(data_dir / schema["file"]).head(append_rows)
+            extra.to_csv(path, mode="a", header=False, index=False)
+
+            t0 = time.perf_counter()
+            loader.load_csv(schema["file"], use_cache=False, schema=schema)
+            full = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            df = DataLoader(data_dir=str(work), cache_dir=str(work / f".cache_{name}")).load_csv(schema["file"], schema=schema)
+            incremental = (time.perf_counter() - t0) * 1000
+            rows[f"{name} x{scale}"] = {"total rows": float(len(df)), "full ms": full, "append ms": incremental}
+        _print_table(f"Reload after appending {append_rows} rows", rows)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# ── stream ──────────────────────────────────────────────────────────────────
+
+def bench_stream(data_dir: Path, scale: int, max_memory: float) -> bool:
+    """Stream plans over a scaled dataset and check peak RSS growth stays under budget."""
+    from improved_outputs.analytics_engine import AnalyticsEngine
+
+    work = Path(tempfile.mkdtemp(prefix="bench_stream_"))
+    try:
+        schema = DATASET_SCHEMAS["payment"]
+        _scaled_copy_streaming(data_dir / schema["file"], work / schema["file"], scale)
+        size_mb = (work / schema["file"]).stat().st_size / 1e6
+
+        loader = DataLoader(data_dir=str(work), cache_dir=str(work / ".cache"), max_memory_mb=max_memory)
+        engine = AnalyticsEngine()
+        baseline = _peak_rss_mb()
+        loader.load_all_datasets()
+        if "payment" not in loader.streamed:
+            print(f"payment x{scale} fits in {max_memory} MB; raise --scale to exercise streaming")
+            return True
+
+        plans = [
+            {"comparison_type": "multi_metric_branch_comparison", "comparison_column": "branch",
+             "metrics": ["upi_volume", "card_txn_volume"], "aggregation": "sum"},
+            {"comparison_type": "cross_metric_growth_comparison", "comparison_column": "branch",
+             "metric_a": "upi_value", "metric_b": "card_txn_value",
+             "date_filter": {"type": "relative", "n": 6, "unit": "month"}},
+            {"metric": "fraud_rate_percent", "aggregation": "mean", "filters": {"branch": ["Pune"]}},
+        ]
+        columns = loader.dataset_columns("payment")
+        t0 = time.perf_counter()
+        for plan in plans:
+            result = engine.execute_plan_streaming(
+                lambda usecols: loader.iter_dataset_chunks("payment", usecols), columns, plan)
+            assert result.get("success"), result
+        elapsed = time.perf_counter() - t0
+
+        growth = _peak_rss_mb() - baseline
+        ok = growth <= max_memory
+        print(f"\nStreaming payment x{scale} ({size_mb:,.0f} MB CSV, "
+              f"{loader.streamed['payment']:,} rows/chunk): {len(plans)} plans in {elapsed:.1f}s")
+        print(f"  peak RSS growth {growth:,.1f} MB vs budget {max_memory:,.0f} MB → {'OK' if ok else 'OVER BUDGET'}")
+        return ok
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# ── startup ─────────────────────────────────────────────────────────────────
+
+def bench_startup(data_dir: Path, scale: int):
+    """Dataset wall time at startup per load mode, cold (empty cache) and warm (ms)."""
+    work = Path(tempfile.mkdtemp(prefix="bench_startup_"))
+    try:
+        for schema in DATASET_SCHEMAS.values():
+            _scaled_copy_streaming(data_dir / schema["file"], work / schema["file"], scale)
+
+        def run(mode: str, cache: Path) -> float:
+            t0 = time.perf_counter()
+            loader = DataLoader(data_dir=str(work), cache_dir=str(cache))
+            if mode == "lazy":
+                loader.lazy_datasets()["payment"]     # a query that only touches payment
+            else:
+                loader.load_all_datasets(parallel=(mode == "parallel"))
+            return (time.perf_counter() - t0) * 1000
+
+        rows = {}
+        for mode in ("serial", "parallel", "lazy"):
+            cache = work / f".cache_{mode}"
+            cold = run(mode, cache)
+            rows[mode] = {"cold ms": cold, "warm ms": run(mode, cache)}
+        _print_table(f"Startup wall time, x{scale} datasets (lazy = first 'payment' query)", rows)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# ── partition ───────────────────────────────────────────────────────────────
+
+def bench_partition(data_dir: Path, scale: int, repeat: int):
+    """Single-file load + filter vs partition-pruned read for a branch/month plan (ms)."""
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.partitions import PartitionedDataset, write_partitions
+
+    work = Path(tempfile.mkdtemp(prefix="bench_partition_"))
+    try:
+        schema = DATASET_SCHEMAS["loan"]
+        flat_dir, part_dir = work / "flat", work / "parted"
+        flat_dir.mkdir()
+        _scaled_copy(data_dir / schema["file"], flat_dir / schema["file"], scale)
+        n_files = write_partitions(pd.read_csv(flat_dir / schema["file"]), part_dir / schema["partition_dir"])
+
+        plan = {"metric": "gold_loan_amt", "aggregation": "sum", "filters": {"branch": "Pune"},
+                "date_filter": {"type": "month", "year": 2024, "month": 3}}
+        engine = AnalyticsEngine()
+        runs = {"flat": 0, "parted": 0}
+
+        def flat(warm: bool):
+            runs["flat"] += 0 if warm else 1
+            loader = DataLoader(data_dir=str(flat_dir), cache_dir=str(work / f".cache_flat{runs['flat']}"))
+            return engine.execute_plan(loader.load_dataset("loan"), plan)
+
+        def parted(warm: bool):
+            runs["parted"] += 0 if warm else 1
+            loader = DataLoader(data_dir=str(part_dir), cache_dir=str(work / f".cache_parted{runs['parted']}"))
+            loader.load_dataset("loan")
+            return engine.execute_plan(loader.load_partitions("loan", plan), plan)
+
+        expected = flat(False)["value"]
+        assert abs(parted(False)["value"] - expected) <= 1e-9 * max(1.0, abs(expected))
+        pruned, _ = PartitionedDataset(part_dir / schema["partition_dir"]).prune(plan["date_filter"], plan["filters"])
+        rows = {
+            "single file": {
+                "files read":  1.0,
+                "MB read":     (flat_dir / schema["file"]).stat().st_size / 1e6,
+                "cold ms":     _best_of(lambda: flat(False), repeat),
+                "warm ms":     _best_of(lambda: flat(True), repeat),
+            },
+            f"{n_files} partitions": {
+                "files read":  float(len(pruned)),
+                "MB read":     sum(p.stat().st_size for p in pruned) / 1e6,
+                "cold ms":     _best_of(lambda: parted(False), repeat),
+                "warm ms":     _best_of(lambda: parted(True), repeat),
+            },
+        }
+        _print_table(f"Gold loan in Pune for March 2024, loan x{scale} (best of {repeat})", rows)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# ── rollup ──────────────────────────────────────────────────────────────────
+
+def bench_rollup(data_dir: Path, scale: int, repeat: int):
+    """Plan latency served from the (branch, month) rollup cube vs a raw scan (ms)."""
+    from improved_outputs.analytics_engine import AnalyticsEngine
+
+    work = Path(tempfile.mkdtemp(prefix="bench_rollup_"))
+    try:
+        schema = DATASET_SCHEMAS["payment"]
+        _scaled_copy_streaming(data_dir / schema["file"], work / schema["file"], scale)
+        loader = DataLoader(data_dir=str(work), cache_dir=str(work / ".cache"))
+        t0 = time.perf_counter()
+        df = loader.load_dataset("payment")
+        load_ms = (time.perf_counter() - t0) * 1000
+        cube = loader.rollups["payment"]
+        engine = AnalyticsEngine()
+
+        plans = {
+            "sum, Q2 2024": {"metric": "upi_value", "aggregation": "sum",
+                             "date_filter": {"type": "quarter", "year": 2024, "months": [4, 5, 6]}},
+            "mean by branch": {"comparison_type": "branch_comparison", "comparison_column": "branch",
+                               "metric": "fraud_rate_percent", "aggregation": "mean"},
+            "multi, 2 branches": {"comparison_type": "multi_metric_branch_comparison", "comparison_column": "branch",
+                                  "metrics": ["upi_volume", "card_txn_volume"], "aggregation": "sum",
+                                  "filters": {"branch": ["Pune", "Delhi"]}},
+            "cross growth, Mar": {"comparison_type": "cross_metric_growth_comparison", "comparison_column": "branch",
+                                  "metric_a": "upi_value", "metric_b": "card_txn_value",
+                                  "date_filter": {"type": "month", "year": 2024, "month": 3}},
+        }
+        rows = {}
+        for label, plan in plans.items():
+            raw, served = engine.execute_plan(df, plan), engine.execute_plan(df, plan, cube)
+            assert abs(raw["value"] - served["value"]) <= 1e-9 * max(1.0, abs(raw["value"])), label
+            rows[label] = {
+                "raw ms":  _best_of(lambda: engine.execute_plan(df, plan), repeat),
+                "cube ms": _best_of(lambda: engine.execute_plan(df, plan, cube), repeat),
+            }
+            rows[label]["speedup"] = rows[label]["raw ms"] / rows[label]["cube ms"]
+        _print_table(f"payment x{scale} ({len(df):,} rows, {len(cube.cells):,} cube cells, "
+                     f"cold load + cube {load_ms:,.0f} ms), best of {repeat}", rows)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+# ── execute ─────────────────────────────────────────────────────────────────
+
+def _synthetic_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """rows × (date, branch, 3 float metrics) spread over 2023-2024 and 10 branches."""
+    rng = np.random.default_rng(seed)
+    branches = ["Pune", "Mumbai", "Delhi", "Bengaluru", "Chennai",
+                "Hyderabad", "Kolkata", "Ahmedabad", "Jaipur", "Lucknow"]
+    days = np.sort(rng.integers(0, 731, rows))
+    return pd.DataFrame({
+        "date":         pd.Timestamp("2023-01-01") + pd.to_timedelta(days, unit="D"),
+        "branch":       pd.Categorical.from_codes(rng.integers(0, len(branches), rows), branches),
+        "upi_value":    rng.gamma(2.0, 5e5, rows),
+        "card_value":   rng.gamma(2.0, 3e5, rows),
+        "fraud_rate":   rng.random(rows) * 2,
+    })
+
+
+def _legacy_execute(engine, df: pd.DataFrame, plan: Dict) -> Dict:
+    """execute_plan's raw path before row masks: full copy, then filter step by step."""
+    working = engine._apply_filters(df.copy(), plan.get("filters", {}))
+    working = engine._apply_date_filter(working, plan.get("date_filter", {}))
+    ctype = plan.get("comparison_type")
+    if ctype == "multi_metric_branch_comparison":
+        return engine._multi_metric(working, plan)
+    if ctype == "cross_metric_growth_comparison":
+        return engine._cross_growth(working, plan)
+    if ctype:
+        return engine._single_metric_comparison(working, plan)
+    return engine._standard(working, plan)
+
+
+def _peak_alloc_mb(fn: Callable[[], object]) -> float:
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def bench_execute(rows: int, repeat: int):
+    """Raw-path plan latency and peak allocations: copy + stepwise filters vs one mask + one gather."""
+    import contextlib
+    import io
+    from improved_outputs.analytics_engine import AnalyticsEngine
+
+    df = _synthetic_frame(rows)
+    engine = AnalyticsEngine()
+    plans = {
+        "sum, all rows": {"metric": "upi_value", "aggregation": "sum"},
+        "sum, Q2 2024": {"metric": "upi_value", "aggregation": "sum",
+                         "date_filter": {"type": "quarter", "year": 2024, "months": [4, 5, 6]}},
+        "mean by branch": {"comparison_type": "branch_comparison", "comparison_column": "branch",
+                           "metric": "fraud_rate", "aggregation": "mean",
+                           "date_filter": {"type": "year", "year": 2024}},
+        "multi, 2 branches": {"comparison_type": "multi_metric_branch_comparison", "comparison_column": "branch",
+                              "metrics": ["upi_value", "card_value"], "aggregation": "sum",
+                              "filters": {"branch": ["Pune", "Delhi"]}},
+        "growth, last 3 mo": {"comparison_type": "cross_metric_growth_comparison", "comparison_column": "branch",
+                              "metric_a": "upi_value", "metric_b": "card_value",
+                              "date_filter": {"type": "relative", "n": 3, "unit": "month"}},
+        "Pune, value > 1M": {"metric": "fraud_rate", "aggregation": "mean",
+                             "filters": {"branch": "Pune", "upi_value": {"min": 1e6}}},
+    }
+    table = {}
+    with contextlib.redirect_stdout(io.StringIO()):     # the engine narrates every filter
+        for label, plan in plans.items():
+            old, new = _legacy_execute(engine, df, plan), engine.execute_plan(df, plan)
+            assert abs(old["value"] - new["value"]) <= 1e-9 * max(1.0, abs(old["value"])), label
+            table[label] = {
+                "copy ms":  _best_of(lambda: _legacy_execute(engine, df, plan), repeat),
+                "mask ms":  _best_of(lambda: engine.execute_plan(df, plan), repeat),
+                "copy MB":  _peak_alloc_mb(lambda: _legacy_execute(engine, df, plan)),
+                "mask MB":  _peak_alloc_mb(lambda: engine.execute_plan(df, plan)),
+            }
+            table[label]["speedup"] = table[label]["copy ms"] / table[label]["mask ms"]
+    frame_mb = df.memory_usage(deep=True).sum() / 1e6
+    _print_table(f"synthetic frame ({len(df):,} rows, {frame_mb:,.0f} MB), best of {repeat}; "
+                 f"MB = peak traced allocations per query", table)
+
+
+# ── index ───────────────────────────────────────────────────────────────────
+
+def bench_index(rows: int, repeat: int):
+    """Filtered plan latency: full-column mask scan vs date/branch index lookup (ms)."""
+    import contextlib
+    import io
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.row_index import RowIndex
+
+    df = _synthetic_frame(rows)
+    t0 = time.perf_counter()
+    index = RowIndex.build(df, "date", ["branch"])
+    build_ms = (time.perf_counter() - t0) * 1000
+    engine = AnalyticsEngine()
+    plans = {
+        "Pune, one day": {"metric": "upi_value", "aggregation": "sum", "filters": {"branch": "Pune"},
+                          "date_filter": {"type": "range", "start": "2024-03-05", "end": "2024-03-05"}},
+        "Pune, Mar 2024": {"metric": "upi_value", "aggregation": "sum", "filters": {"branch": "Pune"},
+                           "date_filter": {"type": "month", "year": 2024, "month": 3}},
+        "all, Q2 2024": {"metric": "upi_value", "aggregation": "mean",
+                         "date_filter": {"type": "quarter", "year": 2024, "months": [4, 5, 6]}},
+        "2 branches": {"comparison_type": "branch_comparison", "comparison_column": "branch",
+                       "metric": "fraud_rate", "aggregation": "mean", "filters": {"branch": ["Pune", "Delhi"]}},
+        "Pune, 2024, >1M": {"metric": "fraud_rate", "aggregation": "mean",
+                            "filters": {"branch": "Pune", "upi_value": {"min": 1e6}},
+                            "date_filter": {"type": "year", "year": 2024}},
+    }
+    table = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, plan in plans.items():
+            scan, indexed = engine.execute_plan(df, plan), engine.execute_plan(df, plan, index=index)
+            assert abs(scan["value"] - indexed["value"]) <= 1e-9 * max(1.0, abs(scan["value"])), label
+            table[label] = {
+                "rows kept": float(len(engine._select(df, plan, index))),
+                "scan ms":   _best_of(lambda: engine.execute_plan(df, plan), repeat),
+                "index ms":  _best_of(lambda: engine.execute_plan(df, plan, index=index), repeat),
+            }
+            table[label]["speedup"] = table[label]["scan ms"] / table[label]["index ms"]
+    _print_table(f"synthetic frame ({len(df):,} rows; index built in {build_ms:,.0f} ms, "
+                 f"{index.nbytes() / 1e6:,.0f} MB), best of {repeat}", table)
+
+
+# ── growth ──────────────────────────────────────────────────────────────────
+
+def _legacy_cross_growth(df: pd.DataFrame, plan: Dict) -> Dict:
+    """_cross_growth before vectorising: per-group Python loop, sort, and a row dict each."""
+    col, metric_a, metric_b = plan.get("comparison_column", "branch"), plan["metric_a"], plan["metric_b"]
+
+    def growth(series: pd.Series) -> float:
+        s = series.dropna()
+        if len(s) < 2 or pd.isna(s.iloc[0]) or s.iloc[0] == 0:
+            return 0.0
+        return float((s.iloc[-1] - s.iloc[0]) / s.iloc[0] * 100)
+
+    rows = []
+    for branch, grp in df.groupby(col, observed=True):
+        grp = grp.sort_values("date")
+        ga, gb = growth(grp[metric_a]), growth(grp[metric_b])
+        rows.append({"branch": branch, f"{metric_a}_growth": round(ga, 2), f"{metric_b}_growth": round(gb, 2),
+                     "growth_diff": round(ga - gb, 2), "faster": ga > gb})
+    result_df = pd.DataFrame(rows).set_index("branch")
+    return {"cross_growth_data": result_df,
+            "qualifying_branches": result_df[result_df["faster"]].sort_values("growth_diff", ascending=False)}
+
+
+def bench_growth(rows: int, repeat: int):
+    """Cross-metric growth latency: per-group loop vs vectorised first/last (ms)."""
+    from improved_outputs.analytics_engine import AnalyticsEngine
+
+    engine = AnalyticsEngine()
+    plan = {"comparison_type": "cross_metric_growth_comparison", "comparison_column": "branch",
+            "metric_a": "upi_value", "metric_b": "card_value"}
+    rng = np.random.default_rng(0)
+    table = {}
+    for branches in (10, 1_000, 10_000):
+        df = _synthetic_frame(rows).assign(branch=pd.Categorical(
+            rng.integers(0, branches, rows).astype(str)))
+        new, old = engine._cross_growth(df, plan), _legacy_cross_growth(df, plan)
+        assert new["cross_growth_data"]["faster"].sum() == old["cross_growth_data"]["faster"].sum()
+        table[f"{branches:,} branches"] = {
+            "loop ms":       _best_of(lambda: _legacy_cross_growth(df, plan), repeat),
+            "vectorised ms": _best_of(lambda: engine._cross_growth(df, plan), repeat),
+        }
+        table[f"{branches:,} branches"]["speedup"] = \
+            table[f"{branches:,} branches"]["loop ms"] / table[f"{branches:,} branches"]["vectorised ms"]
+    _print_table(f"synthetic frame ({rows:,} rows), best of {repeat}", table)
+
+
+# ── batch ───────────────────────────────────────────────────────────────────
+
+def bench_batch(rows: int, repeat: int):
+    """A dashboard's worth of plans: one execute_plan call each vs one execute_plans call (ms)."""
+    import contextlib
+    import io
+    from improved_outputs.analytics_engine import AnalyticsEngine
+
+    df = _synthetic_frame(rows)
+    engine = AnalyticsEngine()
+    metrics = ["upi_value", "card_value", "fraud_rate"]
+    slices = {
+        "Q3 2024": {"date_filter": {"type": "quarter", "year": 2024, "months": [7, 8, 9]}},
+        "Q3, 3 branches": {"date_filter": {"type": "quarter", "year": 2024, "months": [7, 8, 9]},
+                           "filters": {"branch": ["Pune", "Delhi", "Mumbai"]}},
+        "2024 + all time": None,
+    }
+    table = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, slice_ in slices.items():
+            views = [slice_] if slice_ else [{"date_filter": {"type": "year", "year": 2024}}, {}]
+            plans = [
+                {"comparison_type": "branch_comparison", "comparison_column": "branch",
+                 "metric": m, "aggregation": agg, **view}
+                for view in views for m in metrics for agg in ("sum", "mean", "max")
+            ] + [
+                {"comparison_type": "multi_metric_branch_comparison", "comparison_column": "branch",
+                 "metrics": metrics[:2], "aggregation": "sum", **view} for view in views
+            ] + [
+                {"metric": m, "aggregation": "sum", "group_by": "date", **view} for view in views for m in metrics
+            ]
+            one_by_one = [engine.execute_plan(df, p) for p in plans]
+            batched = engine.execute_plans(df, plans)
+            for a, b in zip(one_by_one, batched):
+                assert abs(a["value"] - b["value"]) <= 1e-9 * max(1.0, abs(a["value"])), label
+            table[f"{label} x{len(plans)}"] = {
+                "single ms": _best_of(lambda: [engine.execute_plan(df, p) for p in plans], repeat),
+                "batch ms":  _best_of(lambda: engine.execute_plans(df, plans), repeat),
+            }
+            row = table[f"{label} x{len(plans)}"]
+            row["speedup"] = row["single ms"] / row["batch ms"]
+    _print_table(f"synthetic frame ({len(df):,} rows), xN = plans in the batch, best of {repeat}", table)
+
+
+# ── groupagg ────────────────────────────────────────────────────────────────
+
+def bench_groupagg(rows: int, repeat: int):
+    """Grouped aggregation of 3 metrics: DataFrame.groupby vs bincount/ufunc.at kernels (ms)."""
+    from improved_outputs.group_kernels import grouped_reduce
+
+    rng = np.random.default_rng(0)
+    metrics = ["upi_value", "card_value", "fraud_rate"]
+    table = {}
+    for groups in (10, 1_000, 100_000):
+        df = _synthetic_frame(rows).assign(branch=pd.Categorical(
+            rng.integers(0, groups, rows).astype(str)))
+        for agg in ("sum", "mean", "max"):
+            label = f"{groups:,} groups {agg}"
+            table[label] = {
+                "pandas ms": _best_of(lambda: getattr(df.groupby("branch", observed=True)[metrics], agg)(), repeat),
+                "kernel ms": _best_of(lambda: grouped_reduce(df["branch"], df[metrics], agg), repeat),
+            }
+            table[label]["speedup"] = table[label]["pandas ms"] / table[label]["kernel ms"]
+    _print_table(f"synthetic frame ({rows:,} rows, {len(metrics)} metrics), best of {repeat}", table)
+
+
+# ── views ───────────────────────────────────────────────────────────────────
+
+def bench_views(rows: int, append_rows: int, repeat: int):
+    """Standing dashboard queries: execute_plan vs materialized view read, and append upkeep (ms)."""
+    import contextlib
+    import io
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.materialized_views import ViewRegistry
+
+    df = _synthetic_frame(rows)
+    base, tail = df.iloc[:rows - append_rows], df.iloc[rows - append_rows:]
+    engine = AnalyticsEngine()
+    plans = {
+        "top branch sum": {"comparison_type": "branch_comparison", "comparison_column": "branch",
+                           "metric": "upi_value", "aggregation": "sum"},
+        "UPI trend": {"metric": "upi_value", "aggregation": "sum", "group_by": "date"},
+        "2024 max, 2 br": {"comparison_type": "branch_comparison", "comparison_column": "branch",
+                           "metric": "fraud_rate", "aggregation": "max", "filters": {"branch": ["Pune", "Delhi"]},
+                           "date_filter": {"type": "year", "year": 2024}},
+        "cross growth": {"comparison_type": "cross_metric_growth_comparison", "comparison_column": "branch",
+                         "metric_a": "upi_value", "metric_b": "card_value"},
+    }
+    table = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, plan in plans.items():
+            views = ViewRegistry(engine)
+            views.register(plan, base, "v1")
+            start = time.perf_counter()
+            views.on_append("loan", tail, "v1", "v2")      # folds once, so timed once
+            fold_ms = (time.perf_counter() - start) * 1000
+            got, ref = views.lookup(plan, "v2"), engine.execute_plan(df, plan)
+            assert abs(got["value"] - ref["value"]) <= 1e-9 * max(1.0, abs(ref["value"])), label
+            table[label] = {
+                "execute ms": _best_of(lambda: engine.execute_plan(df, plan), repeat),
+                "view read ms": _best_of(lambda: views.lookup(plan, "v2"), repeat),
+                "append ms": fold_ms,
+            }
+    _print_table(f"synthetic frame ({rows:,} rows), append = folding {append_rows:,} new rows, "
+                 f"best of {repeat}", table)
+
+
+# ── approx ──────────────────────────────────────────────────────────────────
+
+def bench_approx(rows: int, repeat: int):
+    """Exact vs approximate plan latency (ms), observed error and 95% bound width (% of the exact value)."""
+    import contextlib
+    import io
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.approximate import ApproximateIndex
+
+    df = _synthetic_frame(rows)
+    df["upi_count"] = np.random.default_rng(1).integers(0, 5000, rows)
+    start = time.perf_counter()
+    approx = ApproximateIndex.build(df, "date", "branch", ["upi_value", "card_value", "fraud_rate"], ["upi_count"])
+    build_s = time.perf_counter() - start
+    engine = AnalyticsEngine()
+    plans = {
+        "2023 UPI": {"metric": "upi_value", "aggregation": "sum", "date_filter": {"type": "year", "year": 2023}},
+        "2024 mean, 2 br": {"metric": "fraud_rate", "aggregation": "mean", "filters": {"branch": ["Pune", "Delhi"]},
+                            "date_filter": {"type": "year", "year": 2024}},
+        "count by branch": {"metric": "card_value", "aggregation": "count", "group_by": "branch"},
+        "top branch sum": {"comparison_type": "branch_comparison", "comparison_column": "branch",
+                           "metric": "upi_value", "aggregation": "sum",
+                           "date_filter": {"type": "range", "start": "2024-02-10", "end": "2024-12-31"}},
+        "median UPI": {"metric": "upi_value", "aggregation": "median"},
+        "distinct counts": {"metric": "upi_count", "aggregation": "distinct"},
+    }
+    table, covered = {}, 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, plan in plans.items():
+            approximate = {**plan, "approximate": True}
+            ref = engine.execute_plan(df, plan)
+            got = engine.execute_plan(df, approximate, approx=approx)
+            assert got.get("approximate"), label
+            lower, upper = got["error_bounds"]["value"]
+            covered += lower <= ref["value"] <= upper
+            table[label] = {
+                "exact ms": _best_of(lambda: engine.execute_plan(df, plan), repeat),
+                "approx ms": _best_of(lambda: engine.execute_plan(df, approximate, approx=approx), repeat),
+                "error %": abs(got["value"] - ref["value"]) / abs(ref["value"]) * 100,
+                "bound ±%": (upper - lower) / 2 / abs(ref["value"]) * 100,
+            }
+    _print_table(f"synthetic frame ({rows:,} rows), {approx.method('sum')}, best of {repeat}", table)
+    print(f"\n  build {build_s:.2f}s, {approx.nbytes() / 1e6:.1f} MB; "
+          f"exact value inside the bounds for {covered}/{len(plans)} plans")
+
+
+# ── shards ──────────────────────────────────────────────────────────────────
+
+def bench_shards(rows: int, branches: int, workers: list, repeat: int):
+    """Serial vs branch-sharded multi-process plan latency (ms) by worker count."""
+    import contextlib
+    import io
+    import os
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.sharded import ShardedExecutor
+
+    rng = np.random.default_rng(0)
+    df = _synthetic_frame(rows)
+    names = [f"B{i:05d}" for i in range(branches)]
+    df["branch"] = pd.Categorical.from_codes(rng.integers(0, branches, rows), names)
+    engine = AnalyticsEngine()
+    plans = {
+        "multi-metric sum": {"comparison_type": "multi_metric_branch_comparison", "comparison_column": "branch",
+                             "metrics": ["upi_value", "card_value", "fraud_rate"], "aggregation": "sum"},
+        "branch mean 2024": {"comparison_type": "branch_comparison", "comparison_column": "branch",
+                             "metric": "fraud_rate", "aggregation": "mean", "date_filter": {"type": "year", "year": 2024}},
+        "daily max": {"metric": "upi_value", "aggregation": "max", "group_by": "date"},
+        "cross growth": {"comparison_type": "cross_metric_growth_comparison", "comparison_column": "branch",
+                         "metric_a": "upi_value", "metric_b": "card_value"},
+    }
+    table = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial = {label: _best_of(lambda: engine.execute_plan(df, plan), repeat) for label, plan in plans.items()}
+        for label, plan in plans.items():
+            table[label] = {"serial ms": serial[label]}
+        for n in workers:
+            with ShardedExecutor(df, n) as shards:
+                for label, plan in plans.items():
+                    got, ref = shards.execute_plan(plan), engine.execute_plan(df, plan)
+                    assert abs(got["value"] - ref["value"]) <= 1e-9 * max(1.0, abs(ref["value"])), label
+                    table[label][f"{n} workers ms"] = _best_of(lambda: shards.execute_plan(plan), repeat)
+    _print_table(f"synthetic frame ({rows:,} rows, {branches:,} branches), {os.cpu_count()} CPUs, "
+                 f"best of {repeat}", table)
+
+
+# ── granularity ─────────────────────────────────────────────────────────────
+
+def bench_granularity(rows: int, repeat: int):
+    """Trend by period: per-query resample of raw dates vs precomputed calendar bucket keys."""
+    import contextlib
+    import io
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.calendar_buckets import add_bucket_columns
+
+    df = _synthetic_frame(rows)
+    start = time.perf_counter()
+    bucketed = add_bucket_columns(df.copy(), "date")
+    build_s = time.perf_counter() - start
+    engine = AnalyticsEngine()
+    freq = {"week": "W-SUN", "month": "M", "quarter": "Q", "year": "Y"}
+
+    def resample(g: str) -> pd.Series:
+        return df.groupby(df["date"].dt.to_period(freq[g]).dt.start_time)["upi_value"].sum()
+
+    table = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        daily = {"metric": "upi_value", "aggregation": "sum", "group_by": "date"}
+        table["day (raw dates)"] = {
+            "resample ms": _best_of(lambda: engine.execute_plan(df, daily), repeat),
+            "bucket ms":   float("nan"),
+            "points":      len(engine.execute_plan(df, daily)["trend_data"]),
+        }
+        for g in freq:
+            plan = {**daily, "granularity": g}
+            got, ref = engine.execute_plan(bucketed, plan)["trend_data"], resample(g)
+            assert got.index.equals(ref.index) and np.allclose(got.to_numpy(), ref.to_numpy()), g
+            table[g] = {
+                "resample ms": _best_of(lambda: resample(g), repeat),
+                "bucket ms":   _best_of(lambda: engine.execute_plan(bucketed, plan), repeat),
+                "points":      len(got),
+            }
+    _print_table(f"synthetic frame ({rows:,} rows, 2 years), best of {repeat}", table)
+    print(f"\n  bucket columns built once in {build_s * 1000:.0f} ms "
+          f"({sum(bucketed[c].nbytes for c in bucketed.columns if '__' in c) / 1e6:.1f} MB)")
+
+
+# ── window ──────────────────────────────────────────────────────────────────
+
+def bench_window(rows: int, repeat: int):
+    """Per-branch monthly window metrics: pandas groupby shift/rolling vs the engine's grid pass."""
+    import contextlib
+    import io
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.calendar_buckets import add_bucket_columns
+
+    df = add_bucket_columns(_synthetic_frame(rows), "date")
+    engine = AnalyticsEngine()
+
+    def pandas_window(function: str, k: int) -> pd.DataFrame:
+        month = df["date"].dt.to_period("M").dt.start_time.rename("date")
+        monthly = df.groupby(["branch", month], observed=True)["upi_value"].sum().sort_index()
+        by_branch = monthly.groupby(level="branch", observed=True)
+        if function == "rolling_mean":
+            out = by_branch.rolling(k, min_periods=k).mean().droplevel(0)
+        elif function == "lag":
+            out = by_branch.shift(k)
+        else:
+            out = by_branch.pct_change(k) * 100
+        return out.unstack("branch")
+
+    cases = {
+        "MoM % change":          ("change", 1, {"function": "mom"}),
+        "YoY % change":          ("change", 12, {"function": "yoy"}),
+        "3-month rolling":       ("rolling_mean", 3, {"function": "rolling_mean", "periods": 3}),
+        "lag 1 month":           ("lag", 1, {"function": "lag", "periods": 1}),
+    }
+    table = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, (function, k, window) in cases.items():
+            plan = {"metric": "upi_value", "aggregation": "sum", "comparison_type": "branch_comparison",
+                    "granularity": "month", "window": window}
+            got, ref = engine.execute_plan(df, plan)["window_data"], pandas_window(function, k)
+            assert np.allclose(got.to_numpy(), ref[got.columns].to_numpy(), equal_nan=True), label
+            pandas_s = _best_of(lambda: pandas_window(function, k), repeat)
+            engine_s = _best_of(lambda: engine.execute_plan(df, plan), repeat)
+            table[label] = {"pandas ms": pandas_s, "engine ms": engine_s, "speedup": pandas_s / engine_s}
+    _print_table(f"synthetic frame ({rows:,} rows, {df['branch'].nunique()} branches), best of {repeat}", table)
+
+
+# ── wide ────────────────────────────────────────────────────────────────────
+
+def bench_wide(branches: int, days: int, repeat: int):
+    """Cross-dataset plans: per-query merge of two sources vs one scan of the pre-joined wide table."""
+    import contextlib
+    import io
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.calendar_buckets import add_bucket_columns
+    from improved_outputs.rollup import RollupCube
+    from improved_outputs.wide_table import build_wide, WIDE_SCHEMA
+
+    rng   = np.random.default_rng(0)
+    names = [f"B{i:04d}" for i in range(branches)]
+    dates = pd.date_range("2023-01-01", periods=days)
+    grain = {
+        "date":   np.repeat(dates.to_numpy(), branches),
+        "branch": pd.Categorical(np.tile(names, days), categories=names),
+    }
+    rows = days * branches
+    sources = {
+        "loan":     pd.DataFrame({**grain, "npa_percent": rng.random(rows) * 5,
+                                  "gold_loan_amt": rng.gamma(2.0, 8e5, rows)}),
+        "payment":  pd.DataFrame({**grain, "fraud_rate_percent": rng.random(rows) * 2,
+                                  "upi_value": rng.gamma(2.0, 5e5, rows)}),
+        "customer": pd.DataFrame({**grain, "active_customers": rng.integers(0, 5000, rows).astype(np.int32)}),
+    }
+    start = time.perf_counter()
+    wide  = add_bucket_columns(build_wide(sources), "date")
+    build_s = time.perf_counter() - start
+    metrics = [c for c in WIDE_SCHEMA["counts"] + WIDE_SCHEMA["amounts"] + WIDE_SCHEMA["rates"] if c in wide.columns]
+    cube   = RollupCube.build(wide, metrics, "date", "branch")
+    engine = AnalyticsEngine()
+
+    # The quarter of the last generated day, so the window is never empty
+    quarter = (dates[-1].month - 1) // 3
+    plans = {
+        "fraud & NPA":  {"comparison_type": "multi_metric_branch_comparison", "aggregation": "mean",
+                         "metrics": ["fraud_rate_percent", "npa_percent"]},
+        f"UPI & gold, Q{quarter + 1}": {"comparison_type": "multi_metric_branch_comparison", "aggregation": "sum",
+                         "metrics": ["upi_value", "gold_loan_amt"],
+                         "date_filter": {"type": "quarter", "year": dates[-1].year,
+                                         "months": [quarter * 3 + 1, quarter * 3 + 2, quarter * 3 + 3]}},
+    }
+
+    def merged(plan: Dict) -> pd.DataFrame:
+        a, b = plan["metrics"]
+        left  = sources["payment"][["date", "branch", a]]
+        right = sources["loan"][["date", "branch", b]]
+        if plan.get("date_filter"):
+            left  = engine._apply_date_filter(left, plan["date_filter"])
+            right = engine._apply_date_filter(right, plan["date_filter"])
+        joined = left.merge(right, on=["date", "branch"], how="outer")
+        return engine._agg(joined.groupby("branch", observed=True)[[a, b]], plan["aggregation"])
+
+    table, errors = {}, {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, plan in plans.items():
+            result = engine.execute_plan(wide, plan)
+            if "multi_metric_comparison" not in result:
+                errors[label] = result.get("error", "no comparison returned")
+                continue
+            got = result["multi_metric_comparison"]
+            ref = merged(plan)
+            assert np.allclose(got[plan["metrics"]].to_numpy(), ref.loc[got.index].to_numpy()), label
+            table[label] = {
+                "merge ms":       _best_of(lambda: merged(plan), repeat),
+                "scan ms":        _best_of(lambda: engine.execute_plan(wide, plan), repeat),
+                "rollup ms":      _best_of(lambda: engine.execute_plan(wide, plan, cube), repeat),
+            }
+    if table:
+        _print_table(f"{rows:,} rows per source ({branches:,} branches × {days} days), best of {repeat}", table)
+    for label, error in errors.items():
+        print(f"  ⚠️  {label}: {error}")
+    print(f"\n  wide table built once in {build_s * 1000:.0f} ms "
+          f"({len(wide):,} rows, {wide.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+
+
+# ── topk ────────────────────────────────────────────────────────────────────
+
+def bench_topk(groups: int, limits: list, repeat: int):
+    """Ranked comparisons over many groups: full sort_values + head vs partial top-K selection."""
+    from improved_outputs.analytics_engine import AnalyticsEngine
+
+    rng    = np.random.default_rng(0)
+    labels = pd.Index([f"G{i:07d}" for i in range(groups)], name="branch")
+    # rounded values so the K-th place is regularly tied
+    single = pd.Series(np.round(rng.gamma(2.0, 5e3, groups), -1), index=labels, name="upi_value")
+    data   = {m: pd.Series(np.round(rng.random(groups) * 5, 2), index=labels) for m in ("fraud", "npa")}
+    engine = AnalyticsEngine()
+
+    def full_single(plan: Dict) -> pd.Series:
+        return single.sort_values(ascending=False, kind="stable").head(plan["limit"])
+
+    def full_multi(plan: Dict) -> pd.DataFrame:
+        frame = pd.DataFrame(data)
+        frame["total"] = frame.sum(axis=1)
+        return frame.sort_values("total", ascending=False, kind="stable").head(plan["limit"])
+
+    table = {}
+    for limit in limits:
+        plan = {"metrics": list(data), "sort_order": "descending", "limit": limit}
+        got  = engine._single_metric_result(single, plan)["comparison_data"]
+        assert got.index.equals(full_single(plan).index), f"single top-{limit}"
+        got  = engine._multi_metric_result(data, plan)["multi_metric_comparison"]
+        assert got.index.equals(full_multi(plan).index), f"multi top-{limit}"
+        table[f"top {limit}"] = {
+            "sort ms":   _best_of(lambda: full_single(plan), repeat),
+            "top-K ms":  _best_of(lambda: engine._single_metric_result(single, plan), repeat),
+            "multi sort": _best_of(lambda: full_multi(plan), repeat),
+            "multi top-K": _best_of(lambda: engine._multi_metric_result(data, plan), repeat),
+        }
+    _print_table(f"{groups:,} groups, best of {repeat}", table)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="MCP Analytics Platform benchmarks")
+    ap.add_argument("--data-dir", type=str, default=".", help="Directory containing the bundled CSVs")
+    ap.add_argument("--repeat", type=int, default=5)
+    sub = ap.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("cache", help="Pickle vs memory-mapped cache load time")
+    p.add_argument("--scale", type=int, default=100)
+
+    p = sub.add_parser("schema", help="Inferred vs explicit dtypes: parse time and memory")
+    p.add_argument("--scale", type=int, default=100)
+
+    p = sub.add_parser("ingest", help="Full reload vs incremental append ingest")
+    p.add_argument("--scale", type=int, default=100)
+    p.add_argument("--append-rows", type=int, default=3650)
+
+    p = sub.add_parser("stream", help="Chunked streaming execution under a memory budget")
+    p.add_argument("--scale", type=int, default=1000)
+    p.add_argument("--max-memory", type=float, default=64, metavar="MB")
+
+    p = sub.add_parser("startup", help="Serial vs parallel vs lazy dataset loading")
+    p.add_argument("--scale", type=int, default=100)
+
+    p = sub.add_parser("partition", help="Single file vs month/branch partition pruning")
+    p.add_argument("--scale", type=int, default=100)
+
+    p = sub.add_parser("rollup", help="Rollup-cube-served vs raw-scan plan latency")
+    p.add_argument("--scale", type=int, default=100)
+
+    p = sub.add_parser("execute", help="Copy-based vs mask-based raw plan execution")
+    p.add_argument("--rows", type=int, default=10_000_000)
+
+    p = sub.add_parser("index", help="Full scan vs date/branch index row selection")
+    p.add_argument("--rows", type=int, default=10_000_000)
+
+    p = sub.add_parser("growth", help="Per-branch loop vs vectorised cross-metric growth")
+    p.add_argument("--rows", type=int, default=1_000_000)
+
+    p = sub.add_parser("batch", help="Plan-at-a-time vs batched multi-plan execution")
+    p.add_argument("--rows", type=int, default=5_000_000)
+
+    p = sub.add_parser("groupagg", help="pandas groupby vs NumPy bincount grouped aggregation")
+    p.add_argument("--rows", type=int, default=2_000_000)
+
+    p = sub.add_parser("views", help="Plan execution vs materialized view reads and append upkeep")
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--append-rows", type=int, default=10_000)
+
+    p = sub.add_parser("approx", help="Exact vs sample/sketch approximate plans: latency and error")
+    p.add_argument("--rows", type=int, default=5_000_000)
+
+    p = sub.add_parser("shards", help="Serial vs branch-sharded multi-process execution by worker count")
+    p.add_argument("--rows", type=int, default=5_000_000)
+    p.add_argument("--branches", type=int, default=2000)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+
+    p = sub.add_parser("granularity", help="Per-query date resample vs calendar bucket keys for trends")
+    p.add_argument("--rows", type=int, default=5_000_000)
+
+    p = sub.add_parser("window", help="pandas groupby shift/rolling vs vectorised window metrics per branch")
+    p.add_argument("--rows", type=int, default=5_000_000)
+
+    p = sub.add_parser("wide", help="Per-query merge vs pre-joined wide table for cross-dataset plans")
+    p.add_argument("--branches", type=int, default=2000)
+    p.add_argument("--days", type=int, default=730)
+
+    p = sub.add_parser("topk", help="Full sort vs partial top-K selection for ranked comparisons")
+    p.add_argument("--groups", type=int, default=1_000_000)
+    p.add_argument("--limit", type=int, nargs="+", default=[1, 10, 100])
+
+    args = ap.parse_args()
+    data_dir = Path(args.data_dir)
+    if args.bench == "cache":
+        bench_cache(data_dir, args.scale, args.repeat)
+    elif args.bench == "schema":
+        bench_schema(data_dir, args.scale, args.repeat)
+    elif args.bench == "ingest":
+        bench_ingest(data_dir, args.scale, args.append_rows)
+    elif args.bench == "stream":
+        if not bench_stream(data_dir, args.scale, args.max_memory):
+            sys.exit(1)
+    elif args.bench == "startup":
+        bench_startup(data_dir, args.scale)
+    elif args.bench == "partition":
+        bench_partition(data_dir, args.scale, args.repeat)
+    elif args.bench == "rollup":
+        bench_rollup(data_dir, args.scale, args.repeat)
+    elif args.bench == "execute":
+        bench_execute(args.rows, args.repeat)
+    elif args.bench == "index":
+        bench_index(args.rows, args.repeat)
+    elif args.bench == "growth":
+        bench_growth(args.rows, args.repeat)
+    elif args.bench == "batch":
+        bench_batch(args.rows, args.repeat)
+    elif args.bench == "groupagg":
+        bench_groupagg(args.rows, args.repeat)
+    elif args.bench == "views":
+        bench_views(args.rows, args.append_rows, args.repeat)
+    elif args.bench == "approx":
+        bench_approx(args.rows, args.repeat)
+    elif args.bench == "shards":
+        bench_shards(args.rows, args.branches, args.workers, args.repeat)
+    elif args.bench == "granularity":
+        bench_granularity(args.rows, args.repeat)
+    elif args.bench == "window":
+        bench_window(args.rows, args.repeat)
+    elif args.bench == "wide":
+        bench_wide(args.branches, args.days, args.repeat)
+    elif args.bench == "topk":
+        bench_topk(args.groups, args.limit, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
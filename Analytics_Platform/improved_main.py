@@ -5,23 +5,56 @@ Main entry point — used by app.py (Streamlit) and CLI.
 
 import json
 import os
+import threading
+import time
 from typing import Dict, Any, Optional
 
-from improved_outputs.data_loader import DataLoader
+from improved_outputs.data_loader import DataLoader, LazyDatasets
+from improved_outputs.dataset_watcher import DatasetWatcher
 from improved_outputs.analytics_engine import AnalyticsEngine
+from improved_outputs.result_cache import ResultCache
 from improved_outputs.visualization import VisualizationEngine
 from improved_outputs.insight_generator import InsightGenerator
 from improved_outputs.llm_query_parser import LLMQueryParser
+from improved_outputs.calendar_buckets import data_columns
+from improved_outputs.shared_store import SharedDatasetStore
+from improved_outputs.sharded import ShardedExecutor
+from improved_outputs.schemas import DATASET_SCHEMAS
+from improved_outputs.wide_table import WIDE, WIDE_SCHEMA, plan_dataset
 
 
 class MCPAnalyticsPlatform:
 
-    def __init__(self, use_local_llm: bool = True):
+    def __init__(self, use_local_llm: bool = True, float32_amounts: bool = False,
+                 max_memory_mb: Optional[float] = None, load_mode: str = "parallel",
+                 load_executor: str = "process", shared_store: bool = False, watch: bool = False,
+                 watch_interval: float = 2.0, approximate: bool = False, workers: int = 1):
+        """
+        load_mode: "serial"   load datasets one after another
+                   "parallel" load datasets concurrently (see load_executor)
+                   "lazy"     load each dataset on first access
+        load_executor: for "parallel", "process" parses uncached files in worker
+                       processes that write the column store, which this process
+                       then memory-maps; "thread" loads in a thread pool
+        shared_store: attach to datasets published in shared memory by a
+                      `--publish-shared` process; anything not published is
+                      loaded privately as usual. Attached datasets carry no
+                      rollup cube or column statistics, so plans those would
+                      serve are scanned instead (execution says so)
+        watch: reload datasets in the background when their source files (or
+               shared-memory versions) change; queries already running keep
+               the snapshot they started with
+        approximate: estimate large aggregations from a per-branch sample and
+                     sketches, with error bounds, instead of reading every row
+        workers: run full scans on this many worker processes, each holding
+                 one branch shard of the dataset (1 = in this process)
+        """
         print("🚀 Initialising MCP Analytics Platform...")
+        started = time.perf_counter()
 
         self.use_local_llm    = use_local_llm
-        self.data_loader      = DataLoader()
-        self.analytics_engine = AnalyticsEngine()
+        self.data_loader      = DataLoader(float32_amounts=float32_amounts, max_memory_mb=max_memory_mb)
+        self.analytics_engine = AnalyticsEngine(ResultCache(), approximate=approximate)
         self.viz_engine       = VisualizationEngine()
         self.insight_gen      = InsightGenerator()
 
@@ -30,24 +63,227 @@ class MCPAnalyticsPlatform:
         self.parser = LLMQueryParser(provider=provider, ollama_model="mistral")
 
         # Load datasets
-        self.datasets = self.data_loader.load_all_datasets()
-        if not self.datasets:
-            print("⚠️  No datasets loaded!")
+        self.load_mode   = load_mode
+        self.shared      = SharedDatasetStore() if shared_store else None
+        self._publishing = False
+        self._swap_lock  = threading.Lock()
+        self._build_lock = threading.Lock()      # per-snapshot structures built on first use
+        self.workers     = workers
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        attached = self._attach_shared() if self.shared else {}
+        if attached:
+            self.datasets = attached
+            for name in DATASET_SCHEMAS:
+                if name not in attached:
+                    df = self.data_loader.load_dataset(name)
+                    if df is not None:
+                        self.datasets[name] = df
+            print(f"🔗 Attached shared datasets: {list(attached.keys())}")
+        elif load_mode == "lazy":
+            self.datasets = self.data_loader.lazy_datasets()
+            print(f"💤 Datasets load on first use: {list(self.datasets.keys())}")
         else:
-            print(f"✅ Loaded datasets: {list(self.datasets.keys())}\n")
+            self.datasets = self.data_loader.load_all_datasets(parallel=(load_mode == "parallel"),
+                                                               executor=load_executor)
+            if not self.datasets and not self.data_loader.streamed and not self.data_loader.partitioned:
+                print("⚠️  No datasets loaded!")
+            else:
+                print(f"✅ Loaded datasets: {list(self.datasets.keys())}")
+        if load_mode != "lazy" or attached:
+            for name, df in self.datasets.items():
+                self._snapshots[name] = self._make_snapshot(name, df, attached=name in attached)
+
+        self.watcher = self._start_watcher(set(attached), watch_interval) if watch else None
+        self.startup_seconds = time.perf_counter() - started
+        print(f"⏱️  Cold start ({load_mode}): {self.startup_seconds:.2f}s\n")
+
+    # ── Shared memory ─────────────────────────────────────────
+
+    def _attach_shared(self) -> Dict[str, Any]:
+        attached = {}
+        for name in DATASET_SCHEMAS:
+            df = self.shared.attach(name)
+            if df is not None:
+                attached[name] = df
+        return attached
+
+    def publish_shared(self):
+        """Publish every loaded dataset so other processes can attach to it"""
+        if self.shared is None:
+            self.shared = SharedDatasetStore()
+        self._publishing = True
+        for name in list(self.datasets.keys()):
+            df = self.datasets.get(name)
+            if df is not None:
+                self._publish(name, df)
+
+    def _publish(self, name: str, df):
+        """Publish df without its calendar bucket keys (attached frames derive them per query)"""
+        self.shared.publish(name, df[data_columns(df.columns)])
+
+    # ── Snapshots & hot reload ────────────────────────────────
+
+    def _make_snapshot(self, name: str, df, attached: bool = False) -> Dict[str, Any]:
+        if attached:
+            return {"df": df, "rollup": None, "stats": None,
+                    "index": self.data_loader.build_index(name, df),
+                    "version": f"shm-v{self.shared.attached_versions.get(name, 0)}", "attached": True}
+        stats = self.data_loader.stats.get(name)
+        return {
+            "df":      df,
+            "rollup":  self.data_loader.rollups.get(name),
+            "stats":   stats,
+            "index":   self.data_loader.indexes.get(name),
+            "version": stats.version if stats else None,
+        }
+
+    def _snapshot(self, name: str) -> Dict[str, Any]:
+        """The dataset version a query runs on, taken once so a reload cannot change it mid-query"""
+        with self._swap_lock:
+            snap = self._snapshots.get(name)
+        if snap is not None:
+            return snap
+        if name == WIDE:
+            return self._wide_snapshot()
+        df = self.datasets.get(name)     # lazy first load, or missing
+        if df is None:
+            return {"df": None, "version": None}
+        snap = self._make_snapshot(name, df)
+        with self._swap_lock:            # kept, so structures built on it later are reused
+            return self._snapshots.setdefault(name, snap)
+
+    def _wide_snapshot(self) -> Dict[str, Any]:
+        """The wide table over the current snapshots of its sources, built by the first query that needs it"""
+        with self._build_lock:
+            with self._swap_lock:
+                snap = self._snapshots.get(WIDE)
+            if snap is not None:
+                return snap
+            sources = {name: self._snapshot(name) for name in WIDE_SCHEMA["sources"]}
+            df = self.data_loader.load_wide({n: s["df"] for n, s in sources.items() if s["df"] is not None},
+                                            {n: s["version"] for n, s in sources.items()})
+            if df is None:
+                return {"df": None, "version": None}
+            snap = self._make_snapshot(WIDE, df)
+            with self._swap_lock:
+                if any(self._snapshots.get(n) is not s for n, s in sources.items()):
+                    return snap     # a source was swapped meanwhile: answer this query, rebuild for the next
+                return self._snapshots.setdefault(WIDE, snap)
+
+    def _approximate_index(self, name: str, snapshot: Dict[str, Any], plan: Dict[str, Any]):
+        """The snapshot's sample and sketches, built the first time an approximate plan needs them"""
+        if not plan.get("approximate", self.analytics_engine.approximate) or snapshot.get("df") is None:
+            return None
+        with self._build_lock:
+            if snapshot.get("approx") is None:
+                started = time.perf_counter()
+                snapshot["approx"] = self.data_loader.build_approximate(name, snapshot["df"])
+                print(f"🧪 {name}: sample and sketches built in {time.perf_counter() - started:.2f}s")
+            return snapshot["approx"]
+
+    def _sharded_executor(self, name: str, snapshot: Dict[str, Any]) -> Optional[ShardedExecutor]:
+        """The snapshot's branch shards on worker processes, started by the first query that needs them"""
+        if self.workers <= 1 or snapshot.get("df") is None:
+            return None
+        with self._build_lock:
+            if snapshot.get("shards") is None:
+                snapshot["shards"] = ShardedExecutor(snapshot["df"], self.workers, engine=self.analytics_engine)
+            return snapshot["shards"]
+
+    def _swap(self, name: str, snapshot: Dict[str, Any]):
+        with self._swap_lock:
+            previous = self._snapshots.get(name)
+            self._snapshots = {**self._snapshots, name: snapshot}
+            wide = self._snapshots.get(WIDE) if name in WIDE_SCHEMA["sources"] else None
+            if wide is not None:        # rebuilt from the new version by the next query that needs it
+                self._snapshots = {n: s for n, s in self._snapshots.items() if n != WIDE}
+            if isinstance(self.datasets, LazyDatasets):
+                self.datasets.swap(name, snapshot["df"])
+            else:
+                self.datasets = {**self.datasets, name: snapshot["df"]}
+        self.analytics_engine.results.invalidate(name, keep_version=snapshot["version"])
+        self.data_loader.views.on_load(name, snapshot["df"], snapshot["version"])
+        for stale in (previous, wide):
+            if stale and stale.get("shards"):
+                stale["shards"].close()     # waits for queries still running on the old shards
+        if wide is not None:
+            self.analytics_engine.results.invalidate(WIDE)
+        print(f"🔄 {name} swapped to version {str(snapshot['version'])[:12]}")
+
+    def dataset_versions(self) -> Dict[str, Optional[str]]:
+        with self._swap_lock:
+            return {name: snap["version"] for name, snap in self._snapshots.items()}
+
+    def _start_watcher(self, attached: set, interval: float) -> DatasetWatcher:
+        def token(name: str):
+            if name in attached:
+                return self.shared.version(name)
+            st = os.stat(self.data_loader.data_dir / DATASET_SCHEMAS[name]["file"])
+            return st.st_mtime_ns, st.st_size
+
+        def reload(name: str) -> bool:
+            if name in attached:
+                df = self.shared.attach(name)
+                if df is None:
+                    return False
+                self._swap(name, self._make_snapshot(name, df, attached=True))
+                return True
+            if isinstance(self.datasets, LazyDatasets) and name not in self.datasets.loaded():
+                return True          # the first query will load the current file anyway
+            df = self.data_loader.load_dataset(name)
+            if df is None:
+                return False
+            self._swap(name, self._make_snapshot(name, df))
+            if self._publishing:
+                self._publish(name, df)
+            return True
+
+        names = [n for n in DATASET_SCHEMAS
+                 if n in attached or (n not in self.data_loader.streamed and not self.data_loader.is_partitioned(n))]
+        return DatasetWatcher(names, token, reload, interval).start()
+
+    def close(self):
+        """Stop the watcher, unlink anything this process published and persist cache access times"""
+        if self.watcher:
+            self.watcher.stop()
+        self.data_loader.cache_manager.flush()
+        if self.shared:
+            self.shared.close()
+        for snapshot in self._snapshots.values():
+            if snapshot.get("shards"):
+                snapshot["shards"].close()
 
     # ── Public API ────────────────────────────────────────────
 
+    def register_view(self, query) -> Dict[str, Any]:
+        """
+        Keep a standing query (text or plan) materialized: its aggregates are
+        updated in place as rows are ingested and process_query reads them
+        instead of executing the plan
+        """
+        plan = self.parser.parse(query) if isinstance(query, str) else dict(query)
+        dataset_name = plan["dataset"] = plan_dataset(plan)
+        snapshot = self._snapshot(dataset_name)
+        if snapshot["df"] is None:
+            return {"success": False, "error": f"Dataset '{dataset_name}' is not held in memory"}
+        return self.data_loader.views.register(plan, snapshot["df"], snapshot.get("version"))
+
     def process_query(self, user_query: str) -> Dict[str, Any]:
         print(f"\n📝 Query: '{user_query}'")
         try:
             # 1. Parse natural language → execution plan
             plan = self.parser.parse(user_query)
 
-            # 2. Resolve dataset
-            dataset_name = plan.get("dataset", "loan")
-            df = self.datasets.get(dataset_name)
-            if df is None:
+            # 2. Resolve dataset (metrics from several datasets read the pre-joined wide table)
+            dataset_name = plan["dataset"] = plan_dataset(plan)
+            snapshot = self._snapshot(dataset_name)
+            df = snapshot["df"]
+            streamed = dataset_name in self.data_loader.streamed
+            if df is None and self.data_loader.is_partitioned(dataset_name):
+                df = self.data_loader.load_partitions(dataset_name, plan)
+                if df is None:
+                    return {"success": False, "error": "No partition matches the filters.", "query": user_query}
+            if df is None and not streamed:
                 return {
                     "success": False,
                     "error": f"Dataset '{dataset_name}' not found. Available: {list(self.datasets.keys())}",
@@ -58,7 +294,30 @@ class MCPAnalyticsPlatform:
 
             # 3. Execute analytics
             print("⚙️  Executing...")
-            result = self.analytics_engine.execute_plan(df, plan)
+            if streamed:
+                result = self.analytics_engine.execute_plan_streaming(
+                    lambda usecols: self.data_loader.iter_dataset_chunks(dataset_name, usecols),
+                    self.data_loader.dataset_columns(dataset_name),
+                    plan,
+                )
+                execution = {"strategy": "streaming", "reason": "dataset exceeds the memory budget; read in chunks"}
+            elif (result := self.data_loader.views.lookup(plan, snapshot.get("version"))) is not None:
+                print("🪟 Served from materialized view")
+                execution = {"strategy": "materialized_view",
+                             "reason": "standing query; aggregates are updated as rows are ingested"}
+            else:
+                access = (snapshot.get("rollup"), snapshot.get("stats"), snapshot.get("index"))
+                approx = self._approximate_index(dataset_name, snapshot, plan)
+                execution = self.analytics_engine.explain(df, plan, *access, approx=approx)
+                shards = self._sharded_executor(dataset_name, snapshot) if execution["strategy"] == "scan" else None
+                if shards is not None:
+                    execution = self.analytics_engine.explain(df, plan, *access, approx=approx, shards=shards)
+                result = self.analytics_engine.execute_plan(df, plan, *access, snapshot.get("version"),
+                                                            approx=approx, shards=shards)
+                if snapshot.get("attached"):
+                    execution = {**execution, "reason": "; ".join(filter(None, [
+                        execution["reason"], "attached from shared memory: no rollup cube or column "
+                                             "statistics in this process, so rollup/stats plans scan"]))}
             if not result.get("success", True):
                 return {"success": False, "error": result.get("error", "Analytics failed"), "query": user_query}
 
@@ -71,12 +330,14 @@ class MCPAnalyticsPlatform:
             insights = self.insight_gen.generate_insights(result, plan, user_query)
 
             return {
-                "success":       True,
-                "query":         user_query,
-                "plan":          plan,
-                "result":        result,
-                "visualization": viz_path,
-                "insights":      insights,
+                "success":         True,
+                "query":           user_query,
+                "plan":            plan,
+                "dataset_version": snapshot.get("version"),
+                "execution":       execution,
+                "result":          result,
+                "visualization":   viz_path,
+                "insights":        insights,
             }
 
         except Exception as e:
@@ -93,6 +354,10 @@ class MCPAnalyticsPlatform:
         print("\nDatasets loaded:")
         for name, df in self.datasets.items():
             print(f"  • {name}: {len(df):,} rows")
+        for name in self.data_loader.streamed:
+            print(f"  • {name}: streamed in chunks")
+        for name in self.data_loader.partitioned:
+            print(f"  • {name}: partitioned, read per query")
         print("\nType any question. Type 'exit' to quit.\n")
 
         while True:
@@ -128,10 +393,48 @@ def main():
     import argparse
     ap = argparse.ArgumentParser(description="MCP Analytics Platform")
     ap.add_argument("--query", type=str, help="Run a single query and exit")
+    ap.add_argument("--float32-amounts", action="store_true",
+                    help="Store currency amount columns as float32 to halve their memory")
+    ap.add_argument("--max-memory", type=float, default=None, metavar="MB",
+                    help="Memory budget; datasets too large for it are streamed in chunks")
+    ap.add_argument("--load-mode", choices=["serial", "parallel", "lazy"], default="parallel",
+                    help="How datasets are loaded at startup")
+    ap.add_argument("--load-executor", choices=["process", "thread"], default="process",
+                    help="Worker pool for --load-mode parallel")
+    ap.add_argument("--publish-shared", action="store_true",
+                    help="Load datasets, publish them to shared memory and serve until Ctrl+C")
+    ap.add_argument("--shared", action="store_true",
+                    help="Attach to datasets published by a --publish-shared process")
+    ap.add_argument("--watch", action="store_true",
+                    help="Reload datasets in the background when their files change")
+    ap.add_argument("--approximate", action="store_true",
+                    help="Estimate large aggregations from samples and sketches, with error bounds")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Worker processes for full scans, each holding one branch shard")
+    ap.add_argument("--view", action="append", default=[], metavar="QUERY",
+                    help="Standing query kept as a materialized view (repeatable)")
     args = ap.parse_args()
 
-    platform = MCPAnalyticsPlatform()
-    if args.query:
+    platform = MCPAnalyticsPlatform(float32_amounts=args.float32_amounts, max_memory_mb=args.max_memory,
+                                    load_mode=args.load_mode, load_executor=args.load_executor,
+                                    shared_store=args.shared, watch=args.watch,
+                                    approximate=args.approximate, workers=args.workers)
+    for query in args.view:
+        registered = platform.register_view(query)
+        if not registered["success"]:
+            print(f"⚠️  View not registered ({query}): {registered['error']}")
+    if args.publish_shared:
+        platform.publish_shared()
+        print("📡 Serving shared datasets — press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            platform.close()
+            print("👋 Shared datasets unpublished")
+    elif args.query:
         resp = platform.process_query(args.query)
         print(json.dumps(resp, indent=2, default=str))
     else:
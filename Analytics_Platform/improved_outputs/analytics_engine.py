@@ -4,18 +4,252 @@ Executes execution plans against DataFrames.
 Filters are always applied first, before any analytics.
 """
 
+import json
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Iterable, TYPE_CHECKING
+
+from improved_outputs.streaming import PartialAggregate, SUPPORTED_AGGREGATIONS, STATE_NEEDED
+from improved_outputs.rollup import RollupCube, CUBE_AGGREGATIONS, PERIOD_MONTHS
+from improved_outputs.stats_catalog import StatsCatalog
+from improved_outputs.row_index import RowIndex
+from improved_outputs.result_cache import ResultCache, canonical_plan
+from improved_outputs.query_planner import QueryPlanner, DATE
+from improved_outputs.group_kernels import grouped_reduce, group_codes, FAST_AGGREGATIONS
+from improved_outputs.approximate import ApproximateIndex, SAMPLED_AGGREGATIONS, SKETCH_AGGREGATIONS, CONFIDENCE
+from improved_outputs.calendar_buckets import (
+    BUCKETED, NO_BUCKET, bucket_column, parse_bucket_column, is_bucket_column, dated_rows, label_periods,
+    bucket_keys, bucket_starts, data_columns,
+)
+from improved_outputs.windows import resolve_window, apply_window
+from improved_outputs.ranking import top_k
+
+if TYPE_CHECKING:      # sharded imports this module; the executor is only named in annotations
+    from improved_outputs.sharded import ShardedExecutor
 
 
 class AnalyticsEngine:
 
-    def execute_plan(self, df: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, Any]:
-        # Always filter first
-        working = df.copy()
-        working = self._apply_filters(working, plan.get("filters", {}))
-        working = self._apply_date_filter(working, plan.get("date_filter", {}))
+    INDEX_MAX_FRACTION = 0.25   # above this share of rows, gathering index postings loses to a scan
+    SPARSE_SWITCH      = 8      # predicates switch to surviving positions below 1/8 of the rows
+
+    def __init__(self, result_cache: Optional[ResultCache] = None, approximate: bool = False):
+        """
+        result_cache: reuse results of plans already run on the same dataset version
+        approximate:  answer plans from an ApproximateIndex when one is passed
+                      (a plan's own "approximate" key overrides this)
+        """
+        self.results = result_cache
+        self.approximate = approximate
+
+    def execute_plan(self, df: pd.DataFrame, plan: Dict[str, Any],
+                     rollup: Optional[RollupCube] = None,
+                     stats: Optional[StatsCatalog] = None,
+                     index: Optional[RowIndex] = None,
+                     version: Optional[str] = None,
+                     approx: Optional[ApproximateIndex] = None,
+                     shards: Optional["ShardedExecutor"] = None) -> Dict[str, Any]:
+        """
+        rollup:  the dataset's (branch, month) cube; plans it can answer skip the raw scan
+        stats:   the dataset's column statistics; used to answer trivial plans,
+                 reject impossible filters and resolve relative dates without a scan
+        index:   the dataset's date/branch row index; branch and date filters
+                 select rows by binary search instead of a full-column scan
+        version: the dataset version df holds (defaults to the stats' version);
+                 results are only cached when it is known
+        approx:  the dataset's sample and sketches; in approximate mode, plans
+                 that would read more rows than the sample holds are estimated
+                 from it, with error bounds (see _approximate)
+        shards:  a ShardedExecutor over df; plans that would scan every row
+                 run on its worker processes instead
+        """
+        plan = self._with_mode(plan)
+        version = version or (stats.version if stats is not None else None)
+        key = self.results.key(plan, version) if self.results is not None and version else None
+        if key is not None:
+            cached = self.results.get(key)
+            if cached is not None:
+                print("♻️  Served from result cache")
+                return cached
+
+        result = self._execute(df, plan, rollup, stats, index, approx, shards)
+        if key is not None:
+            self.results.put(key, plan.get("dataset"), version, result)
+        return result
+
+    def execute_plans(self, df: pd.DataFrame, plans: List[Dict[str, Any]],
+                      rollup: Optional[RollupCube] = None,
+                      stats: Optional[StatsCatalog] = None,
+                      index: Optional[RowIndex] = None,
+                      version: Optional[str] = None,
+                      approx: Optional[ApproximateIndex] = None) -> List[Dict[str, Any]]:
+        """
+        Run several plans against the same dataset version. Plans sharing a
+        filter/date slice select their rows once, and the grouped aggregations
+        they need run as one multi-column groupby per (group column, aggregation).
+        Returns one result per plan, in order, exactly as execute_plan would.
+        """
+        plans = [self._with_mode(plan) for plan in plans]
+        version = version or (stats.version if stats is not None else None)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(plans)
+        keys: List[Optional[str]] = [None] * len(plans)     # cache keys of plans to store
+        slices: Dict[str, List[tuple]] = {}
+
+        for i, plan in enumerate(plans):
+            if self.results is not None and version:
+                keys[i] = self.results.key(plan, version)
+                results[i] = self.results.get(keys[i])
+                if results[i] is not None:
+                    keys[i] = None
+                    continue
+            physical = self._physical_plan(df, plan, rollup, stats, index)
+            results[i] = self._shortcut(physical, rollup, stats)
+            if results[i] is None and self._use_approximate(physical, approx):
+                results[i] = self._approximate(df, physical["plan"], approx)
+            if results[i] is None:
+                resolved = physical["plan"]
+                slice_key = json.dumps(canonical_plan({"filters": resolved.get("filters"),
+                                                       "date_filter": resolved.get("date_filter")}),
+                                       sort_keys=True, default=str)
+                slices.setdefault(slice_key, []).append((i, physical))
+
+        for members in slices.values():
+            batch = [physical["plan"] for _, physical in members]
+            needed  = {c for plan in batch for c in self._plan_columns(df, plan)}
+            columns = [c for c in df.columns if c in needed]
+            first   = members[0][1]         # same slice, so the same access path and order
+            working = self._select(df, first["plan"], self._access(first, index), columns, first["order"])
+            grouped = self._batch_groupby(working, batch) if len(batch) > 1 else None
+            for i, physical in members:
+                results[i] = self._dispatch(working, physical["plan"], grouped)
+
+        for key, plan, result in zip(keys, plans, results):
+            if key is not None:
+                self.results.put(key, plan.get("dataset"), version, result)
+        return results
+
+    def _execute(self, df: pd.DataFrame, plan: Dict[str, Any], rollup: Optional[RollupCube],
+                 stats: Optional[StatsCatalog], index: Optional[RowIndex],
+                 approx: Optional[ApproximateIndex] = None,
+                 shards: Optional["ShardedExecutor"] = None) -> Dict[str, Any]:
+        physical = self._physical_plan(df, plan, rollup, stats, index)
+        result = self._shortcut(physical, rollup, stats)
+        if result is None and self._use_approximate(physical, approx):
+            result = self._approximate(df, physical["plan"], approx)
+        if result is None and self._use_shards(physical, shards):
+            result = shards.execute_plan(physical["plan"])
+        if result is not None:
+            return result
+        # Always filter first: one row selection, then a single gather of the needed columns
+        working = self._select(df, physical["plan"], self._access(physical, index), order=physical["order"])
+        return self._dispatch(working, physical["plan"])
+
+    def _shortcut(self, physical: Dict[str, Any], rollup: Optional[RollupCube],
+                  stats: Optional[StatsCatalog]) -> Optional[Dict[str, Any]]:
+        """The result when the chosen strategy answers without touching rows, else None"""
+        strategy, plan = physical["strategy"], physical["plan"]
+        if strategy == "short_circuit":
+            print(f"⚡ Short-circuit: {physical['reason']}")
+            return {
+                "success": False,
+                "error": f"No data matches the filters: {physical['reason']}.",
+                "value": 0,
+            }
+        if strategy == "stats":
+            return self._from_stats(stats, plan)
+        if strategy == "rollup":
+            return self._from_rollup(rollup, plan)
+        return None
+
+    def _access(self, physical: Dict[str, Any], index: Optional[RowIndex]) -> Optional[RowIndex]:
+        return index if physical["strategy"] == "index" else None
+
+    # ── Planning ───────────────────────────────────────────────────
+
+    def explain(self, df: pd.DataFrame, plan: Dict[str, Any],
+                rollup: Optional[RollupCube] = None,
+                stats: Optional[StatsCatalog] = None,
+                index: Optional[RowIndex] = None,
+                approx: Optional[ApproximateIndex] = None,
+                shards: Optional["ShardedExecutor"] = None) -> Dict[str, Any]:
+        """
+        How execute_plan would run plan, without running it: the strategy
+        (short_circuit, stats, rollup, approximate, index, sharded or scan) and why, the
+        predicates in evaluation order with their estimated selectivity, and
+        estimated rows.
+        """
+        physical = self._physical_plan(df, self._with_mode(plan), rollup, stats, index, quiet=True)
+        if self._use_approximate(physical, approx) and self._approximable(df, physical["plan"], approx):
+            agg = physical["plan"].get("aggregation", "sum")
+            physical = {**physical, "strategy": "approximate",
+                        "reason": f"{approx.method(agg)}; ~{physical['estimated_rows']:,} rows would be read exactly"}
+        elif self._use_shards(physical, shards):
+            physical = {**physical, "strategy": "sharded",
+                        "reason": f"scan split over {len(shards.pools)} worker processes by branch, partials merged"}
+        date_col = self._date_column(df.columns)
+        return {
+            **{k: v for k, v in physical.items() if k not in ("plan", "order", "predicates")},
+            "predicates": [{**p, "column": date_col if p["column"] is DATE else p["column"]}
+                           for p in physical["predicates"]],
+        }
+
+    def _physical_plan(self, df: pd.DataFrame, plan: Dict[str, Any], rollup: Optional[RollupCube],
+                       stats: Optional[StatsCatalog], index: Optional[RowIndex],
+                       quiet: bool = False) -> Dict[str, Any]:
+        """Strategy, predicate order and estimates for plan (plan comes back with relative dates resolved)"""
+        rows = len(df)
+        out  = {"strategy": "scan", "reason": "", "table_rows": rows, "estimated_rows": rows,
+                "predicates": [], "plan": plan, "order": None}
+        if stats is not None:
+            reason = stats.impossible(plan.get("filters", {}), plan.get("date_filter") or {})
+            if reason:
+                return {**out, "strategy": "short_circuit", "reason": reason, "estimated_rows": 0}
+            if self._from_stats(stats, plan, quiet=True) is not None:
+                return {**out, "strategy": "stats", "reason": "unfiltered scalar read from column statistics",
+                        "estimated_rows": 0}
+            plan = out["plan"] = self._resolve_relative(stats, plan, quiet)
 
+        filters, date_filter = plan.get("filters") or {}, plan.get("date_filter") or {}
+        if not self._date_column(df.columns):
+            date_filter = {}        # ignored at execution time too
+        planner = QueryPlanner(stats, rows)
+        preds   = planner.predicates(filters, date_filter, df.columns)
+        out.update(predicates=preds, estimated_rows=planner.estimated_rows(preds),
+                   order=[p["column"] for p in preds])
+
+        if rollup is not None:
+            selected = self._rollup_cells(rollup, plan)
+            if selected is not None:
+                cells = selected[0]
+                return {**out, "strategy": "rollup", "estimated_rows": int(cells["rows"].sum()),
+                        "reason": f"{len(cells)} pre-aggregated ({rollup.group_col}, month) cell(s) cover the filters"}
+
+        if not preds:
+            return {**out, "reason": "no filters: every row is read"}
+        if index is None or index.rows != rows or index.date_col != self._date_column(df.columns):
+            return {**out, "reason": "no row index for this data; predicates evaluated column by column"}
+        covered = index.covered(self._ordered_filters(filters, out["order"]), date_filter)
+        if not covered:
+            return {**out, "reason": "the row index covers none of the predicates"}
+        fraction = 1.0
+        for p in preds:
+            if p["column"] in covered:
+                fraction *= p["selectivity"]
+        if fraction > self.INDEX_MAX_FRACTION:
+            return {**out, "reason": f"the row index would select ~{fraction:.0%} of rows; a scan is cheaper"}
+        names = [c if c is not DATE else "date" for c in covered]
+        return {**out, "strategy": "index",
+                "reason": f"row index on {', '.join(names)} selects ~{fraction:.1%} of rows by binary search"}
+
+    def _ordered_filters(self, filters: Dict[str, Any], order: Optional[List[Optional[str]]]) -> Dict[str, Any]:
+        """filters in the planner's order (columns it skipped keep their place at the end)"""
+        if not order:
+            return filters
+        ordered = {c: filters[c] for c in order if c is not DATE and c in filters}
+        return {**ordered, **{c: v for c, v in filters.items() if c not in ordered}}
+
+    def _dispatch(self, working: pd.DataFrame, plan: Dict[str, Any],
+                  grouped: Optional[Dict[tuple, pd.Series]] = None) -> Dict[str, Any]:
         if working.empty:
             return {
                 "success": False,
@@ -23,18 +257,443 @@ class AnalyticsEngine:
                 "value": 0,
             }
 
+        if plan.get("window"):
+            return self._window(working, plan)
         ctype = plan.get("comparison_type")
         if ctype == "multi_metric_branch_comparison":
-            return self._multi_metric(working, plan)
+            return self._multi_metric(working, plan, grouped)
         if ctype == "cross_metric_growth_comparison":
             return self._cross_growth(working, plan)
         if ctype:
-            return self._single_metric_comparison(working, plan)
-        return self._standard(working, plan)
+            return self._single_metric_comparison(working, plan, grouped)
+        return self._standard(working, plan, grouped)
+
+    def _batch_groupby(self, df: pd.DataFrame, plans: List[Dict[str, Any]]) -> Dict[tuple, pd.Series]:
+        """(group column, aggregation, metric) → aggregated Series for every grouped
+        aggregation the plans need, one multi-column groupby per (column, aggregation)"""
+        wanted: Dict[tuple, List[str]] = {}
+        for plan in plans:
+            ctype = plan.get("comparison_type")
+            agg   = plan.get("aggregation", "sum")
+            if ctype == "cross_metric_growth_comparison" or plan.get("window"):
+                continue
+            if ctype:
+                col     = plan.get("comparison_column", "branch")
+                metrics = plan.get("metrics", []) if ctype == "multi_metric_branch_comparison" else [plan.get("metric")]
+            else:
+                col, metrics = self._group_by(plan, df.columns), [plan.get("metric")]
+            if col in df.columns:
+                wanted.setdefault((col, agg), []).extend(m for m in metrics if m in df.columns)
+
+        out: Dict[tuple, pd.Series] = {}
+        for (col, agg), metrics in wanted.items():
+            metrics = list(dict.fromkeys(metrics))
+            if not metrics:
+                continue
+            table = self._group_table(df, col, metrics, agg)
+            for m in metrics:
+                out[(col, agg, m)] = table[m]
+        return out
+
+    def _grouped(self, df: pd.DataFrame, col: str, metric: str, agg: str,
+                 grouped: Optional[Dict[tuple, pd.Series]] = None) -> pd.Series:
+        """df's metric aggregated per col, taken from a batch groupby when one ran"""
+        if grouped is not None and (col, agg, metric) in grouped:
+            return grouped[(col, agg, metric)]
+        return self._group_table(df, col, [metric], agg)[metric]
+
+    def _group_table(self, df: pd.DataFrame, col: str, metrics: List[str], agg: str) -> pd.DataFrame:
+        """metrics aggregated per col in one pass; NumPy kernels where they match pandas
+        (a calendar bucket column groups on its integer keys and is labelled by period start)"""
+        bucketed = is_bucket_column(col)
+        if bucketed:
+            df = dated_rows(df, col)
+        base  = {"growth": "sum", "avg": "mean"}.get(agg, agg)
+        table = grouped_reduce(df[col], df[metrics], base) if base in FAST_AGGREGATIONS else None
+        if table is None:
+            table = self._agg(df.groupby(col, observed=True)[metrics], agg)
+        elif agg == "growth" and len(table) > 1:
+            table = table.pct_change().fillna(0) * 100
+        return label_periods(table, col) if bucketed else table
+
+    def _group_by(self, plan: Dict[str, Any], columns) -> Optional[str]:
+        """
+        Column a non-comparison plan groups on: group_by when it is one of
+        columns, or, when group_by is the date column and the plan asks for a
+        week/month/quarter/year granularity, that calendar bucket column
+        (derived from the dates wherever the frame does not carry it)
+        """
+        group_by = plan.get("group_by")
+        if plan.get("granularity") in BUCKETED and group_by and group_by == self._date_column(columns):
+            return bucket_column(group_by, plan["granularity"])
+        return group_by if group_by in columns else None
+
+    # ── Streaming execution ────────────────────────────────────────
+
+    def execute_plan_streaming(self, chunk_source: Callable[[Optional[List[str]]], Iterable[pd.DataFrame]],
+                               columns: List[str], plan: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a plan over a dataset that is never fully materialised.
+        chunk_source(usecols) must return a fresh iterator of preprocessed
+        chunks holding only `usecols`; `columns` are the dataset's columns.
+        Filters and the date filter are applied per chunk and partial
+        aggregates are folded, so memory is bounded by the chunk size.
+        """
+        spec = self._partial_spec(plan, columns)
+        if not spec.get("success", True):
+            return spec
+        metrics, group_col, order_col, filters = spec["metrics"], spec["group_col"], spec["order_col"], spec["filters"]
+
+        date_col    = self._date_column(columns)
+        date_filter = dict(plan.get("date_filter") or {})
+        if date_filter.get("type") == "relative" and date_col:
+            end = None
+            for chunk in chunk_source([date_col]):
+                chunk_max = pd.to_datetime(chunk[date_col], errors="coerce").max()
+                if pd.notna(chunk_max) and (end is None or chunk_max > end):
+                    end = chunk_max
+            start = self._relative_start(date_filter, end) if end is not None else None
+            if start is not None:
+                print(f"📅 Date filter: {start.date()} → {end.date()}")
+                date_filter = {"type": "range", "start": start, "end": end}
+
+        usecols = set(metrics) | set(filters)
+        bucket  = parse_bucket_column(group_col)
+        for c in (group_col, bucket[0] if bucket else None, order_col, date_col if date_filter else None):
+            if c:
+                usecols.add(c)
+        usecols = [c for c in columns if c in usecols]
+
+        partial = PartialAggregate(metrics, group_col, order_col, spec["needs"])
+        for chunk in chunk_source(usecols):
+            chunk = self._apply_filters(chunk, filters)
+            chunk = self._apply_date_filter(chunk, date_filter)
+            partial.update(chunk)
+        return self._partial_result(partial, plan, spec)
+
+    def _partial_spec(self, plan: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+        """
+        What a plan folds into a PartialAggregate: metrics, group_col, order_col,
+        the aggregation and the filters that apply to columns; an error dict
+        when the plan cannot be answered from partial state
+        """
+        ctype = plan.get("comparison_type")
+        agg   = plan.get("aggregation", "sum")
+        col   = plan.get("comparison_column", "branch")
+
+        order_col = None
+        if ctype == "cross_metric_growth_comparison":
+            metrics = [plan.get("metric_a"), plan.get("metric_b")]
+            if not all(metrics):
+                return {"success": False, "error": "cross_metric_growth needs metric_a and metric_b"}
+            group_col = col
+            order_col = "date" if "date" in columns else None
+        elif ctype == "multi_metric_branch_comparison":
+            metrics   = plan.get("metrics", [])
+            group_col = col
+        else:
+            metrics   = [plan.get("metric")] if plan.get("metric") else []
+            group_col = col if ctype else self._group_by(plan, columns)
+
+        if not metrics:
+            return {"success": False, "error": "No metric in plan", "value": 0}
+        if plan.get("window"):
+            return {"success": False, "error": "Window functions need every period's value and are not available "
+                                               "in streaming mode", "value": 0}
+        missing = [c for c in metrics + ([group_col] if group_col else [])
+                   if c not in columns and not is_bucket_column(c)]
+        if missing:
+            return {"success": False, "error": f"Columns not found: {missing}. Available: {list(columns)}", "value": 0}
+        if ctype != "cross_metric_growth_comparison" and agg not in SUPPORTED_AGGREGATIONS | {"median", "distinct"}:
+            agg = "sum"
+        if agg in ("median", "distinct") and ctype != "cross_metric_growth_comparison":
+            return {"success": False, "error": f"{agg.title()} needs every value and is not available in streaming mode",
+                    "value": 0}
+
+        filters = {}
+        for fcol, val in plan.get("filters", {}).items():
+            if fcol in columns:
+                filters[fcol] = val
+            else:
+                print(f"⚠️  Filter column '{fcol}' not found, skipping")
+        needs = STATE_NEEDED["growth" if ctype == "cross_metric_growth_comparison" else agg]
+        return {"metrics": metrics, "group_col": group_col, "order_col": order_col,
+                "agg": agg, "filters": filters, "needs": needs}
+
+    def _partial_result(self, partial: PartialAggregate, plan: Dict[str, Any],
+                        spec: Dict[str, Any]) -> Dict[str, Any]:
+        """The result execute_plan would return, finalised from folded partial state"""
+        ctype, metrics, group_col, agg = plan.get("comparison_type"), spec["metrics"], spec["group_col"], spec["agg"]
+        if partial.total_rows == 0:
+            return {
+                "success": False,
+                "error": "No data matches the filters. Check branch names or date range.",
+                "value": 0,
+            }
+
+        if ctype == "multi_metric_branch_comparison":
+            return self._multi_metric_result({m: partial.finalize(m, agg) for m in metrics}, plan)
+        if ctype == "cross_metric_growth_comparison":
+            keys = sorted(partial.rows.index)
+            ga, gb = (self._growth(partial.first(m).reindex(keys), partial.last(m), partial.count(m))
+                      for m in metrics)
+            return self._cross_growth_result(ga, gb, plan)
+        if ctype:
+            return self._single_metric_result(partial.finalize(metrics[0], agg), plan)
+
+        metric = metrics[0]
+        if group_col:
+            trend = partial.finalize(metric, agg)
+            total = float(partial.finalize(metric, "sum").sum()) if agg == "growth" else float(trend.sum())
+            if is_bucket_column(group_col):
+                trend = label_periods(trend, group_col)
+            return {"success": True, "value": total, "trend_data": trend, "grouped_data": trend, "count": len(trend)}
+        return {"success": True, "value": partial.scalar(metric, agg), "count": partial.total_rows}
+
+    def _growth(self, first: pd.Series, last: pd.Series, count: pd.Series) -> pd.Series:
+        """Per-group growth between the first and last non-null values (cross-growth semantics)."""
+        count = count.reindex(first.index, fill_value=0)
+        last  = last.reindex(first.index)
+        ok = first.notna() & (count >= 2) & (first != 0)
+        return ((last - first) / first.where(ok) * 100).astype("float64").where(ok, 0.0)
+
+    def _use_shards(self, physical: Dict[str, Any], shards: Optional["ShardedExecutor"]) -> bool:
+        """A full scan that the shards can fold (an index lookup reads too few rows to pay for the fan-out)"""
+        return shards is not None and physical["strategy"] == "scan" and shards.supports(physical["plan"])
+
+    # ── Approximate execution ──────────────────────────────────────
+
+    def _with_mode(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """plan with the engine's approximate mode filled in (so it is part of the cache key)"""
+        if self.approximate and "approximate" not in plan:
+            return {**plan, "approximate": True}
+        return plan
+
+    def _use_approximate(self, physical: Dict[str, Any], approx: Optional[ApproximateIndex]) -> bool:
+        """Approximate mode is on and reading the rows exactly would cost more than the sample"""
+        return (approx is not None and bool(physical["plan"].get("approximate"))
+                and physical["estimated_rows"] > approx.sample_rows)
+
+    def _approximable(self, df: pd.DataFrame, plan: Dict[str, Any],
+                      approx: ApproximateIndex) -> Optional[Dict[str, Any]]:
+        """Metrics, group column and aggregation of an approximate answer; None when plan needs the exact path"""
+        ctype = plan.get("comparison_type")
+        agg   = plan.get("aggregation", "sum")
+        agg   = "mean" if agg == "avg" else agg
+        if ctype == "cross_metric_growth_comparison" or agg not in SAMPLED_AGGREGATIONS | SKETCH_AGGREGATIONS:
+            return None     # extremes and first/last growth cannot be bounded from a sample
+        if plan.get("window"):
+            return None     # period-over-period ratios of estimates have no bounds here
+        if ctype == "multi_metric_branch_comparison":
+            metrics, group = plan.get("metrics", []), plan.get("comparison_column", "branch")
+        else:
+            metrics = [plan.get("metric")]
+            group   = plan.get("comparison_column", "branch") if ctype else self._group_by(plan, df.columns)
+        if not metrics or not all(m in df.columns for m in metrics) or (group and group not in df.columns):
+            return None     # the exact path reports the error
+        if (agg in SAMPLED_AGGREGATIONS and not ctype and not group
+                and not plan.get("filters") and not plan.get("date_filter")):
+            return None     # one vectorised pass over a column: exact is already cheaper than estimating
+        if agg in SKETCH_AGGREGATIONS:
+            sketches = approx.quantiles if agg == "median" else approx.distincts
+            if not all(m in sketches for m in metrics) or (group and group != approx.strata_col):
+                return None
+            filters = {c: v for c, v in (plan.get("filters") or {}).items() if c in df.columns}
+            if approx.cube.select(filters, plan.get("date_filter") or {}) is None:
+                return None
+        return {"metrics": metrics, "group": group, "agg": agg}
+
+    def _approximate(self, df: pd.DataFrame, plan: Dict[str, Any],
+                     approx: ApproximateIndex) -> Optional[Dict[str, Any]]:
+        """
+        plan estimated from approx: sum/count/mean from the stratified sample,
+        median/distinct from merged cell sketches. The result has the exact
+        path's shape plus "approximate": True and "error_bounds" (confidence,
+        method, bounds of "value", per-group bounds). None → run exactly.
+        """
+        spec = self._approximable(df, plan, approx)
+        if spec is None:
+            return None
+        metrics, group, agg = spec["metrics"], spec["group"], spec["agg"]
+        filters     = {c: v for c, v in (plan.get("filters") or {}).items() if c in df.columns}
+        date_filter = plan.get("date_filter") or {}
+        mask = None
+        if agg in SKETCH_AGGREGATIONS:
+            tables = {m: approx.sketch_estimate(filters, date_filter, m, agg, group) for m in metrics}
+        else:
+            mask   = self._row_mask(approx.sample, filters, date_filter)
+            if is_bucket_column(group):
+                dated = approx.sample[group].to_numpy() != NO_BUCKET
+                mask  = dated if mask is None else mask & dated
+            tables = {m: approx.sample_estimate(mask, m, agg, group) for m in metrics}
+        if any(t is None for t in tables.values()):
+            return None
+        if all(t.empty for t in tables.values()):
+            return {
+                "success": False,
+                "error": "No data matches the filters. Check branch names or date range.",
+                "value": 0,
+            }
+
+        ctype  = plan.get("comparison_type")
+        metric = metrics[0]
+        first  = tables[metric]
+        if ctype == "multi_metric_branch_comparison":
+            result = self._multi_metric_result({m: t["estimate"].rename(m) for m, t in tables.items()}, plan)
+            winner = result["winner"]
+            value  = tuple(sum(float(t.at[winner, b]) for t in tables.values() if winner in t.index)
+                           for b in ("lower", "upper"))
+            groups = {m: t[["lower", "upper"]] for m, t in tables.items()}
+        elif ctype:
+            result = self._single_metric_result(first["estimate"].rename(metric), plan)
+            groups = first.loc[result["comparison_data"].index, ["lower", "upper"]]
+            value  = tuple(float(b) for b in groups.iloc[0]) if len(groups) else (0.0, 0.0)
+        elif group:
+            trend  = first["estimate"].rename(metric).sort_index()
+            result = {"success": True, "value": float(trend.sum()), "trend_data": trend,
+                      "grouped_data": trend, "count": len(trend)}
+            groups = first.loc[trend.index, ["lower", "upper"]]
+            if agg in ("sum", "count"):     # the total is itself a stratified estimate
+                keep = approx.sample[group].notna().to_numpy()
+                total = approx.sample_estimate(keep if mask is None else keep & mask, metric, agg)
+                value = (float(total["lower"].iloc[0]), float(total["upper"].iloc[0]))
+            else:
+                value = (float(groups["lower"].sum()), float(groups["upper"].sum()))     # conservative
+            if is_bucket_column(group):
+                trend  = label_periods(trend, group)
+                groups = label_periods(groups, group)
+                result.update(trend_data=trend, grouped_data=trend)
+        else:
+            result = {"success": True, "value": float(first["estimate"].iloc[0]), "count": int(first["rows"].iloc[0])}
+            groups = None
+            value  = (float(first["lower"].iloc[0]), float(first["upper"].iloc[0]))
+
+        result["approximate"]  = True
+        result["error_bounds"] = {"confidence": CONFIDENCE, "method": approx.method(agg),
+                                  "value": value, "groups": groups}
+        print(f"🧪 Approximate: {approx.method(agg)}")
+        return result
+
+    # ── Stats catalog ──────────────────────────────────────────────
+
+    def _from_stats(self, stats: StatsCatalog, plan: Dict[str, Any],
+                    quiet: bool = False) -> Optional[Dict[str, Any]]:
+        """Unfiltered scalar count/sum/mean/min/max straight from the catalog"""
+        if plan.get("comparison_type") or plan.get("filters") or plan.get("date_filter") or plan.get("window"):
+            return None
+        if plan.get("group_by") and plan.get("group_by") in stats.columns:
+            return None
+        metric = plan.get("metric")
+        value  = stats.scalar(metric, plan.get("aggregation", "sum")) if metric else None
+        if value is None:
+            return None
+        if not quiet:
+            print("⚡ Answered from column statistics")
+        return {"success": True, "value": value, "count": stats.rows}
+
+    def _resolve_relative(self, stats: StatsCatalog, plan: Dict[str, Any],
+                          quiet: bool = False) -> Dict[str, Any]:
+        """Turn a relative date filter into a range using the catalog's last date"""
+        date_filter = plan.get("date_filter") or {}
+        if date_filter.get("type") != "relative" or self._date_column(stats.columns) != stats.date_col:
+            return plan
+        end = stats.latest_date({c: v for c, v in plan.get("filters", {}).items() if c in stats.columns})
+        start = self._relative_start(date_filter, end) if end is not None else None
+        if start is None:
+            return plan
+        if not quiet:
+            print(f"📅 Date filter: {start.date()} → {end.date()}")
+        return {**plan, "date_filter": {"type": "range", "start": start, "end": end}}
+
+    # ── Rollup execution ───────────────────────────────────────────
+
+    def _from_rollup(self, cube: RollupCube, plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Answer plan from pre-aggregated cells, or None when only the raw rows can"""
+        selected = self._rollup_cells(cube, plan)
+        if selected is None:
+            return None
+        cells, metrics, group, window = selected
+        ctype = plan.get("comparison_type")
+        agg   = plan.get("aggregation", "sum")
+        if window is not None:
+            print(f"📅 Date filter: {window[0].date()} → {window[1].date()}")
+
+        if int(cells["rows"].sum()) == 0:
+            return {
+                "success": False,
+                "error": "No data matches the filters. Check branch names or date range.",
+                "value": 0,
+            }
+        print("🧊 Served from rollup cube")
+
+        if ctype == "multi_metric_branch_comparison":
+            return self._multi_metric_result({m: cube.grouped(cells, m, agg) for m in metrics}, plan)
+        if ctype == "cross_metric_growth_comparison":
+            ea, eb = cube.endpoints(cells, metrics[0]), cube.endpoints(cells, metrics[1])
+            return self._cross_growth_result(self._growth(ea["first"], ea["last"], ea["count"]),
+                                             self._growth(eb["first"], eb["last"], eb["count"]), plan)
+        if ctype:
+            return self._single_metric_result(cube.grouped(cells, metrics[0], agg), plan)
+
+        metric = metrics[0]
+        if group:
+            period = parse_bucket_column(group)
+            trend = cube.grouped(cells, metric, agg, period[1] if period else None).sort_index()
+            if period:
+                trend = label_periods(trend, group)
+            total = float(cells[f"{metric}.sum"].sum()) if agg == "growth" else float(trend.sum())
+            return {"success": True, "value": total, "trend_data": trend, "grouped_data": trend, "count": len(trend)}
+        return {"success": True, "value": cube.scalar(cells, metric, agg), "count": int(cells["rows"].sum())}
+
+    def _rollup_cells(self, cube: RollupCube, plan: Dict[str, Any]) -> Optional[tuple]:
+        """(cells, metrics, group column, resolved relative window or None) when the
+        cube can answer plan, else None"""
+        ctype = plan.get("comparison_type")
+        agg   = plan.get("aggregation", "sum")
+        if plan.get("window"):
+            return None
+        if ctype == "cross_metric_growth_comparison":
+            metrics = [plan.get("metric_a"), plan.get("metric_b")]
+            group   = plan.get("comparison_column", "branch")
+        elif ctype == "multi_metric_branch_comparison":
+            metrics = plan.get("metrics", [])
+            group   = plan.get("comparison_column", "branch")
+        else:
+            metrics = [plan.get("metric")]
+            group   = plan.get("comparison_column", "branch") if ctype else self._group_by(plan, cube.columns)
+            if not ctype and not group and agg == "growth":
+                return None     # scalar growth reads the first/last raw row, nulls included
+        if not metrics or not all(m in cube.metrics for m in metrics):
+            return None
+        period = parse_bucket_column(group)
+        if group not in (None, cube.group_col) and not (period and period[0] == cube.date_col
+                                                        and period[1] in PERIOD_MONTHS):
+            return None     # cells are per (group, month): month, quarter and year trends sum whole cells
+        if ctype != "cross_metric_growth_comparison" and agg not in CUBE_AGGREGATIONS:
+            return None
+
+        filters     = plan.get("filters", {})
+        date_filter = dict(plan.get("date_filter") or {})
+        if date_filter and self._date_column(cube.columns) != cube.date_col:
+            return None
+        window = None
+        if date_filter.get("type") == "relative":
+            base  = cube.select(filters, {})
+            end   = cube.latest(base) if base is not None else None
+            start = self._relative_start(date_filter, end) if end is not None else None
+            if start is None:
+                return None
+            window = (start, end)
+            date_filter = {"type": "range", "start": start, "end": end}
+        cells = cube.select(filters, date_filter)
+        if cells is None:
+            return None
+        return cells, metrics, group, window
 
     # ── Comparison handlers ────────────────────────────────────────
 
-    def _multi_metric(self, df: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, Any]:
+    def _multi_metric(self, df: pd.DataFrame, plan: Dict[str, Any],
+                      grouped: Optional[Dict[tuple, pd.Series]] = None) -> Dict[str, Any]:
         col    = plan.get("comparison_column", "branch")
         metrics: List[str] = plan.get("metrics", [])
         agg    = plan.get("aggregation", "sum")
@@ -44,18 +703,27 @@ class AnalyticsEngine:
 
         missing = [m for m in metrics if m not in df.columns]
         if missing:
-            return {"success": False, "error": f"Columns not found: {missing}. Available: {list(df.columns)}"}
+            return {"success": False, "error": f"Columns not found: {missing}. Available: {data_columns(df.columns)}"}
         if col not in df.columns:
             return {"success": False, "error": f"Column '{col}' not in data"}
 
-        data = {m: self._agg(df.groupby(col)[m], agg) for m in metrics}
+        if grouped is None:
+            table = self._group_table(df, col, list(dict.fromkeys(metrics)), agg)
+            data  = {m: table[m] for m in metrics}
+        else:
+            data  = {m: self._grouped(df, col, m, agg, grouped) for m in metrics}
+        return self._multi_metric_result(data, plan)
+
+    def _multi_metric_result(self, data: Dict[str, pd.Series], plan: Dict[str, Any]) -> Dict[str, Any]:
+        col     = plan.get("comparison_column", "branch")
+        metrics = plan.get("metrics", [])
         result_df = pd.DataFrame(data)
-        result_df["total"] = result_df.sum(axis=1)
+        # column by column: same totals and dtype as sum(axis=1), without its row-wise pass
+        parts = [result_df[c].fillna(0) for c in result_df.columns]
+        result_df["total"] = sum(parts[1:], parts[0]) if parts else 0
 
         asc = plan.get("sort_order") == "ascending"
-        result_df = result_df.sort_values("total", ascending=asc)
-        if plan.get("limit"):
-            result_df = result_df.head(plan["limit"])
+        result_df = result_df.iloc[top_k(result_df["total"], plan.get("limit") or None, asc)]
 
         winner = result_df.index[0] if len(result_df) else "N/A"
         return {
@@ -71,7 +739,8 @@ class AnalyticsEngine:
             "count":                len(result_df),
         }
 
-    def _single_metric_comparison(self, df: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, Any]:
+    def _single_metric_comparison(self, df: pd.DataFrame, plan: Dict[str, Any],
+                                  grouped: Optional[Dict[tuple, pd.Series]] = None) -> Dict[str, Any]:
         col    = plan.get("comparison_column", "branch")
         metric = plan.get("metric")
         agg    = plan.get("aggregation", "sum")
@@ -81,13 +750,15 @@ class AnalyticsEngine:
         if col not in df.columns:
             return {"success": False, "error": f"Column '{col}' not in data"}
         if metric not in df.columns:
-            return {"success": False, "error": f"Metric '{metric}' not found. Available: {list(df.columns)}"}
+            return {"success": False, "error": f"Metric '{metric}' not found. Available: {data_columns(df.columns)}"}
+
+        data = self._grouped(df, col, metric, agg, grouped)
+        return self._single_metric_result(data, plan)
 
-        data = self._agg(df.groupby(col)[metric], agg)
+    def _single_metric_result(self, data: pd.Series, plan: Dict[str, Any]) -> Dict[str, Any]:
+        col  = plan.get("comparison_column", "branch")
         asc  = plan.get("sort_order") == "ascending"
-        data = data.sort_values(ascending=asc)
-        if plan.get("limit"):
-            data = data.head(plan["limit"])
+        data = data.iloc[top_k(data, plan.get("limit") or None, asc)]
 
         winner = data.index[0] if len(data) else "N/A"
         return {
@@ -112,25 +783,31 @@ class AnalyticsEngine:
         if missing:
             return {"success": False, "error": f"Columns not found: {missing}"}
 
-        def growth(series: pd.Series) -> float:
-            s = series.dropna()
-            if len(s) < 2 or s.iloc[0] == 0:
-                return 0.0
-            return float((s.iloc[-1] - s.iloc[0]) / s.iloc[0] * 100)
-
-        rows = []
-        for branch, grp in df.groupby(col):
-            grp = grp.sort_values("date") if "date" in grp.columns else grp
-            ga, gb = growth(grp[metric_a]), growth(grp[metric_b])
-            rows.append({
-                "branch":               branch,
-                f"{metric_a}_growth":   round(ga, 2),
-                f"{metric_b}_growth":   round(gb, 2),
-                "growth_diff":          round(ga - gb, 2),
-                "faster":               ga > gb,
-            })
-
-        result_df   = pd.DataFrame(rows).set_index("branch")
+        # One stable date sort, then first/last non-null per group for both metrics at once
+        cols = list(dict.fromkeys([col, "date", metric_a, metric_b] if "date" in df.columns
+                                  else [col, metric_a, metric_b]))
+        ordered = df[cols]
+        if "date" in df.columns:
+            ordered = ordered.sort_values("date", kind="stable")
+        g = ordered.groupby(col, observed=True, sort=True)[list(dict.fromkeys([metric_a, metric_b]))]
+        first, last, count = g.first(), g.last(), g.count()
+        return self._cross_growth_result(
+            self._growth(first[metric_a], last[metric_a], count[metric_a]),
+            self._growth(first[metric_b], last[metric_b], count[metric_b]),
+            plan,
+        )
+
+    def _cross_growth_result(self, growth_a: pd.Series, growth_b: pd.Series,
+                             plan: Dict[str, Any]) -> Dict[str, Any]:
+        """growth_a/growth_b: growth of metric_a/metric_b per group, on the same index"""
+        metric_a = plan.get("metric_a")
+        metric_b = plan.get("metric_b")
+        result_df = pd.DataFrame({
+            f"{metric_a}_growth":   growth_a.round(2).to_numpy(),
+            f"{metric_b}_growth":   growth_b.round(2).to_numpy(),
+            "growth_diff":          (growth_a - growth_b).round(2).to_numpy(),
+            "faster":               (growth_a > growth_b).to_numpy(),
+        }, index=pd.Index(growth_a.index.tolist(), name="branch"))
         qualifying  = result_df[result_df["faster"]].sort_values("growth_diff", ascending=False)
         comp_data   = result_df[f"{metric_a}_growth"].sort_values(ascending=False)
 
@@ -155,25 +832,279 @@ class AnalyticsEngine:
             ),
         }
 
-    def _standard(self, df: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, Any]:
+    def _standard(self, df: pd.DataFrame, plan: Dict[str, Any],
+                  grouped: Optional[Dict[tuple, pd.Series]] = None) -> Dict[str, Any]:
         metric = plan.get("metric")
         if not metric:
             return {"success": False, "error": "No metric in plan", "value": 0}
         if metric not in df.columns:
-            return {"success": False, "error": f"'{metric}' not found. Available: {list(df.columns)}", "value": 0}
+            return {"success": False, "error": f"'{metric}' not found. Available: {data_columns(df.columns)}", "value": 0}
 
-        group_by = plan.get("group_by")
+        group_by = self._group_by(plan, df.columns)
         agg      = plan.get("aggregation", "sum")
 
-        if group_by and group_by in df.columns:
-            trend = self._agg(df.groupby(group_by)[metric], agg).sort_index()
+        if group_by:
+            trend = self._grouped(df, group_by, metric, agg, grouped).sort_index()
             total = float(df[metric].sum()) if agg == "growth" else float(trend.sum())
             return {"success": True, "value": total, "trend_data": trend, "grouped_data": trend, "count": len(trend)}
 
         value = self._scalar(df[metric], agg)
         return {"success": True, "value": value, "count": len(df)}
 
-    # ── Filters ────────────────────────────────────────────────────
+    # ── Window functions ───────────────────────────────────────────
+
+    def _window(self, df: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        plan's metric aggregated per (partition, calendar period) in one
+        grouped pass, then run through the plan's window function on the
+        whole partitions × periods grid at once (see windows.py). Partitions
+        are the window's partition_by, else a comparison plan's column.
+        Partitioned plans rank partitions by their latest windowed value and
+        return every period as "window_data"; unpartitioned plans return the
+        windowed series as trend_data.
+        """
+        ctype  = plan.get("comparison_type")
+        metric = plan.get("metric")
+        if ctype in ("multi_metric_branch_comparison", "cross_metric_growth_comparison"):
+            return {"success": False, "error": "Window functions apply to a single metric", "value": 0}
+        if not metric:
+            return {"success": False, "error": "No metric in plan", "value": 0}
+        if metric not in df.columns:
+            return {"success": False, "error": f"'{metric}' not found. Available: {data_columns(df.columns)}", "value": 0}
+        date_col = self._date_column(df.columns)
+        if not date_col:
+            return {"success": False, "error": "Window functions need a date column", "value": 0}
+        window = resolve_window(plan["window"], plan.get("granularity"))
+        if not window.get("success", True):
+            return window
+        partition = window["partition_by"] or (plan.get("comparison_column", "branch") if ctype else None)
+        if partition and partition not in df.columns:
+            return {"success": False, "error": f"Column '{partition}' not in data", "value": 0}
+
+        granularity = window["granularity"]
+        col  = bucket_column(date_col, granularity)
+        keys = df[col].to_numpy() if col in df.columns else bucket_keys(df[date_col], granularity)
+        if partition:
+            coded = group_codes(df[partition]) or pd.factorize(df[partition], sort=True)
+            codes, labels = coded[0], pd.Index(coded[1], name=partition)
+        else:
+            codes, labels = np.zeros(len(df), dtype=np.intp), None
+        live = (keys != NO_BUCKET) & (codes >= 0)
+        if not live.any():
+            return {"success": False, "error": "No dated rows to compute the window over", "value": 0}
+        values = df[metric].to_numpy()
+        if not live.all():
+            keys, codes, values = keys[live], codes[live], values[live]
+        lo, hi = int(keys.min()), int(keys.max())
+        width  = hi - lo + 1
+
+        # One grouped pass: every (partition, period) cell is one integer key
+        cell  = codes.astype(np.int64) * width + (keys.astype(np.int64) - lo)
+        base  = {"growth": "sum", "avg": "mean"}.get(plan.get("aggregation", "sum"), plan.get("aggregation", "sum"))
+        table = self._group_table(pd.DataFrame({"cell": cell, metric: values}), "cell", [metric], base)[metric]
+        cells = table.index.to_numpy(dtype=np.int64)
+        grid  = np.full((len(labels) if partition else 1, width), np.nan)
+        grid[cells // width, cells % width] = table.to_numpy(dtype=np.float64)
+        windowed = apply_window(grid, window["function"], window["periods"])
+        periods = np.unique(cells % width)      # calendar periods with rows in any partition
+        index   = bucket_starts(periods + lo, granularity).rename(date_col)
+        print(f"🪟 Window: {window['label']} ({granularity})")
+        if np.isnan(windowed).all():
+            return {"success": False, "value": 0,
+                    "error": f"Not enough history for {window['label']}: the data spans {width} {granularity}(s)"}
+
+        if not partition:
+            trend = pd.Series(windowed[0, periods], index=index, name=metric).dropna()
+            return {"success": True, "value": float(trend.iloc[-1]) if len(trend) else 0,
+                    "trend_data": trend, "grouped_data": trend, "count": len(trend), "window": window["label"]}
+
+        # Each partition's windowed value at the last period it has rows in
+        observed = ~np.isnan(grid)
+        last     = width - 1 - np.argmax(observed[:, ::-1], axis=1)
+        has_rows = observed.any(axis=1)
+        latest   = pd.Series(windowed[np.flatnonzero(has_rows), last[has_rows]],
+                             index=labels[has_rows], name=metric).dropna()
+        result = self._single_metric_result(latest, {**plan, "comparison_column": partition})
+        result["window"]      = window["label"]
+        result["window_data"] = pd.DataFrame(windowed[has_rows][:, periods].T, index=index, columns=labels[has_rows])
+        return result
+
+    def _window_columns(self, columns, plan: Dict[str, Any]) -> tuple:
+        """Partition and calendar bucket columns a window plan reads besides its metric"""
+        window = plan.get("window")
+        if not window:
+            return ()
+        resolved = resolve_window(window, plan.get("granularity"))
+        date_col = self._date_column(columns)
+        bucket   = (bucket_column(date_col, resolved["granularity"])
+                    if date_col and resolved.get("granularity") in BUCKETED else None)
+        return (resolved.get("partition_by"), bucket)
+
+    # ── Row selection ──────────────────────────────────────────────
+
+    def _select(self, df: pd.DataFrame, plan: Dict[str, Any], index: Optional[RowIndex] = None,
+                columns: Optional[List[str]] = None,
+                order: Optional[List[Optional[str]]] = None) -> pd.DataFrame:
+        """
+        Rows the plan's filters keep, restricted to `columns` (default: the ones
+        it reads). order: the planner's predicate order (DATE marks the date filter)
+        """
+        filters  = self._ordered_filters(plan.get("filters") or {}, order)
+        date_filter = plan.get("date_filter", {})
+        date_at  = sum(1 for c in order[:order.index(DATE)] if c in filters) if order and DATE in order else None
+        columns  = columns or self._plan_columns(df, plan)
+        found = None
+        if index is not None and index.rows == len(df) and index.date_col == self._date_column(df.columns):
+            found = index.lookup(filters, date_filter)
+        if found is None:
+            mask = self._row_mask(df, filters, date_filter, date_at)
+            return self._gather(df, mask, columns, date_filter)
+
+        # Index-covered filters picked the rows; the rest run on those rows only
+        positions, rest, rest_date = found
+        needed = set(columns) | set(rest) | ({index.date_col} if rest_date else set())
+        subset = df[[c for c in df.columns if c in needed]].take(positions)
+        return self._gather(subset, self._row_mask(subset, rest, rest_date), columns, date_filter)
+
+    def _row_mask(self, df: pd.DataFrame, filters: Dict[str, Any], date_filter: Dict[str, Any],
+                  date_at: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Rows kept by filters + date_filter as one boolean array (None = all
+        rows). Same semantics as _apply_filters followed by _apply_date_filter,
+        but nothing is copied along the way. Predicates run in dict order with
+        the date filter at position date_at (default last); once few rows
+        survive, the remaining predicates only look at the survivors.
+        """
+        n = len(df)
+        mask, rows = None, None     # full-length mask, or surviving positions once sparse
+
+        def narrow(m) -> None:
+            nonlocal mask, rows
+            m = np.asarray(m, dtype=bool)
+            if rows is not None:
+                rows = rows[m]
+                return
+            mask = m if mask is None else (mask & m)
+            if np.count_nonzero(mask) * self.SPARSE_SWITCH < n:
+                rows, mask = np.flatnonzero(mask), None
+
+        def values(s: pd.Series) -> pd.Series:
+            return s if rows is None else s.take(rows)
+
+        steps = list((filters or {}).items())
+        date_col = self._date_column(df.columns) if date_filter else None
+        if date_col:
+            steps.insert(len(steps) if date_at is None else date_at, (DATE, date_filter))
+
+        for col, val in steps:
+            if col is DATE:
+                dates = self._as_datetime(values(df[date_col])).to_numpy()
+                narrow(self._date_keep(dates, date_filter, mask if rows is None else None))
+                continue
+            if col not in df.columns:
+                print(f"⚠️  Filter column '{col}' not found, skipping")
+                continue
+            s = values(df[col])
+            if isinstance(val, (list, tuple)):
+                narrow(s.isin(val).to_numpy(dtype=bool, na_value=False))
+            elif isinstance(val, dict):
+                if "min" in val: narrow((values(df[col]) >= val["min"]).to_numpy(dtype=bool, na_value=False))
+                if "max" in val: narrow((values(df[col]) <= val["max"]).to_numpy(dtype=bool, na_value=False))
+            else:
+                narrow((s == val).to_numpy(dtype=bool, na_value=False))
+
+        if rows is not None:
+            mask = np.zeros(n, dtype=bool)
+            mask[rows] = True
+        return mask
+
+    def _date_keep(self, dates: np.ndarray, date_filter: Dict[str, Any],
+                   kept: Optional[np.ndarray]) -> np.ndarray:
+        """Which of dates pass date_filter (kept: rows the earlier predicates kept, for relative windows)"""
+        keep = ~np.isnat(dates)
+        t = date_filter.get("type")
+        if t == "relative":
+            live  = dates[keep & kept] if kept is not None else dates[keep]
+            end   = pd.Timestamp(live.max()) if len(live) else pd.NaT
+            start = self._relative_start(date_filter, end) if pd.notna(end) else None
+            if start is not None:
+                print(f"📅 Date filter: {start.date()} → {end.date()}")
+                keep &= (dates >= start.to_datetime64()) & (dates <= end.to_datetime64())
+
+        elif t == "range":
+            start, end = date_filter.get("start"), date_filter.get("end")
+            if start is not None:
+                keep &= dates >= pd.Timestamp(start).to_datetime64()
+            if end is not None:
+                keep &= dates <= pd.Timestamp(end).to_datetime64()
+
+        elif t == "quarter":
+            yr, months = date_filter.get("year"), date_filter.get("months", [])
+            if yr and months:
+                keep &= self._months_mask(dates, yr, months)
+
+        elif t == "month":
+            yr, mo = date_filter.get("year"), date_filter.get("month")
+            if yr and mo:
+                keep &= self._months_mask(dates, yr, [mo])
+            elif yr:
+                keep &= self._months_mask(dates, yr, range(1, 13))
+
+        elif t == "year":
+            yr = date_filter.get("year")
+            if yr:
+                keep &= self._months_mask(dates, yr, range(1, 13))
+        return keep
+
+    def _months_mask(self, dates: np.ndarray, year: int, months) -> np.ndarray:
+        """dates falling in the given months of year, as [start, end) comparisons (no .dt)"""
+        out = np.zeros(len(dates), dtype=bool)
+        months = sorted(set(int(m) for m in months))
+        # Contiguous months collapse into one range
+        runs, run = [], [months[0]]
+        for m in months[1:]:
+            if m == run[-1] + 1:
+                run.append(m)
+            else:
+                runs.append(run)
+                run = [m]
+        runs.append(run)
+        for run in runs:
+            lo = pd.Timestamp(year=int(year), month=run[0], day=1)
+            hi = lo + pd.DateOffset(months=len(run))
+            out |= (dates >= lo.to_datetime64()) & (dates < hi.to_datetime64())
+        return out
+
+    def _plan_columns(self, df: pd.DataFrame, plan: Dict[str, Any]) -> List[str]:
+        """Columns the handlers read for this plan (all columns if a metric is missing,
+        so their error messages still list everything that is available)"""
+        metrics = [plan.get("metric"), plan.get("metric_a"), plan.get("metric_b")] + list(plan.get("metrics") or [])
+        metrics = [m for m in metrics if m]
+        if any(m not in df.columns for m in metrics):
+            return list(df.columns)
+        wanted = set(metrics)
+        for c in (plan.get("comparison_column", "branch"), plan.get("group_by"), self._group_by(plan, df.columns),
+                  "date", self._date_column(df.columns)) + self._window_columns(df.columns, plan):
+            if c in df.columns:
+                wanted.add(c)
+        return [c for c in df.columns if c in wanted]
+
+    def _gather(self, df: pd.DataFrame, mask: Optional[np.ndarray], columns: List[str],
+                date_filter: Optional[Dict[str, Any]]) -> pd.DataFrame:
+        """Take the masked rows of only `columns`, once"""
+        working = df[columns] if mask is None else df[columns].take(np.flatnonzero(mask))
+        date_col = self._date_column(working.columns) if date_filter else None
+        if date_col and not pd.api.types.is_datetime64_any_dtype(working[date_col]):
+            # The date filter parsed this column; handlers see it parsed, as before
+            working = working.assign(**{date_col: pd.to_datetime(working[date_col], errors="coerce")})
+        return working
+
+    def _as_datetime(self, s: pd.Series) -> pd.Series:
+        if pd.api.types.is_datetime64_any_dtype(s.dtype):
+            return s
+        return pd.to_datetime(s, errors="coerce")
+
+    # ── Filters (per-chunk, streaming) ─────────────────────────────
 
     def _apply_filters(self, df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
         for col, val in filters.items():
@@ -192,7 +1123,7 @@ class AnalyticsEngine:
     def _apply_date_filter(self, df: pd.DataFrame, date_filter: Dict[str, Any]) -> pd.DataFrame:
         if not date_filter:
             return df
-        date_col = next((c for c in df.columns if any(k in c.lower() for k in ["date","month","period","time"])), None)
+        date_col = self._date_column(df.columns)
         if not date_col:
             return df
 
@@ -204,21 +1135,19 @@ class AnalyticsEngine:
 
         if t == "relative":
             end   = df[date_col].max()
-            n     = date_filter.get("n", 1)
-            unit  = date_filter.get("unit", "month")
-            if unit == "month" or "months" in date_filter:
-                start = end - pd.DateOffset(months=date_filter.get("months", n))
-            elif unit == "day" or "days" in date_filter:
-                start = end - pd.Timedelta(days=date_filter.get("days", n))
-            elif unit == "week":
-                start = end - pd.Timedelta(days=n * 7)
-            elif unit == "year" or "years" in date_filter:
-                start = end - pd.DateOffset(years=date_filter.get("years", n))
-            else:
+            start = self._relative_start(date_filter, end)
+            if start is None:
                 return df
             print(f"📅 Date filter: {start.date()} → {end.date()}")
             df = df[(df[date_col] >= start) & (df[date_col] <= end)]
 
+        elif t == "range":
+            start, end = date_filter.get("start"), date_filter.get("end")
+            if start is not None:
+                df = df[df[date_col] >= pd.Timestamp(start)]
+            if end is not None:
+                df = df[df[date_col] <= pd.Timestamp(end)]
+
         elif t == "quarter":
             yr, months = date_filter.get("year"), date_filter.get("months", [])
             if yr and months:
@@ -238,6 +1167,23 @@ class AnalyticsEngine:
 
         return df
 
+    def _relative_start(self, date_filter: Dict[str, Any], end: pd.Timestamp) -> Optional[pd.Timestamp]:
+        n     = date_filter.get("n", 1)
+        unit  = date_filter.get("unit", "month")
+        if unit == "month" or "months" in date_filter:
+            return end - pd.DateOffset(months=date_filter.get("months", n))
+        if unit == "day" or "days" in date_filter:
+            return end - pd.Timedelta(days=date_filter.get("days", n))
+        if unit == "week":
+            return end - pd.Timedelta(days=n * 7)
+        if unit == "year" or "years" in date_filter:
+            return end - pd.DateOffset(years=date_filter.get("years", n))
+        return None
+
+    def _date_column(self, columns) -> Optional[str]:
+        return next((c for c in columns if not is_bucket_column(c)
+                     and any(k in c.lower() for k in ["date","month","period","time"])), None)
+
     # ── Aggregation helpers ────────────────────────────────────────
 
     def _agg(self, grouped, agg: str) -> pd.Series:
@@ -247,6 +1193,7 @@ class AnalyticsEngine:
         if agg == "min":    return grouped.min()
         if agg == "max":    return grouped.max()
         if agg == "median": return grouped.median()
+        if agg == "distinct": return grouped.nunique()
         if agg == "growth":
             s = grouped.sum()
             return s.pct_change().fillna(0) * 100 if len(s) > 1 else s
@@ -259,6 +1206,7 @@ class AnalyticsEngine:
         if agg == "min":    return float(series.min())
         if agg == "max":    return float(series.max())
         if agg == "median": return float(series.median())
+        if agg == "distinct": return float(series.nunique())
         if agg == "growth":
             if len(series) > 1:
                 f, l = series.iloc[0], series.iloc[-1]
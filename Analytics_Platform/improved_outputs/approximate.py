@@ -0,0 +1,217 @@
+"""
+Approximate Index - Stratified sample and per-cell sketches for approximate plans
+Built once per dataset version, on demand. Rows are sampled uniformly within
+each branch (the strata), so every branch keeps enough rows however skewed the
+table is; sum, count and mean are estimated from the sample with the standard
+stratified (domain) estimators and a 95% normal-approximation interval,
+including the finite-population correction, so a fully sampled branch is
+exact. Median and distinct counts come from KLL / HyperLogLog sketches kept per
+(branch, month) cell and merged over the cells a plan selects; plans whose
+filters cut through a cell fall back to the exact path.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+from improved_outputs.rollup import RollupCube, month_keys
+from improved_outputs.sketches import QuantileSketch, HyperLogLog, Z_95
+
+CONFIDENCE = 0.95
+SAMPLED_AGGREGATIONS = {"sum", "count", "mean", "avg"}
+SKETCH_AGGREGATIONS  = {"median", "distinct"}
+
+
+class ApproximateIndex:
+    """Per-stratum sample plus (stratum, month) quantile and distinct-count sketches"""
+
+    def __init__(self, sample: pd.DataFrame, strata_col: Optional[str], sample_strata: np.ndarray,
+                 stratum_rows: np.ndarray, stratum_sampled: np.ndarray, cube: RollupCube,
+                 quantiles: Dict[str, List[QuantileSketch]], distincts: Dict[str, List[HyperLogLog]],
+                 rows: int, k: int, p: int):
+        """
+        sample: the sampled rows (every column); sample_strata: each sampled
+        row's stratum number; stratum_rows / stratum_sampled: population and
+        sample size per stratum number; cube: the (stratum, month) cells (no
+        metrics) whose positions index the sketch lists
+        """
+        self.sample    = sample
+        self.strata_col = strata_col
+        self.sample_strata = sample_strata
+        self.stratum_rows    = stratum_rows
+        self.stratum_sampled = stratum_sampled
+        self.cube      = cube
+        self.quantiles = quantiles
+        self.distincts = distincts
+        self.rows      = rows
+        self.k, self.p = k, p
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, date_col: Optional[str], strata_col: Optional[str],
+              metrics: List[str], distinct_cols: List[str], fraction: float = 0.01,
+              min_per_stratum: int = 1000, k: int = 200, p: int = 12, seed: int = 0) -> "ApproximateIndex":
+        rng = np.random.default_rng(seed)
+        n = len(df)
+        if strata_col in df.columns:
+            strata = df[strata_col]
+        else:
+            strata_col, strata = None, pd.Series(np.zeros(n, dtype=np.int8), index=df.index)
+        codes, uniques = pd.factorize(strata, sort=True)    # missing strata form their own stratum (-1)
+
+        # Uniform sample within each stratum: rank rows by a random key inside their stratum
+        order = np.lexsort((rng.random(n), codes))
+        bounds = np.searchsorted(codes[order], np.arange(-1, len(uniques) + 1))
+        sizes = np.diff(bounds)
+        take = np.minimum(sizes, np.maximum(min_per_stratum, np.ceil(sizes * fraction))).astype(np.intp)
+        picked = np.sort(np.concatenate([order[b:b + t] for b, t in zip(bounds[:-1], take)]))
+        sample = df.take(picked)
+
+        sample_strata = codes[picked] + 1                   # stratum 0 holds the rows with no stratum
+
+        # Sketch cells: one per (stratum, month), sketches built over all of the cell's rows
+        months = month_keys(df[date_col]) if date_col in df.columns else np.full(n, -1, dtype=np.int32)
+        group  = strata_col or "__stratum__"
+        keys   = pd.DataFrame({group: strata.to_numpy(), "month": months})
+        g      = keys.groupby([group, "month"], observed=True, dropna=False, sort=True)
+        cells  = pd.DataFrame({"rows": g.size()})
+        if date_col in df.columns:
+            dates = pd.to_datetime(df[date_col], errors="coerce")
+            cells["min_at"] = dates.groupby([keys[group], keys["month"]], observed=True, dropna=False, sort=True).min()
+            cells["max_at"] = dates.groupby([keys[group], keys["month"]], observed=True, dropna=False, sort=True).max()
+        cells = cells.reset_index()
+        cube  = RollupCube(cells, [], date_col, group, list(df.columns))
+
+        cell_of = g.ngroup().to_numpy()
+        by_cell = np.argsort(cell_of, kind="stable")
+        edges   = np.searchsorted(cell_of[by_cell], np.arange(len(cells) + 1))
+        quantiles = {}
+        for m in metrics:
+            values = df[m].to_numpy(dtype=np.float64, na_value=np.nan)[by_cell]
+            quantiles[m] = [QuantileSketch(k, seed + i).update(values[edges[i]:edges[i + 1]])
+                            for i in range(len(cells))]
+        distincts = {}
+        for c in distinct_cols:
+            h = HyperLogLog.hashes(df[c])                   # one hash per non-missing value
+            in_cell = cell_of[df[c].notna().to_numpy()]
+            perm = np.argsort(in_cell, kind="stable")
+            hashed, cedges = h[perm], np.searchsorted(in_cell[perm], np.arange(len(cells) + 1))
+            distincts[c] = [HyperLogLog(p).update_hashes(hashed[cedges[i]:cedges[i + 1]])
+                            for i in range(len(cells))]
+
+        return cls(sample, strata_col, sample_strata, sizes, take, cube, quantiles, distincts, n, k, p)
+
+    @property
+    def sample_rows(self) -> int:
+        return len(self.sample)
+
+    # ── Sample estimates ───────────────────────────────────────────
+
+    def sample_estimate(self, mask: Optional[np.ndarray], metric: str, agg: str,
+                        group_col: Optional[str] = None) -> pd.DataFrame:
+        """
+        Estimate, lower and upper bound of agg(metric) per group_col value (one
+        row, index None, when ungrouped) over the sampled rows mask keeps
+        """
+        s = self.sample
+        x = s[metric].to_numpy(dtype=np.float64, na_value=np.nan)
+        c = ~np.isnan(x)
+        if mask is not None:
+            c &= np.asarray(mask, dtype=bool)
+        if group_col:
+            codes, uniques = pd.factorize(s[group_col], sort=True)
+            c &= codes >= 0
+        else:
+            codes, uniques = np.zeros(len(s), dtype=np.intp), pd.Index([None])
+        if not c.any():
+            return pd.DataFrame(columns=["estimate", "lower", "upper", "rows"])
+
+        # Per (group, stratum) cell: sample sums of x and x², and sampled rows
+        H = len(self.stratum_rows)
+        cell = codes[c] * H + self.sample_strata[c]
+        y = np.ones(int(c.sum())) if agg == "count" else x[c]
+        size = len(uniques) * H
+        n  = np.bincount(cell, minlength=size).astype(np.float64)
+        s1 = np.bincount(cell, weights=y, minlength=size)
+        s2 = np.bincount(cell, weights=y * y, minlength=size)
+        live = np.flatnonzero(n)
+        g, h = live // H, live % H
+        n, s1, s2 = n[live], s1[live], s2[live]
+        N  = self.stratum_rows[h].astype(np.float64)
+        nh = self.stratum_sampled[h].astype(np.float64)
+        w  = N / nh
+        scale = N ** 2 * (1 - nh / N) / nh / np.maximum(nh - 1, 1)
+
+        groups = len(uniques)
+        total  = np.bincount(g, weights=w * s1, minlength=groups)
+        if agg in ("mean", "avg"):
+            count = np.bincount(g, weights=w * n, minlength=groups)
+            ratio = total[g] / count[g]
+            # Linearised variance of the ratio: residuals e = x - R over the domain
+            e1 = s1 - ratio * n
+            e2 = s2 - 2 * ratio * s1 + ratio ** 2 * n
+            var = np.bincount(g, weights=scale * (e2 - e1 ** 2 / nh), minlength=groups)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                est, var = total / count, var / count ** 2
+        else:
+            est = total
+            var = np.bincount(g, weights=scale * (s2 - s1 ** 2 / nh), minlength=groups)
+        rows = np.bincount(g, weights=n, minlength=groups).astype(np.int64)
+        present = rows > 0
+        margin  = Z_95 * np.sqrt(np.clip(var, 0, None))
+        lower   = est - margin
+        if agg == "count":
+            lower = np.clip(lower, 0, None)
+        out = pd.DataFrame({"estimate": est, "lower": lower, "upper": est + margin, "rows": rows},
+                           index=pd.Index(uniques, name=group_col))[present]
+        return out
+
+    # ── Sketch estimates ───────────────────────────────────────────
+
+    def sketch_estimate(self, filters: Dict[str, Any], date_filter: Dict[str, Any], metric: str,
+                        agg: str, group_col: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Median (KLL) or distinct count (HLL) per group_col value from the merged
+        sketches of the selected cells; None when the filters cut through cells,
+        the grouping is not the strata, or the column has no sketch
+        """
+        sketches = (self.quantiles if agg == "median" else self.distincts).get(metric)
+        if sketches is None or (group_col and group_col != self.strata_col):
+            return None
+        if date_filter and not self.cube.date_col:
+            return None
+        cells = self.cube.select(filters, date_filter)
+        if cells is None:
+            return None
+        if group_col:
+            cells = cells.dropna(subset=[self.cube.group_col])
+            members = cells.groupby(self.cube.group_col, observed=True, sort=True).groups
+        else:
+            members = {None: cells.index}
+        rows, out = cells["rows"], {}
+        for key, idx in members.items():
+            if agg == "median":
+                merged = QuantileSketch.union([sketches[i] for i in idx], self.k)
+                if not merged.n:
+                    continue
+                bounds = merged.quantile_bounds(0.5)
+            else:
+                merged = HyperLogLog(self.p)
+                for i in idx:
+                    merged.merge(sketches[i])
+                bounds = merged.estimate_bounds()
+            out[key] = (*bounds, int(rows.loc[idx].sum()))
+        out = pd.DataFrame.from_dict(out, orient="index", columns=["estimate", "lower", "upper", "rows"])
+        out.index.name = group_col
+        return out
+
+    def method(self, agg: str) -> str:
+        if agg == "median":
+            return f"KLL quantile sketches (k={self.k}) merged over (branch, month) cells"
+        if agg == "distinct":
+            return f"HyperLogLog sketches (2^{self.p} registers) merged over (branch, month) cells"
+        return (f"stratified sample of {self.sample_rows:,} of {self.rows:,} rows "
+                f"({int(np.count_nonzero(self.stratum_rows))} strata by {self.strata_col or 'row'})")
+
+    def nbytes(self) -> int:
+        sketch = sum(lv.nbytes for sk in self.quantiles.values() for s in sk for lv in s.levels)
+        sketch += sum(s.registers.nbytes for sk in self.distincts.values() for s in sk)
+        return int(self.sample.memory_usage(deep=True).sum()) + sketch
@@ -0,0 +1,173 @@
+"""
+Cache Manager - Size-capped, self-cleaning policy over the column store
+Tracks every cache entry's size, last access and source file in
+cache_index.json. Writing a new snapshot of a source removes the snapshot it
+supersedes, and least-recently-used entries are evicted once the cache grows
+past its size cap. Hit/miss/eviction counters are exposed through stats().
+Cache hits only update last access in memory; the index is written when
+entries are stored, evicted or renamed, and on flush() / interpreter exit,
+each time merged with what other processes have written since.
+"""
+import atexit
+import json
+import os
+import shutil
+import threading
+import time
+import pandas as pd
+from typing import Dict, Any, Optional
+
+from improved_outputs.column_store import ColumnStore
+
+
+class CacheManager:
+    """LRU + stale-key policy for a ColumnStore"""
+
+    INDEX_FILE = "cache_index.json"
+    ORPHAN_TMP_AGE = 3600  # seconds before an abandoned .tmp dir is swept
+
+    def __init__(self, store: ColumnStore, max_bytes: Optional[int] = None):
+        """max_bytes=None leaves the cache unbounded (stale cleanup still runs)"""
+        self.store = store
+        self.max_bytes = max_bytes
+        self.index_file = store.root / self.INDEX_FILE
+        self._lock = threading.RLock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "stale_removed": 0}
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.sweep()
+        atexit.register(self.flush)
+
+    # ── Public API ─────────────────────────────────────────────────
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Load an entry (memory-mapped) and mark it recently used"""
+        try:
+            loaded = self.store.load(key)
+        except Exception:
+            loaded = None
+        with self._lock:
+            if loaded is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits"] += 1
+            self._touch(key)        # persisted by the next put/eviction or flush()
+        return loaded[0]
+
+    def put(self, key: str, df: pd.DataFrame, source: Optional[str] = None):
+        """Store an entry, drop the snapshot(s) it supersedes, then enforce the cap"""
+        self.store.save(key, df, meta={"source": source})
+        with self._lock:
+            self._register(key, source)
+            self._enforce(keep=key)
+
+    def renamed(self, old_key: str, new_key: str, source: Optional[str] = None):
+        """Record that old_key was grown in place and now lives under new_key"""
+        with self._lock:
+            self.index.pop(old_key, None)
+            self._register(new_key, source)
+            self._enforce(keep=new_key)
+
+    def flush(self):
+        """Persist last-access times recorded by cache hits"""
+        with self._lock:
+            self._write_index()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                "entries":   len(self.index),
+                "bytes":     self.total_bytes(),
+                "max_bytes": self.max_bytes,
+            }
+
+    def total_bytes(self) -> int:
+        return sum(e["size"] for e in self.index.values())
+
+    def sweep(self):
+        """Reconcile the index with what is on disk and clear abandoned temp dirs"""
+        with self._lock:
+            on_disk = set(self.store.keys())
+            index = self._read_index()
+            self.index = {k: v for k, v in index.items() if k in on_disk}
+            for key in on_disk - set(self.index):
+                meta = self.store.load_meta(key) or {}
+                self.index[key] = {
+                    "size":        self.store.size_bytes(key),
+                    "last_access": (self.store.root / key).stat().st_mtime,
+                    "source":      meta.get("source"),
+                }
+            # Entries written by other processes may supersede each other
+            latest: Dict[str, str] = {}
+            for key, entry in sorted(self.index.items(), key=lambda kv: kv[1]["last_access"]):
+                src = entry.get("source")
+                if src:
+                    if src in latest and self._remove(latest[src]):
+                        self.counters["stale_removed"] += 1
+                    latest[src] = key
+            now = time.time()
+            for p in self.store.root.iterdir():
+                if p.is_dir() and p.name.startswith(".") and ".tmp-" in p.name \
+                        and now - p.stat().st_mtime > self.ORPHAN_TMP_AGE:
+                    shutil.rmtree(p, ignore_errors=True)
+            self._enforce()
+
+    # ── Policy ─────────────────────────────────────────────────────
+
+    def _register(self, key: str, source: Optional[str]):
+        if source:
+            self._merge_disk_index()     # other processes may have written snapshots of this source
+            for other, entry in list(self.index.items()):
+                if other != key and entry.get("source") == source:
+                    if self._remove(other):
+                        self.counters["stale_removed"] += 1
+        self.index[key] = {"size": self.store.size_bytes(key), "last_access": time.time(), "source": source}
+
+    def _enforce(self, keep: Optional[str] = None):
+        if self.max_bytes is not None:
+            for key in sorted(self.index, key=lambda k: self.index[k]["last_access"]):
+                if self.total_bytes() <= self.max_bytes:
+                    break
+                if key != keep and self._remove(key):
+                    self.counters["evictions"] += 1
+        self._write_index()
+
+    def _remove(self, key: str) -> bool:
+        self.store.delete(key)
+        if self.store.exists(key):
+            # Still open elsewhere on a platform that forbids deleting mapped files; retry next sweep
+            return False
+        self.index.pop(key, None)
+        return True
+
+    def _touch(self, key: str):
+        entry = self.index.setdefault(key, {"size": self.store.size_bytes(key), "source": None})
+        entry["last_access"] = time.time()
+
+    # ── Persistence ────────────────────────────────────────────────
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _merge_disk_index(self):
+        """Adopt entries other processes have indexed (and their later accesses)"""
+        for key, entry in self._read_index().items():
+            mine = self.index.get(key)
+            if mine is not None:
+                mine["last_access"] = max(mine["last_access"], entry.get("last_access", 0))
+            elif self.store.exists(key):
+                self.index[key] = entry
+
+    def _write_index(self):
+        self._merge_disk_index()        # the file is shared: never drop another process's entries
+        tmp = self.index_file.with_suffix(f".tmp-{os.getpid()}-{threading.get_ident()}")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp, self.index_file)
+        except OSError as e:
+            print(f"⚠️ Could not persist cache index: {e}")
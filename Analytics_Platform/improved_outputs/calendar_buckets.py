@@ -0,0 +1,116 @@
+"""
+Calendar Buckets - Integer week/month/quarter/year keys for a date column
+Computed once when a dataset is loaded and kept beside its date column as
+`<date>__week`, `<date>__month`, `<date>__quarter` and `<date>__year`, so a
+monthly or quarterly trend is an integer groupby instead of a groupby on raw
+timestamps. Keys count whole periods (months since year 0, weeks since the
+Monday before 1970-01-01), so they sort chronologically and map back to the
+first day of their period. Rows without a date get NO_BUCKET. The keys are
+internal: data_columns() leaves them out wherever columns are shown or shared.
+"""
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Tuple, Union
+
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+BUCKETED      = ("week", "month", "quarter", "year")    # "day" groups on the date column itself
+NO_BUCKET     = -2 ** 31     # int32 minimum: below any real period key, pre-1970 weeks included
+SEPARATOR     = "__"
+EPOCH_YEAR    = 1970
+WEEK_SHIFT    = 3       # 1970-01-01 was a Thursday; weeks start on Monday
+
+
+def bucket_column(date_col: str, granularity: str) -> str:
+    return f"{date_col}{SEPARATOR}{granularity}"
+
+
+def parse_bucket_column(col: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(date column, granularity) of a bucket column name, None for any other column"""
+    if not isinstance(col, str) or SEPARATOR not in col:
+        return None
+    date_col, _, granularity = col.rpartition(SEPARATOR)
+    return (date_col, granularity) if date_col and granularity in BUCKETED else None
+
+
+def is_bucket_column(col: Optional[str]) -> bool:
+    return parse_bucket_column(col) is not None
+
+
+def data_columns(columns) -> List[str]:
+    """columns without the bucket keys: the columns a user sees of a frame"""
+    return [c for c in columns if not is_bucket_column(c)]
+
+
+def bucket_keys(dates: pd.Series, granularity: str) -> np.ndarray:
+    """int32 period key per row (NO_BUCKET where the date is missing); "day" keys are days since 1970-01-01"""
+    return _keys(_day_values(dates), granularity)
+
+
+def _day_values(dates: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_datetime64_any_dtype(dates.dtype):
+        dates = pd.to_datetime(dates, errors="coerce")
+    return np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[D]")
+
+
+def _keys(values: np.ndarray, granularity: str) -> np.ndarray:
+    missing = np.isnat(values)
+    if granularity == "day":
+        keys = values.astype(np.int64)
+    elif granularity == "week":
+        keys = (values.astype(np.int64) + WEEK_SHIFT) // 7
+    elif granularity == "year":
+        keys = values.astype("datetime64[Y]").astype(np.int64) + EPOCH_YEAR
+    else:
+        keys = values.astype("datetime64[M]").astype(np.int64) + EPOCH_YEAR * 12     # year * 12 + month - 1
+        if granularity == "quarter":
+            keys //= 3
+    keys[missing] = NO_BUCKET
+    return keys.astype(np.int32)
+
+
+def bucket_starts(keys, granularity: str) -> pd.DatetimeIndex:
+    """First day of each key's period"""
+    keys = np.asarray(keys, dtype=np.int64)
+    if granularity == "day":
+        starts = keys.astype("datetime64[D]")
+    elif granularity == "week":
+        starts = (keys * 7 - WEEK_SHIFT).astype("datetime64[D]")
+    elif granularity == "year":
+        starts = (keys - EPOCH_YEAR).astype("datetime64[Y]")
+    else:
+        months = keys * 3 if granularity == "quarter" else keys
+        starts = (months - EPOCH_YEAR * 12).astype("datetime64[M]")
+    starts = starts.astype("datetime64[ns]")
+    starts[keys == NO_BUCKET] = np.datetime64("NaT")
+    return pd.DatetimeIndex(starts)
+
+
+def add_bucket_columns(df: pd.DataFrame, date_col: Optional[str]) -> pd.DataFrame:
+    """df with a key column per bucketed granularity of date_col (in place; no-op without the column)"""
+    if date_col is None or date_col not in df.columns:
+        return df
+    values = _day_values(df[date_col])
+    for granularity in BUCKETED:
+        df[bucket_column(date_col, granularity)] = _keys(values, granularity)
+    return df
+
+
+def dated_rows(df: pd.DataFrame, col: str) -> pd.DataFrame:
+    """Rows of df that fall in a period of bucket column col (derived from its date column when absent)"""
+    if col not in df.columns:
+        date_col, granularity = parse_bucket_column(col)
+        df = df.assign(**{col: bucket_keys(df[date_col], granularity)})
+    keys = df[col].to_numpy()
+    missing = keys == NO_BUCKET
+    return df[~missing] if missing.any() else df
+
+
+def label_periods(data: Union[pd.Series, pd.DataFrame], col: str) -> Union[pd.Series, pd.DataFrame]:
+    """data indexed by bucket keys of col, re-indexed by period start under the date column's name"""
+    date_col, granularity = parse_bucket_column(col)
+    keys = np.asarray(data.index, dtype=np.int64)
+    if (keys == NO_BUCKET).any():
+        data, keys = data[keys != NO_BUCKET], keys[keys != NO_BUCKET]
+    data = data.copy()
+    data.index = bucket_starts(keys, granularity).rename(date_col)
+    return data
@@ -0,0 +1,287 @@
+"""
+Column Store - Memory-mapped columnar cache for DataFrames
+Each cached frame is a directory holding one .npy file per column plus a
+meta.json describing how to rebuild the frame. Columns are opened with
+np.load(mmap_mode="r"), so loads are near zero-copy and every process that
+opens the same entry shares the same physical pages via the OS page cache.
+"""
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, List
+
+
+class ColumnStore:
+    """Reads and writes DataFrames as directories of memory-mappable .npy columns"""
+
+    META_FILE = "meta.json"
+
+    def __init__(self, root: Path):
+        """Initialize column store rooted at a cache directory"""
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ── Public API ─────────────────────────────────────────────────
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key / self.META_FILE).exists()
+
+    def save(self, key: str, df: pd.DataFrame, meta: Optional[Dict[str, Any]] = None):
+        """Write df under key. The entry becomes visible atomically once complete."""
+        final_dir = self.root / key
+        tmp_dir   = self.root / f".{key}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        try:
+            columns: List[Dict[str, Any]] = []
+            for i, name in enumerate(df.columns):
+                spec, arrays = self._encode_column(df[name])
+                spec["name"] = str(name)
+                for suffix, arr in arrays.items():
+                    fname = f"c{i}{suffix}.npy"
+                    np.save(tmp_dir / fname, arr, allow_pickle=False)
+                    spec[f"file{suffix}"] = fname
+                columns.append(spec)
+
+            payload = {"rows": len(df), "columns": columns, "meta": meta or {}}
+            with open(tmp_dir / self.META_FILE, "w", encoding="utf-8") as f:
+                json.dump(payload, f, default=str)
+
+            if final_dir.exists():
+                shutil.rmtree(final_dir, ignore_errors=True)
+            os.replace(tmp_dir, final_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def load(self, key: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """Open a cached entry as a DataFrame backed by read-only memory maps"""
+        entry = self.root / key
+        payload = self._read_payload(entry)
+        if payload is None:
+            return None
+        if any(c["kind"] == "datetime" and "dtype" not in c for c in payload["columns"]):
+            return None     # written before datetime units were kept: always nanoseconds, re-parse
+
+        data = {}
+        for spec in payload["columns"]:
+            data[spec["name"]] = self._decode_column(entry, spec)
+
+        df = pd.DataFrame(data, copy=False)
+        if len(df) != payload["rows"]:
+            return None
+        return df, payload.get("meta", {})
+
+    def append(self, key: str, tail: pd.DataFrame, new_key: Optional[str] = None,
+               meta: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Append tail's rows to an existing entry in place, then (optionally)
+        rename it to new_key. Only the tail is encoded and written; the .npy
+        headers are rewritten in their reserved padding. Readers that already
+        mapped the entry keep seeing the old row count. Returns False when the
+        tail cannot be appended as-is (schema drift, new categories that sort
+        among the stored ones, integers the stored dtype cannot hold), in which
+        case nothing changed.
+        """
+        entry = self.root / key
+        payload = self._read_payload(entry)
+        if payload is None or [c["name"] for c in payload["columns"]] != [str(c) for c in tail.columns]:
+            return False
+
+        encoded = []
+        for spec, name in zip(payload["columns"], tail.columns):
+            arr, new_spec = self._encode_tail(entry, spec, tail[name])
+            if arr is None:
+                return False
+            encoded.append((spec, new_spec, arr))
+
+        rows = payload["rows"] + len(tail)
+        for spec, _, arr in encoded:
+            if not self._npy_fits(entry / spec["file"], rows):
+                return False
+
+        for spec, _, arr in encoded:
+            self._append_npy(entry / spec["file"], arr)
+
+        payload["rows"] = rows
+        payload["columns"] = [new_spec for _, new_spec, _ in encoded]
+        if meta is not None:
+            payload["meta"] = meta
+        tmp_meta = entry / f".{self.META_FILE}.tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp_meta, entry / self.META_FILE)
+
+        if new_key and new_key != key:
+            target = self.root / new_key
+            if target.exists():
+                shutil.rmtree(target, ignore_errors=True)
+            os.replace(entry, target)
+        return True
+
+    def load_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        payload = self._read_payload(self.root / key)
+        return payload.get("meta", {}) if payload else None
+
+    def update_meta(self, key: str, **fields) -> bool:
+        """Merge fields into an entry's meta without touching its columns"""
+        entry = self.root / key
+        payload = self._read_payload(entry)
+        if payload is None:
+            return False
+        payload.setdefault("meta", {}).update(fields)
+        tmp_meta = entry / f".{self.META_FILE}.tmp-{os.getpid()}"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp_meta, entry / self.META_FILE)
+        return True
+
+    def delete(self, key: str):
+        shutil.rmtree(self.root / key, ignore_errors=True)
+
+    def keys(self) -> List[str]:
+        return [p.name for p in self.root.iterdir()
+                if p.is_dir() and not p.name.startswith(".") and (p / self.META_FILE).exists()]
+
+    def size_bytes(self, key: str) -> int:
+        entry = self.root / key
+        if not entry.exists():
+            return 0
+        return sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+
+    # ── Encoding ───────────────────────────────────────────────────
+
+    def _encode_column(self, series: pd.Series) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            cats = series.cat.categories
+            return (
+                {"kind": "category", "categories": cats.tolist(), "ordered": bool(series.cat.ordered)},
+                {"": np.ascontiguousarray(series.cat.codes.to_numpy())},
+            )
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = series
+            if getattr(series.dt, "tz", None) is not None:
+                values = series.dt.tz_convert("UTC").dt.tz_localize(None)
+            arr = values.to_numpy()     # the column's own unit (pandas 3 parses to datetime64[us])
+            return {"kind": "datetime", "dtype": str(arr.dtype)}, {"": arr}
+        if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+            arr = series.to_numpy()
+            if arr.dtype == object:
+                arr = series.to_numpy(dtype="float64", na_value=np.nan)
+            return {"kind": "numeric"}, {"": np.ascontiguousarray(arr)}
+
+        # Strings / objects are dictionary-encoded so they can be mapped too
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        return (
+            {"kind": "string", "categories": [str(u) for u in uniques]},
+            {"": codes.astype(self._code_dtype(len(uniques)))},
+        )
+
+    def _decode_column(self, entry: Path, spec: Dict[str, Any]):
+        arr = np.load(entry / spec["file"], mmap_mode="r", allow_pickle=False)
+        kind = spec["kind"]
+        if kind == "category":
+            return pd.Categorical.from_codes(arr, categories=spec["categories"], ordered=spec.get("ordered", False))
+        if kind == "string":
+            cats = np.asarray(spec["categories"], dtype=object)
+            out = np.empty(len(arr), dtype=object)
+            valid = arr >= 0
+            out[valid] = cats[arr[valid]]
+            out[~valid] = np.nan
+            return out
+        return arr
+
+    def _encode_tail(self, entry: Path, spec: Dict[str, Any], series: pd.Series):
+        """
+        Encode appended values against an existing column spec. String
+        dictionaries grow in order of appearance, as a fresh factorize would;
+        categories only grow at the end, where a fresh parse would sort them.
+        """
+        kind = spec["kind"]
+        new_spec = dict(spec)
+        if kind in ("category", "string"):
+            cats = list(spec["categories"])
+            values = series.astype(object)
+            if kind == "string":
+                values = values.where(values.isna(), values.astype(str))
+            known = set(cats)
+            extra = [v for v in pd.unique(values.dropna()) if v not in known]
+            cats.extend(extra)
+            if kind == "category" and extra and not pd.Index(cats).is_monotonic_increasing:
+                # A fresh parse sorts categories; new ones that would land among the
+                # stored ones need every code renumbered, so rewrite the entry instead
+                return None, spec
+            stored_dtype = np.load(entry / spec["file"], mmap_mode="r").dtype
+            if len(cats) >= np.iinfo(stored_dtype).max:
+                return None, spec
+            codes = pd.Categorical(values, categories=cats).codes.astype(stored_dtype)
+            new_spec["categories"] = cats
+            return codes, new_spec
+        if kind == "datetime":
+            values = pd.to_datetime(series, errors="coerce")
+            if getattr(values.dt, "tz", None) is not None:
+                values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+            return values.to_numpy(dtype=spec.get("dtype", "datetime64[ns]")), new_spec
+        arr = series.to_numpy()
+        if arr.dtype == object:
+            arr = series.to_numpy(dtype="float64", na_value=np.nan)
+        stored_dtype = np.load(entry / spec["file"], mmap_mode="r").dtype
+        if stored_dtype.kind in "iu" and len(arr) and arr.dtype.kind in "iuf":
+            limits = np.iinfo(stored_dtype)
+            if arr.min() < limits.min or arr.max() > limits.max:
+                return None, spec       # would wrap in the stored dtype: reload instead
+        return arr, new_spec
+
+    def _npy_fits(self, path: Path, rows: int) -> bool:
+        """True when the header of path has room for a shape of `rows`."""
+        with open(path, "rb") as f:
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            _, _, dtype = read_header(f)
+            data_offset = f.tell()
+        return len(self._npy_header(dtype, rows)) <= data_offset - self._npy_prefix(version)
+
+    def _append_npy(self, path: Path, arr: np.ndarray):
+        with open(path, "r+b") as f:
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, _, dtype = read_header(f)
+            data_offset = f.tell()
+            header_len = data_offset - self._npy_prefix(version)
+
+            # Data first, header last: a crash in between leaves a valid old-length file
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(arr, dtype=dtype).tobytes())
+            header = self._npy_header(dtype, shape[0] + len(arr))
+            f.seek(self._npy_prefix(version))
+            f.write(header.ljust(header_len - 1).encode("latin1") + b"\n")
+
+    def _npy_header(self, dtype: np.dtype, rows: int) -> str:
+        descr = np.lib.format.dtype_to_descr(dtype)
+        return repr({"descr": descr, "fortran_order": False, "shape": (rows,)})
+
+    def _npy_prefix(self, version) -> int:
+        # magic string (6) + version (2) + header length field (2 for v1, 4 for v2/v3)
+        return 8 + (2 if version == (1, 0) else 4)
+
+    def _code_dtype(self, n: int):
+        if n < np.iinfo(np.int8).max:
+            return np.int8
+        if n < np.iinfo(np.int16).max:
+            return np.int16
+        return np.int32
+
+    def _read_payload(self, entry: Path) -> Optional[Dict[str, Any]]:
+        meta_file = entry / self.META_FILE
+        if not meta_file.exists():
+            return None
+        try:
+            with open(meta_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
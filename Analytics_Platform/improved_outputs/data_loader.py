@@ -1,47 +1,194 @@
-
 """
 Data Loader - Handles loading data from various sources
-Supports CSV with caching for better performance
+Supports CSV with a memory-mapped columnar cache for better performance
 """
 import pandas as pd
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Any, Iterator, List, Optional
 import hashlib
-import pickle
+import io
+import json
+import os
+import threading
+
+from improved_outputs.column_store import ColumnStore
+from improved_outputs.cache_manager import CacheManager
+from improved_outputs.partitions import PartitionedDataset
+from improved_outputs.rollup import RollupCube
+from improved_outputs.stats_catalog import StatsCatalog
+from improved_outputs.row_index import RowIndex
+from improved_outputs.materialized_views import ViewRegistry
+from improved_outputs.approximate import ApproximateIndex
+from improved_outputs.calendar_buckets import add_bucket_columns, data_columns
+from improved_outputs.wide_table import WIDE, WIDE_SCHEMA, build_wide
+from improved_outputs.schemas import (
+    DATASET_SCHEMAS, read_csv_kwargs, apply_schema, memory_savings, schema_signature,
+)
 
 class DataLoader:
     """Loads and caches datasets"""
     
-    def __init__(self, data_dir: str = "data", cache_dir: str = ".cache"):
-        """Initialize data loader"""
+    def __init__(self, data_dir: str = "data", cache_dir: str = ".cache",
+                 float32_amounts: bool = False, verify_prefix: str = "sampled",
+                 max_memory_mb: Optional[float] = None, cache_max_mb: Optional[float] = 2048):
+        """
+        Initialize data loader.
+        verify_prefix controls how appended files are checked for rewrites of
+        already-ingested bytes: "sampled" hashes the header, the last 64 KB and
+        16 blocks spread across the prefix; "full" hashes the whole prefix.
+        max_memory_mb, when set, streams any dataset whose estimated in-memory
+        size exceeds half the budget instead of loading it (see `streamed`).
+        cache_max_mb caps the on-disk cache; least recently used snapshots are
+        evicted past it (None = unbounded).
+        """
         self.data_dir = Path(data_dir)
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.store = ColumnStore(self.cache_dir)
+        self.cache_manager = CacheManager(
+            self.store, int(cache_max_mb * 1_000_000) if cache_max_mb is not None else None)
+        self.float32_amounts = float32_amounts
+        self.verify_prefix = verify_prefix
+        self.max_memory_mb = max_memory_mb
+        self.streamed: Dict[str, int] = {}   # dataset name → chunk size in rows
+        self.partitioned: Dict[str, PartitionedDataset] = {}
+        self.rollups: Dict[str, RollupCube] = {}
+        self.stats: Dict[str, StatsCatalog] = {}
+        self.indexes: Dict[str, RowIndex] = {}
+        self.wide_version: Optional[str] = None     # cache key of the last wide table built
+        self.views = ViewRegistry()
+        self.memory_report: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+        self.ingest_file = self.cache_dir / "ingest_state.json"
+        self.ingest_state: Dict[str, Dict[str, Any]] = self._read_ingest_state()
         self.cache = {}
     
-    def load_all_datasets(self) -> Dict[str, pd.DataFrame]:
-        """Load all available datasets"""
-        datasets = {}
-        
-        dataset_files = {
-            'loan': 'loan_deposit_performance.csv',
-            'payment': 'digital_payments_data.csv',
-            'customer': 'customer_credit_data.csv'
-        }
+    def load_all_datasets(self, parallel: bool = True, max_workers: Optional[int] = None,
+                          executor: str = "process") -> Dict[str, pd.DataFrame]:
+        """
+        Load all available datasets, concurrently by default.
+        executor="process" parses cache misses in worker processes, which write
+        the column store; this process then memory-maps the results, so nothing
+        is pickled back. executor="thread" loads in a thread pool (CSV parsing
+        mostly holds the GIL, so this helps little beyond overlapping I/O).
+        """
+        names = list(DATASET_SCHEMAS)
+        if parallel and len(names) > 1:
+            workers = max_workers or len(names)
+            if executor == "process":
+                misses = [n for n in names if self._needs_parse(n)]
+                if len(misses) > 1:
+                    with ProcessPoolExecutor(max_workers=min(workers, len(misses))) as pool:
+                        list(pool.map(_warm_cache, [self._worker_args(n) for n in misses]))
+                    with self._lock:
+                        self.ingest_state = self._read_ingest_state()
+                    self.cache_manager.sweep()
+                frames = [self.load_dataset(name) for name in names]
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dataset-loader") as pool:
+                    frames = list(pool.map(self.load_dataset, names))
+        else:
+            frames = [self.load_dataset(name) for name in names]
         
-        for name, filename in dataset_files.items():
-            try:
-                df = self.load_csv(filename)
-                if df is not None:
-                    datasets[name] = df
-                    print(f"✅ Loaded {name}: {len(df)} rows, {len(df.columns)} columns")
-            except Exception as e:
-                print(f"⚠️ Failed to load {name}: {e}")
+        return {name: df for name, df in zip(names, frames) if df is not None}
+    
+    def load_dataset(self, name: str) -> Optional[pd.DataFrame]:
+        """Load one dataset from the schema registry (None if missing, failed, streamed or partitioned)"""
+        schema = DATASET_SCHEMAS[name]
+        try:
+            if self._register_partitioned(name, schema):
+                return None
+            if self._should_stream(name, schema):
+                return None
+            df = self.load_csv(schema['file'], schema=schema)
+            if df is not None:
+                filepath = self.data_dir / schema['file']
+                source = self._source_id(filepath, schema_signature(schema, self.float32_amounts))
+                df = self._register(name, df, schema, self._dataset_version(schema), source)
+            return df
+        except Exception as e:
+            print(f"⚠️ Failed to load {name}: {e}")
+            return None
+    
+    def _register(self, name: str, df: pd.DataFrame, schema: Dict[str, Any],
+                  version: Optional[str], source: str) -> pd.DataFrame:
+        """Add calendar buckets to a loaded frame and build its rollup, stats, index and views"""
+        df = add_bucket_columns(df, next((c for c in schema['dates'] if c in df.columns), None))
+        self.rollups[name] = self._rollup(df, schema, version, source)
+        self.stats[name] = self._stats(df, schema, version)
+        self.indexes[name] = self.build_index(name, df)
+        self.views.on_load(name, df, version)
+        self.memory_report[name] = memory_savings(df, schema)
+        saved_mb = self.memory_report[name]['saved_bytes'] / 1_000_000
+        print(f"✅ Loaded {name}: {len(df)} rows, {len(data_columns(df.columns))} columns "
+              f"({saved_mb:.2f} MB saved by schema dtypes)")
+        return df
+    
+    # ── Wide table ─────────────────────────────────────────────────
+    
+    def load_wide(self, frames: Optional[Mapping] = None,
+                  versions: Optional[Dict[str, Optional[str]]] = None) -> Optional[pd.DataFrame]:
+        """
+        The loan, payment and customer datasets joined on (date, branch) (see
+        wide_table.py), cached under the versions of its sources and registered
+        like a dataset under WIDE: rollup, stats, index and views.
+        frames/versions: the source frames already in memory and the versions
+        they hold (default: load each source, at its current file version).
+        None when a source is missing, streamed, partitioned or has two rows
+        for one key.
+        """
+        sources = {}
+        for name in WIDE_SCHEMA['sources']:
+            df = frames.get(name) if frames is not None else self.load_dataset(name)
+            if df is None:
+                print(f"⚠️ No wide table: {name} is not held in memory")
+                return None
+            sources[name] = df
+        versions = versions or {name: self.dataset_version(name) for name in sources}
+        parts = [versions.get(name) for name in sources]
+        key = (hashlib.md5(f"{WIDE}|{'|'.join(parts)}".encode()).hexdigest()
+               if all(parts) else None)        # sources without a file version (shared memory) are not cached
         
-        return datasets
+        wide = self._load_from_cache(key) if key else None
+        if wide is None:
+            wide = build_wide(sources)
+            if wide is None:
+                return None
+            if key:
+                self._save_to_cache(key, wide, self._wide_source())
+        self.wide_version = key
+        return self._register(WIDE, wide, WIDE_SCHEMA, key, self._wide_source())
+    
+    def _wide_source(self) -> str:
+        return f"{WIDE}|{'float32' if self.float32_amounts else 'float64'}"
+    
+    def _needs_parse(self, name: str) -> bool:
+        """True when loading name would parse CSV rather than hit the cache"""
+        schema = DATASET_SCHEMAS[name]
+        filepath = self.data_dir / schema['file']
+        if self._partition_root(schema) or not filepath.exists() or self._should_stream(name, schema):
+            return False
+        key = self._get_cache_key(filepath, schema_signature(schema, self.float32_amounts))
+        return not self.store.exists(key)
+    
+    def _worker_args(self, name: str) -> Dict[str, Any]:
+        return {
+            'name':            name,
+            'data_dir':        str(self.data_dir),
+            'cache_dir':       str(self.cache_dir),
+            'float32_amounts': self.float32_amounts,
+            'verify_prefix':   self.verify_prefix,
+        }
     
-    def load_csv(self, filename: str, use_cache: bool = True) -> Optional[pd.DataFrame]:
-        """Load CSV file with caching"""
+    def lazy_datasets(self) -> "LazyDatasets":
+        """Mapping of dataset name → DataFrame that loads each dataset on first access"""
+        return LazyDatasets(self)
+    
+    def load_csv(self, filename: str, use_cache: bool = True,
+                 schema: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+        """Load CSV file with caching (explicit dtypes when a schema is given)"""
         filepath = self.data_dir / filename
         
         if not filepath.exists():
@@ -49,17 +196,27 @@ class DataLoader:
             return None
         
         if use_cache:
-            cache_key = self._get_cache_key(filepath)
+            variant = schema_signature(schema, self.float32_amounts)
+            cache_key = self._get_cache_key(filepath, variant)
             cached_df = self._load_from_cache(cache_key)
             if cached_df is not None:
                 return cached_df
+            appended_df = self._load_incremental(filepath, variant, cache_key, schema)
+            if appended_df is not None:
+                return appended_df
         
         try:
-            df = pd.read_csv(filepath)
-            df = self._preprocess_dataframe(df)
+            stat_before = filepath.stat()
+            if schema:
+                df = pd.read_csv(filepath, **read_csv_kwargs(schema, self.float32_amounts))
+            else:
+                df = pd.read_csv(filepath)
+            df = self._preprocess_dataframe(df, schema)
             
             if use_cache:
-                self._save_to_cache(cache_key, df)
+                self._save_to_cache(cache_key, df, self._source_id(filepath, variant))
+                if self._same_stat(stat_before, filepath.stat()):
+                    self._record_ingest(filepath, variant, cache_key, len(df), list(df.columns))
             
             return df
             
@@ -67,8 +224,12 @@ class DataLoader:
             print(f"❌ Error loading {filename}: {e}")
             return None
     
-    def _preprocess_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _preprocess_dataframe(self, df: pd.DataFrame,
+                              schema: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
         """Basic preprocessing"""
+        if schema:
+            return apply_schema(df, schema, self.float32_amounts)
+        
         # Convert date columns
         date_columns = [col for col in df.columns if 'date' in col.lower()]
         for col in date_columns:
@@ -83,28 +244,382 @@ class DataLoader:
         
         return df
     
-    def _get_cache_key(self, filepath: Path) -> str:
+    # ── Rollups ────────────────────────────────────────────────────
+    
+    def _rollup(self, df: pd.DataFrame, schema: Dict[str, Any], version: Optional[str],
+                source: str) -> Optional[RollupCube]:
+        """(branch, month) cube for a loaded dataset, cached alongside the dataset itself"""
+        group_col = next((c for c in schema['categoricals'] if c in df.columns), None)
+        date_col = next((c for c in schema['dates'] if c in df.columns), None)
+        if group_col is None or date_col is None:
+            return None
+        metrics = [c for c in schema['counts'] + schema['amounts'] + schema['rates'] if c in df.columns]
+        
+        key = f"{version}-rollup" if version else None
+        cells = self._load_from_cache(key) if key else None
+        if cells is None:
+            cube = RollupCube.build(df, metrics, date_col, group_col)
+            if key:
+                self._save_to_cache(key, cube.cells, f"{source}|rollup")
+            return cube
+        return RollupCube(cells, metrics, date_col, group_col, list(df.columns))
+    
+    def _stats(self, df: pd.DataFrame, schema: Dict[str, Any], version: Optional[str]) -> StatsCatalog:
+        """Column statistics for a loaded dataset, kept in its cache entry's meta"""
+        date_col = next((c for c in schema['dates'] if c in df.columns), None)
+        if not version:
+            return StatsCatalog.build(df, date_col, version)
+        meta = self.store.load_meta(version) or {}
+        cached = meta.get('stats')
+        if cached and cached.get('version') == version and cached.get('rows') == len(df):
+            return StatsCatalog(cached)
+        stats = StatsCatalog.build(df, date_col, version)
+        self.store.update_meta(version, stats=stats.to_dict())
+        return stats
+    
+    def build_index(self, name: str, df: pd.DataFrame) -> Optional[RowIndex]:
+        """Date/branch row index for a loaded dataset (in memory only; an argsort is cheaper than a cache read)"""
+        schema = self._schema(name)
+        date_col = next((c for c in schema['dates'] if c in df.columns), None)
+        if date_col is None:
+            return None
+        return RowIndex.build(df, date_col, [c for c in schema['categoricals'] if c in df.columns])
+    
+    def build_approximate(self, name: str, df: pd.DataFrame) -> ApproximateIndex:
+        """Per-branch sample and (branch, month) sketches for approximate plans (in memory, built on first use)"""
+        schema = self._schema(name)
+        date_col   = next((c for c in schema['dates'] if c in df.columns), None)
+        strata_col = next((c for c in schema['categoricals'] if c in df.columns), None)
+        metrics  = [c for c in schema['counts'] + schema['amounts'] + schema['rates'] if c in df.columns]
+        distinct = [c for c in schema['categoricals'] if c in df.columns and c != strata_col] + metrics
+        return ApproximateIndex.build(df, date_col, strata_col, metrics, distinct)
+    
+    def _dataset_for(self, filepath: Path) -> Optional[str]:
+        """Registry name of the dataset whose single source file is filepath"""
+        return next((n for n, s in DATASET_SCHEMAS.items()
+                     if (self.data_dir / s['file']).resolve() == filepath.resolve()), None)
+    
+    def dataset_version(self, name: str) -> Optional[str]:
+        return self.wide_version if name == WIDE else self._dataset_version(DATASET_SCHEMAS[name])
+    
+    def _schema(self, name: str) -> Dict[str, Any]:
+        return WIDE_SCHEMA if name == WIDE else DATASET_SCHEMAS[name]
+    
+    def _dataset_version(self, schema: Dict[str, Any]) -> str:
+        """Cache key of the dataset's current file contents (changes on every append/rewrite)"""
+        filepath = self.data_dir / schema['file']
+        return self._get_cache_key(filepath, schema_signature(schema, self.float32_amounts))
+    
+    # ── Partitions ─────────────────────────────────────────────────
+    
+    def load_partitions(self, name: str, plan: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+        """
+        Read only the partitions of a partitioned dataset that the plan's
+        date_filter and filters['branch'] can match. Each partition file goes
+        through load_csv, so it is cached and ingested incrementally on its own.
+        """
+        schema = DATASET_SCHEMAS[name]
+        plan = plan or {}
+        paths, total = self.partitioned[name].prune(plan.get('date_filter'), plan.get('filters'))
+        print(f"🗂️ {name}: reading {len(paths)} of {total} partitions")
+        
+        frames = []
+        for path in paths:
+            df = self.load_csv(str(path.relative_to(self.data_dir)), schema=schema)
+            if df is None:
+                continue
+            # Partition columns may live only in the path
+            branch = self._partition_value(path, 'branch')
+            if branch is not None and 'branch' not in df.columns:
+                df = df.assign(branch=branch)
+            frames.append(df)
+        if not frames:
+            return None
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        # Per-file categories differ, so concat falls back to object; re-encode
+        return apply_schema(df, schema, self.float32_amounts)
+    
+    def is_partitioned(self, name: str) -> bool:
+        """True when name is served from a partition directory (see load_partitions)"""
+        return name in DATASET_SCHEMAS and self._register_partitioned(name, DATASET_SCHEMAS[name])
+    
+    def _register_partitioned(self, name: str, schema: Dict[str, Any]) -> bool:
+        root = self._partition_root(schema)
+        if root is None:
+            return False
+        if name not in self.partitioned:
+            self.partitioned[name] = PartitionedDataset(root)
+            print(f"🗂️ {name}: partitioned dataset at {root}, "
+                  f"{len(self.partitioned[name].partitions())} partitions (read per query)")
+        return True
+    
+    def _partition_root(self, schema: Dict[str, Any]) -> Optional[Path]:
+        root = self.data_dir / schema.get('partition_dir', '')
+        return root if schema.get('partition_dir') and root.is_dir() else None
+    
+    def _partition_value(self, path: Path, key: str) -> Optional[str]:
+        for seg in path.parts[:-1] + (path.stem,):
+            k, sep, val = seg.partition('=')
+            if sep and k == key:
+                return val
+        return None
+    
+    # ── Streaming ──────────────────────────────────────────────────
+    
+    def iter_dataset_chunks(self, name: str, usecols: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield preprocessed chunks of a streamed dataset, reading only usecols"""
+        schema = DATASET_SCHEMAS[name]
+        kwargs = read_csv_kwargs(schema, self.float32_amounts)
+        if usecols is not None:
+            kwargs['dtype'] = {c: t for c, t in kwargs['dtype'].items() if c in usecols}
+            kwargs['parse_dates'] = [c for c in kwargs['parse_dates'] if c in usecols]
+        chunksize = self.streamed.get(name) or self._chunk_rows(name, schema)
+        reader = pd.read_csv(self.data_dir / schema['file'], usecols=usecols,
+                             chunksize=chunksize, **kwargs)
+        with reader:
+            for chunk in reader:
+                yield self._preprocess_dataframe(chunk, schema)
+    
+    def dataset_columns(self, name: str) -> List[str]:
+        schema = DATASET_SCHEMAS[name]
+        return list(pd.read_csv(self.data_dir / schema['file'], nrows=0).columns)
+    
+    def estimate_footprint(self, filename: str, schema: Optional[Dict[str, Any]] = None,
+                           sample_rows: int = 2000) -> Dict[str, float]:
+        """Estimate rows and in-memory bytes of a CSV from a small parsed sample"""
+        filepath = self.data_dir / filename
+        kwargs = read_csv_kwargs(schema, self.float32_amounts) if schema else {}
+        sample = pd.read_csv(filepath, nrows=sample_rows, **kwargs)
+        sample = self._preprocess_dataframe(sample, schema)
+        with open(filepath, 'rb') as f:
+            header = f.readline()
+            sample_bytes = sum(len(f.readline()) for _ in range(len(sample))) or 1
+        file_size = filepath.stat().st_size
+        bytes_per_row = sample.memory_usage(deep=True).sum() / max(len(sample), 1)
+        est_rows = (file_size - len(header)) / (sample_bytes / max(len(sample), 1))
+        return {
+            'rows':          est_rows,
+            'bytes_per_row': float(bytes_per_row),
+            'bytes':         float(bytes_per_row * est_rows),
+        }
+    
+    def _should_stream(self, name: str, schema: Dict[str, Any]) -> bool:
+        if name in self.streamed:
+            return True
+        if not self.max_memory_mb or not (self.data_dir / schema['file']).exists():
+            return False
+        est = self.estimate_footprint(schema['file'], schema)
+        budget = self.max_memory_mb * 1_000_000
+        if est['bytes'] <= budget / 2:
+            return False
+        self.streamed[name] = self._chunk_rows(name, schema, est)
+        print(f"🌊 Streaming {name}: ~{est['bytes'] / 1e6:,.0f} MB exceeds half of the "
+              f"{self.max_memory_mb:,.0f} MB budget, chunks of {self.streamed[name]:,} rows")
+        return True
+    
+    def _chunk_rows(self, name: str, schema: Dict[str, Any],
+                    est: Optional[Dict[str, float]] = None) -> int:
+        """Rows per chunk so one parsed chunk uses ~1/8 of the memory budget"""
+        if not self.max_memory_mb:
+            return 100_000
+        est = est or self.estimate_footprint(schema['file'], schema)
+        # read_csv holds raw buffers and intermediate arrays alongside the chunk
+        rows = int(self.max_memory_mb * 1_000_000 / 8 / max(est['bytes_per_row'], 1))
+        return max(rows, 1000)
+    
+    # ── Incremental ingest ─────────────────────────────────────────
+    
+    def _load_incremental(self, filepath: Path, variant: str, cache_key: str,
+                          schema: Optional[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+        """
+        Parse only the bytes appended since the last ingest and append them to
+        the cached frame. Returns None (→ full reload) when there is no usable
+        previous ingest or the already-ingested bytes look different.
+        """
+        state = self.ingest_state.get(self._source_id(filepath, variant))
+        if not state or not self.store.exists(state['cache_key']):
+            return None
+        
+        offset = state['offset']
+        if filepath.stat().st_size < offset or self._fingerprint(filepath, offset) != state['fingerprint']:
+            print(f"🔄 {filepath.name} was rewritten, doing a full reload")
+            return None
+        
+        with open(filepath, 'rb') as f:
+            f.seek(offset)
+            tail_bytes = f.read()
+        # A partially written last line is left for the next ingest
+        tail_bytes = tail_bytes[:tail_bytes.rfind(b'\n') + 1]
+        
+        try:
+            tail = self._parse_tail(tail_bytes, state['columns'], schema)
+            if not self.store.append(state['cache_key'], tail, new_key=cache_key):
+                return None
+            self.cache_manager.renamed(state['cache_key'], cache_key, self._source_id(filepath, variant))
+        except Exception as e:
+            print(f"⚠️ Incremental ingest of {filepath.name} failed ({e}), doing a full reload")
+            return None
+        
+        df = self._load_from_cache(cache_key)
+        rows = state['rows'] + len(tail)
+        if df is None or len(df) != rows:
+            return None
+        if len(tail):
+            print(f"➕ {filepath.name}: ingested {len(tail)} appended rows ({rows} total)")
+            name = self._dataset_for(filepath)
+            if name is not None:
+                self.views.on_append(name, tail, state['cache_key'], cache_key)
+        self._record_ingest(filepath, variant, cache_key, rows, state['columns'],
+                            offset=offset + len(tail_bytes))
+        return df
+    
+    def _parse_tail(self, tail_bytes: bytes, columns: List[str],
+                    schema: Optional[Dict[str, Any]]) -> pd.DataFrame:
+        if not tail_bytes.strip():
+            return pd.DataFrame({c: pd.Series(dtype=object) for c in columns})
+        kwargs = read_csv_kwargs(schema, self.float32_amounts) if schema else {}
+        tail = pd.read_csv(io.BytesIO(tail_bytes), header=None, names=columns, **kwargs)
+        return self._preprocess_dataframe(tail, schema)
+    
+    def _record_ingest(self, filepath: Path, variant: str, cache_key: str, rows: int,
+                       columns: List[str], offset: Optional[int] = None):
+        """Remember how far filepath has been ingested (only at a line boundary)"""
+        if offset is None:
+            offset = filepath.stat().st_size
+            if offset == 0 or self._read_bytes(filepath, offset - 1, 1) != b'\n':
+                return
+        entry = {
+            'cache_key':   cache_key,
+            'offset':      offset,
+            'rows':        rows,
+            'columns':     [str(c) for c in columns],
+            'fingerprint': self._fingerprint(filepath, offset),
+        }
+        with self._lock:
+            # Merge with what other processes recorded since we last read the file
+            self.ingest_state = {**self._read_ingest_state(), **self.ingest_state}
+            self.ingest_state[self._source_id(filepath, variant)] = entry
+            self._write_ingest_state()
+    
+    def _fingerprint(self, filepath: Path, offset: int, window: int = 65536,
+                     samples: int = 16, block: int = 4096) -> str:
+        """Hash of the first `offset` bytes (sampled or full, see verify_prefix)"""
+        h = hashlib.md5(f"{self.verify_prefix}:{offset}|".encode())
+        with open(filepath, 'rb') as f:
+            if self.verify_prefix == "full":
+                remaining = offset
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    remaining -= len(chunk)
+                return h.hexdigest()
+            
+            h.update(f.readline())
+            step = max(offset // samples, 1)
+            for start in range(0, max(offset - window, 0), step):
+                f.seek(start)
+                h.update(f.read(min(block, offset - start)))
+            f.seek(max(0, offset - window))
+            h.update(f.read(min(offset, window)))
+        return h.hexdigest()
+    
+    def _read_bytes(self, filepath: Path, start: int, length: int) -> bytes:
+        with open(filepath, 'rb') as f:
+            f.seek(start)
+            return f.read(length)
+    
+    def _same_stat(self, a: os.stat_result, b: os.stat_result) -> bool:
+        return a.st_size == b.st_size and a.st_mtime == b.st_mtime
+    
+    def _source_id(self, filepath: Path, variant: str) -> str:
+        return f"{filepath.resolve()}|{variant}"
+    
+    def _read_ingest_state(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.ingest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_ingest_state(self):
+        tmp = self.ingest_file.with_suffix(f".tmp-{os.getpid()}-{threading.get_ident()}")
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.ingest_state, f, indent=2)
+            os.replace(tmp, self.ingest_file)
+        except OSError as e:
+            print(f"⚠️ Could not persist ingest state: {e}")
+    
+    # ── Cache ──────────────────────────────────────────────────────
+    
+    def _get_cache_key(self, filepath: Path, variant: str = "") -> str:
         """Generate cache key"""
         stat = filepath.stat()
-        key_str = f"{filepath}_{stat.st_mtime}_{stat.st_size}"
+        key_str = f"{filepath}_{stat.st_mtime}_{stat.st_size}_{variant}"
         return hashlib.md5(key_str.encode()).hexdigest()
     
     def _load_from_cache(self, cache_key: str) -> Optional[pd.DataFrame]:
-        """Load from cache"""
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'rb') as f:
-                    return pickle.load(f)
-            except:
-                pass
-        return None
+        """Load from cache (columns are memory-mapped, not copied)"""
+        return self.cache_manager.get(cache_key)
     
-    def _save_to_cache(self, cache_key: str, df: pd.DataFrame):
-        """Save to cache"""
-        cache_file = self.cache_dir / f"{cache_key}.pkl"
+    def _save_to_cache(self, cache_key: str, df: pd.DataFrame, source: Optional[str] = None):
+        """Save to cache, replacing any older snapshot of the same source"""
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(df, f)
+            self.cache_manager.put(cache_key, df, source)
         except Exception as e:
-            print(f"⚠️ Cache save failed: {e}")
\ No newline at end of file
+            print(f"⚠️ Cache save failed: {e}")
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and size of the on-disk cache"""
+        return self.cache_manager.stats()
+
+
+def _warm_cache(args: Dict[str, Any]) -> bool:
+    """Process-pool worker: parse one dataset into the shared column store"""
+    schema = DATASET_SCHEMAS[args.pop('name')]
+    loader = DataLoader(**args)
+    return loader.load_csv(schema['file'], schema=schema) is not None
+
+
+class LazyDatasets(Mapping):
+    """
+    Read-only mapping over the schema registry that loads a dataset the first
+    time it is looked up, so a query touching only `payment` never parses the
+    others. Concurrent first lookups of the same dataset load it once.
+    """
+    
+    def __init__(self, loader: DataLoader):
+        self.loader = loader
+        self._frames: Dict[str, Optional[pd.DataFrame]] = {}
+        self._locks = {name: threading.Lock() for name in DATASET_SCHEMAS}
+    
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        if name not in self._locks:
+            raise KeyError(name)
+        if name not in self._frames:
+            with self._locks[name]:
+                if name not in self._frames:
+                    self._frames[name] = self.loader.load_dataset(name)
+        df = self._frames[name]
+        if df is None:
+            raise KeyError(name)
+        return df
+    
+    def __iter__(self):
+        return (name for name, schema in DATASET_SCHEMAS.items()
+                if (self.loader.data_dir / schema['file']).exists()
+                and self._frames.get(name, True) is not None)
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def swap(self, name: str, df: pd.DataFrame):
+        """Replace a loaded dataset with a newer version"""
+        with self._locks[name]:
+            self._frames[name] = df
+    
+    def loaded(self) -> List[str]:
+        """Names of datasets that have been loaded so far"""
+        return [name for name, df in self._frames.items() if df is not None]
@@ -0,0 +1,67 @@
+"""
+Dataset Watcher - Background polling thread that reloads changed datasets
+Every `interval` seconds the watcher asks token(name) for a cheap change
+marker (a file's mtime and size, a shared-memory version, ...). When a marker
+changes and then holds still for one more poll (so half-written files are not
+picked up), reload(name) runs on the watcher thread, off the request path.
+The callback is responsible for swapping the result in atomically.
+"""
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+
+class DatasetWatcher:
+    """Polls change markers for a set of datasets and reloads the ones that moved"""
+
+    def __init__(self, names: Iterable[str], token: Callable[[str], Any],
+                 reload: Callable[[str], bool], interval: float = 2.0):
+        """reload(name) returns True once the new version is live (False → retried on a later poll)"""
+        self.names    = list(names)
+        self.token    = token
+        self.reload   = reload
+        self.interval = interval
+        self.reloads  = 0
+        self._seen: Dict[str, Any] = {name: self._safe_token(name) for name in self.names}
+        self._pending: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dataset-watcher", daemon=True)
+
+    def start(self) -> "DatasetWatcher":
+        self._thread.start()
+        print(f"👀 Watching {len(self.names)} dataset(s) for changes every {self.interval:g}s")
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def poll(self):
+        """One pass over every dataset (the thread calls this; tests and CLIs may too)"""
+        for name in self.names:
+            current = self._safe_token(name)
+            if current == self._seen.get(name):
+                self._pending.pop(name, None)
+                continue
+            if self._pending.get(name) != current:
+                self._pending[name] = current      # changed; wait one poll for it to settle
+                continue
+            self._pending.pop(name, None)
+            try:
+                ok = self.reload(name)
+            except Exception as e:
+                print(f"⚠️ Reload of {name} failed, keeping the current version: {e}")
+                ok = False
+            if ok:
+                self._seen[name] = current
+                self.reloads += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def _safe_token(self, name: str) -> Any:
+        try:
+            return self.token(name)
+        except OSError:
+            return None
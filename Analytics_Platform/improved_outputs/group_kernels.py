@@ -0,0 +1,121 @@
+"""
+Group Kernels - NumPy fast path for grouped sum/count/mean/min/max
+Group keys become integer codes once (a categorical's own codes, dense integer
+keys offset by their minimum, otherwise pd.factorize); every requested metric
+is then reduced against those codes in a single pass: np.bincount for sum,
+count and mean, np.fmin.at / np.fmax.at for min and max. Results match
+DataFrame.groupby(key, observed=True)[metrics].<agg>(): same groups in the
+same order, same index and dtypes, missing values skipped. Sums and means
+agree to floating-point rounding (pandas uses compensated summation, the
+kernels accumulate in float64). Anything the kernels do not cover returns
+None and the caller falls back to pandas.
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+
+FAST_AGGREGATIONS = {"sum", "count", "mean", "avg", "min", "max"}
+FAST_DTYPES       = {np.dtype(t) for t in ("int8", "int16", "int32", "int64",
+                                         "uint8", "uint16", "uint32", "uint64", "float32", "float64")}
+EXACT_INT_SUM     = 2 ** 53     # float64 accumulators are exact for integer sums below this
+
+
+def group_codes(keys: pd.Series) -> Optional[Tuple[np.ndarray, pd.Index]]:
+    """Integer code per row (-1 = missing key) and the value of each code, in groupby order"""
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return keys.cat.codes.to_numpy(), keys.cat.categories
+    if keys.dtype == object:
+        return None     # mixed Python objects may not sort the way groupby sorts them
+    if isinstance(keys.dtype, np.dtype) and keys.dtype.kind in "iu" and len(keys):
+        values = keys.to_numpy()
+        lo, hi = int(values.min()), int(values.max())
+        if hi - lo <= len(values):      # dense small integers (calendar buckets): offset keys are the codes
+            return (values - lo).astype(np.intp), pd.Index(np.arange(lo, hi + 1, dtype=keys.dtype))
+    try:
+        codes, uniques = pd.factorize(keys, sort=True)
+    except TypeError:
+        return None
+    return codes, pd.Index(uniques)
+
+
+def group_labels(keys: pd.Series, uniques: pd.Index, observed: np.ndarray) -> pd.Index:
+    """Index of the groups whose codes are in observed, as groupby labels them"""
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return pd.CategoricalIndex(pd.Categorical.from_codes(observed, dtype=keys.dtype), name=keys.name)
+    return pd.Index(uniques[observed], name=keys.name)
+
+
+def grouped_reduce(keys: pd.Series, values: pd.DataFrame, agg: str) -> Optional[pd.DataFrame]:
+    """values aggregated per key with agg, or None when the kernels cannot reproduce pandas"""
+    agg = "mean" if agg == "avg" else agg
+    if agg not in FAST_AGGREGATIONS or len(keys) == 0:
+        return None
+    if any(values[c].dtype not in FAST_DTYPES for c in values.columns):
+        return None
+    coded = group_codes(keys)
+    if coded is None:
+        return None
+    codes, uniques = coded
+    size = len(uniques)
+
+    live = None
+    if size and codes.min() < 0:    # rows with a missing key belong to no group
+        live  = codes >= 0
+        codes = codes[live]
+    rows     = np.bincount(codes, minlength=size)
+    observed = np.flatnonzero(rows)
+    if len(observed) == 0:
+        return None
+
+    out = {}
+    for col in values.columns:
+        v = values[col].to_numpy()
+        v = v if live is None else v[live]
+        nan = np.isnan(v) if v.dtype.kind == "f" else None
+        if nan is not None and not nan.any():
+            nan = None
+        if agg in ("sum", "mean", "count"):
+            c = codes if nan is None else codes[~nan]
+            counts = rows if nan is None else np.bincount(c, minlength=size)
+            if agg == "count":
+                out[col] = counts[observed].astype(np.int64)
+                continue
+            if v.dtype.kind in "iu" and len(v) and \
+                    max(-int(v.min()), int(v.max())) * len(v) >= EXACT_INT_SUM:
+                return None
+            w = v if nan is None else v[~nan]
+            sums = np.bincount(c, weights=w if w.dtype == np.float64 else w.astype(np.float64),
+                               minlength=size)[observed]
+            if agg == "sum":
+                out[col] = sums if v.dtype.kind in "iu" else sums.astype(v.dtype)
+            else:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    means = sums / counts[observed]     # all-missing groups: 0/0 = NaN, as in pandas
+                out[col] = means.astype(np.float32 if v.dtype == np.float32 else np.float64)
+        else:
+            reduce = np.fmin if agg == "min" else np.fmax
+            if v.dtype.kind == "f":
+                acc = np.full(size, np.nan, dtype=v.dtype)     # fmin/fmax skip NaN; all-NaN groups stay NaN
+            else:
+                info = np.iinfo(v.dtype)
+                acc  = np.full(size, info.max if agg == "min" else info.min, dtype=v.dtype)
+            reduce.at(acc, codes, v)
+            out[col] = acc[observed]
+    if agg == "sum":
+        out = _narrow_sums(out, {c: values[c].dtype for c in values.columns})
+    return pd.DataFrame(out, index=group_labels(keys, uniques, observed), columns=list(values.columns))
+
+
+def _narrow_sums(out: dict, dtypes: dict) -> dict:
+    """
+    Integer sums as groupby types them: totalled in int64 (uint64 when unsigned),
+    then narrowed back to the columns' own dtype only when every sum of every
+    column of that dtype fits it (groupby narrows a same-dtype block as a whole)
+    """
+    for dtype in {d for d in dtypes.values() if d.kind in "iu"}:
+        cols = [c for c, d in dtypes.items() if d == dtype]
+        wide = {c: out[c].astype(np.uint64 if dtype.kind == "u" else np.int64) for c in cols}
+        info = np.iinfo(dtype)
+        fits = all(len(w) == 0 or (int(w.min()) >= info.min and int(w.max()) <= info.max) for w in wide.values())
+        out.update({c: w.astype(dtype) if fits else w for c, w in wide.items()})
+    return out
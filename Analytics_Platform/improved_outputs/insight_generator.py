@@ -26,7 +26,7 @@ class InsightGenerator:
         # Main value
         if 'value' in result:
             value = result['value']
-            insights.append(f"📊 **{metric_name}**: {self._format_number(value)}")
+            insights.append(f"📊 **{metric_name}**: {self._format_value(value, result)}")
         
         # Comparison insights
         if 'comparison_data' in result and result['comparison_data'] is not None:
@@ -40,6 +40,9 @@ class InsightGenerator:
             if trend_insight:
                 insights.append(trend_insight)
         
+        if result.get('window'):
+            insights.append(f"🪟 **Window**: {result['window']}")
+        
         # Filters
         if plan.get('filters'):
             filter_desc = self._describe_filters(plan['filters'])
@@ -49,6 +52,9 @@ class InsightGenerator:
         if 'count' in result:
             insights.append(f"📈 **Records Analyzed**: {result['count']}")
         
+        if result.get('approximate'):
+            insights.append(self._describe_bounds(result))
+        
         return "\n".join(insights)
     
     def _generate_multi_metric_insights(self, result: Dict, plan: Dict) -> str:
@@ -62,7 +68,7 @@ class InsightGenerator:
             winner = result['winner']
             total_value = result['value']
             metric_labels = ' + '.join(m.replace('_',' ').title() for m in metrics)
-            insights.append(f"🏆 **Winner**: {winner} with {self._format_number(total_value)} combined ({metric_labels})")
+            insights.append(f"🏆 **Winner**: {winner} with {self._format_value(total_value, result)} combined ({metric_labels})")
         
         # Breakdown by metric
         if 'metric_breakdown' in result:
@@ -74,16 +80,16 @@ class InsightGenerator:
                 metric_name = metric.replace('_', ' ').title()
                 if winner in breakdown[metric]:
                     value = breakdown[metric][winner]
-                    insights.append(f"   • {metric_name}: {self._format_number(value)}")
+                    insights.append(f"   • {metric_name}: {self._format_value(value, result)}")
         
         # Top 3 branches
         if len(comparison_df) >= 3:
             insights.append("\n📊 **Top 3 Branches**:")
             for i, (branch, row) in enumerate(comparison_df.head(3).iterrows(), 1):
                 total = row['total']
-                metric_vals = [f"{m.replace('_', ' ').title()[:15]}: {self._format_number(row[m])}" 
+                metric_vals = [f"{m.replace('_', ' ').title()[:15]}: {self._format_value(row[m], result)}" 
                               for m in metrics]
-                insights.append(f"   {i}. {branch}: {self._format_number(total)} total")
+                insights.append(f"   {i}. {branch}: {self._format_value(total, result)} total")
                 for mv in metric_vals:
                     insights.append(f"      - {mv}")
         elif len(comparison_df) > 0:
@@ -91,7 +97,7 @@ class InsightGenerator:
             insights.append("\n📊 **All Branches**:")
             for branch, row in comparison_df.iterrows():
                 total = row['total']
-                insights.append(f"   • {branch}: {self._format_number(total)} total")
+                insights.append(f"   • {branch}: {self._format_value(total, result)} total")
         
         # Calculate range
         if len(comparison_df) >= 2:
@@ -100,6 +106,9 @@ class InsightGenerator:
             diff_pct = ((highest - lowest) / lowest * 100) if lowest != 0 else 0
             insights.append(f"\n📉 **Range**: {diff_pct:.1f}% difference between highest and lowest")
         
+        if result.get('approximate'):
+            insights.append("\n" + self._describe_bounds(result))
+        
         return "\n".join(insights)
     
     def _analyze_comparison(self, result: Dict, metric_name: str, plan: Dict = None) -> str:
@@ -114,7 +123,7 @@ class InsightGenerator:
         # Winner
         if 'winner' in result and result['winner'] != 'N/A':
             winner_value = result['value']
-            insights.append(f"🏆 **Winner**: {result['winner']} with {self._format_number(winner_value)}")
+            insights.append(f"🏆 **Winner**: {result['winner']} with {self._format_value(winner_value, result)}")
         
         # Show results based on how many were requested
         # limit=1 → user asked for the single winner only; do NOT show other branches
@@ -124,10 +133,10 @@ class InsightGenerator:
             pass
         elif len(comparison_data) > 3:
             top3 = comparison_data.head(3)
-            top3_str = ", ".join([f"{idx} ({self._format_number(val)})" for idx, val in top3.items()])
+            top3_str = ", ".join([f"{idx} ({self._format_value(val, result)})" for idx, val in top3.items()])
             insights.append(f"📊 **Top 3**: {top3_str}")
         else:
-            all_str = ", ".join([f"{idx} ({self._format_number(val)})" for idx, val in comparison_data.items()])
+            all_str = ", ".join([f"{idx} ({self._format_value(val, result)})" for idx, val in comparison_data.items()])
             insights.append(f"📊 **Results**: {all_str}")
 
         # Range only meaningful when showing multiple branches
@@ -186,6 +195,20 @@ class InsightGenerator:
                 descriptions.append(f"{col_name} = {value}")
         return ", ".join(descriptions) if descriptions else "None"
     
+    def _format_value(self, num: float, result: Dict) -> str:
+        """Format number, marked ≈ when the result is an estimate"""
+        return ("≈ " if result.get('approximate') else "") + self._format_number(num)
+    
+    def _describe_bounds(self, result: Dict) -> str:
+        """Method and interval of an approximate result"""
+        bounds = result.get('error_bounds', {})
+        line = f"🧪 **Approximate**: {bounds.get('method', 'estimated')}"
+        if bounds.get('value'):
+            lower, upper = bounds['value']
+            line += (f"; between {self._format_number(lower)} and {self._format_number(upper)} "
+                     f"at {bounds.get('confidence', 0.95):.0%} confidence")
+        return line
+    
     def _format_number(self, num: float) -> str:
         """Format number with units"""
         if abs(num) >= 1_000_000_000:
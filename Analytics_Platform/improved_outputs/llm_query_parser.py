@@ -12,6 +12,9 @@ import urllib.request
 import urllib.error
 from typing import Dict, Any, Optional, List
 
+from improved_outputs.calendar_buckets import GRANULARITIES
+from improved_outputs.windows import WINDOW_FUNCTIONS
+
 
 # ── Schema sent to the LLM with every request ──────────────────────────────
 
@@ -44,6 +47,9 @@ PLAN TYPES — set "type" to one of:
 FIELDS:
   type, dataset, metric (single), metrics (list), metric_a, metric_b,
   aggregation, group_by, sort_order ("ascending"/"descending"), limit (int or null),
+  granularity ("day"/"week"/"month"/"quarter"/"year", trend or window only; default "day"),
+  window: {{ "function": one of rolling_sum, rolling_mean, lag, lead, change, mom, qoq, yoy,
+             "periods": int (rolling width / offset in granularity periods) }},
   filters: {{ branch: ["Mumbai","Pune"] }},
   date_filter: one of:
     {{ "type":"relative", "n":6, "unit":"month" }}
@@ -51,7 +57,7 @@ FIELDS:
     {{ "type":"month",    "month":6, "year":2024 }}
     {{ "type":"year",     "year":2024 }}
 
-AGGREGATIONS: sum, mean, growth, count, min, max, median
+AGGREGATIONS: sum, mean, growth, count, min, max, median, distinct
   - percent/rate columns  → mean
   - amounts/volumes       → sum
   - trend/growing         → growth
@@ -80,8 +86,14 @@ RULES:
   - "bottom N" → sort_order=ascending,  limit=N
   - "vs/and/both" with 2+ metrics     → multi_metric_branch_comparison, set metrics list
   - "highest X and Y"               → multi_metric_branch_comparison (NOT branch_comparison)
+  - metrics may come from different datasets ("high fraud and high NPA") → list them all;
+    such plans run on the joined loan/payment/customer table
   - "growing faster than/outpacing"  → cross_metric_growth_comparison
   - "trend/over time/monthly"        → trend
+  - "daily/weekly/monthly/quarterly/yearly", "by month", "per quarter" → granularity
+  - "MoM/QoQ/YoY", "month over month" → window function mom/qoq/yoy
+  - "3-month rolling average" → window {{ "function":"rolling_mean","periods":3 }}, granularity "month"
+  - window + "which branch/highest" → branch_comparison ranked by the latest windowed value
   - For relative dates, data ends 2024-12-30 (use data max, not today)
   - Vague query → pick most sensible default
 
@@ -238,8 +250,23 @@ def _normalise(plan: dict) -> dict:
         out["metric_b"] = plan.get("metric_b") or (metrics[1] if len(metrics) > 1 else None)
         out["metrics"]  = [out["metric_a"], out["metric_b"]]
 
-    if plan_type == "trend":
-        out["group_by"] = plan.get("group_by", "date")
+    window = plan.get("window")
+    if isinstance(window, str):
+        window = {"function": window}
+    if isinstance(window, dict) and str(window.get("function") or "").lower() in WINDOW_FUNCTIONS:
+        periods = window.get("periods")
+        out["window"] = {"function": str(window["function"]).lower()}
+        if isinstance(periods, (int, float)) and periods >= 1:
+            out["window"]["periods"] = int(periods)
+        if out.get("aggregation") == "growth":
+            out["aggregation"] = "sum"
+
+    granularity = str(plan.get("granularity") or "").lower()
+    if granularity in GRANULARITIES and ("comparison_type" not in out or "window" in out):
+        out["granularity"] = granularity
+
+    if plan_type == "trend" or ("granularity" in out and "comparison_type" not in out):
+        out["group_by"] = plan.get("group_by") or "date"
 
     return out
 
@@ -272,6 +299,13 @@ def _keyword_fallback(query: str) -> Dict[str, Any]:
     }
     if date_range:
         plan["date_filter"] = date_range
+    granularity = qd.extract_granularity(query)
+    if granularity:
+        plan["group_by"]    = "date"
+        plan["granularity"] = granularity
+    qd.add_window(plan, query)
+    if "window" in plan:
+        plan["group_by"] = "date"
     return plan
 
 
@@ -9,6 +9,8 @@ import platform
 from typing import Dict, Any, Optional
 from pydantic import BaseModel, Field, validator
 
+from improved_outputs.query_detector import QueryDetector
+
 class ExecutionPlan(BaseModel):
     """Validated execution plan"""
     dataset: str
@@ -16,6 +18,7 @@ class ExecutionPlan(BaseModel):
     aggregation: str = "sum"
     filters: Dict[str, Any] = Field(default_factory=dict)
     group_by: Optional[str] = None
+    granularity: Optional[str] = None
     
     @validator('dataset')
     def validate_dataset(cls, v):
@@ -124,6 +127,7 @@ RULES:
 5. If query mentions "over time", "timeline", "trend", add group_by: "date"
 6. If query mentions a city name, add to filters
 7. If query is about comparison, focus on most relevant single metric
+8. If query says "weekly", "monthly", "quarterly", "yearly" (or "by month" etc.), add group_by: "date" and that granularity
 
 RESPOND WITH ONLY THIS JSON STRUCTURE:
 {{
@@ -131,7 +135,8 @@ RESPOND WITH ONLY THIS JSON STRUCTURE:
   "metric": "exact_column_name",
   "aggregation": "sum|mean|growth",
   "filters": {{}},
-  "group_by": "date|null"
+  "group_by": "date|null",
+  "granularity": "day|week|month|quarter|year|null"
 }}
 
 JSON OUTPUT:"""
@@ -255,6 +260,10 @@ JSON OUTPUT:"""
         # === STEP 4: Detect Grouping ===
         if any(word in q for word in ['trend', 'over time', 'timeline', 'monthly', 'daily', 'time series', 'pattern', 'progression']):
             plan['group_by'] = 'date'
+        granularity = QueryDetector().extract_granularity(q)
+        if granularity:
+            plan['group_by'] = 'date'
+            plan['granularity'] = granularity
         
         # === STEP 5: Extract Filters ===
         branches = ['mumbai', 'delhi', 'pune', 'bangalore', 'chennai', 'kolkata', 'hyderabad', 'ahmedabad', 'jaipur', 'surat']
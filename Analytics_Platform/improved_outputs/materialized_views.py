@@ -0,0 +1,129 @@
+"""
+Materialized Views - Standing plans kept up to date as rows are ingested
+A registered plan keeps the mergeable partial aggregates of the rows it selects
+(sum, count, min, max and first/last per group, see PartialAggregate) together
+with its finalised result. When DataLoader appends rows to a dataset, only the
+new rows are filtered and folded in, so sum/count/min/max/mean and
+first/last-based growth stay exact without rescanning the table; a full
+reload rebuilds the view from the new frame. A lookup is a dictionary read of
+the stored result, valid only for the dataset version the view reflects.
+"""
+import json
+import threading
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+from improved_outputs.analytics_engine import AnalyticsEngine
+from improved_outputs.result_cache import canonical_plan
+from improved_outputs.streaming import PartialAggregate
+
+
+class MaterializedView:
+    """One standing plan's partial state and current result"""
+
+    def __init__(self, plan: Dict[str, Any], spec: Dict[str, Any], engine: AnalyticsEngine):
+        self.plan    = plan
+        self.spec    = spec
+        self.engine  = engine
+        self.partial = PartialAggregate(spec["metrics"], spec["group_col"], spec["order_col"], spec["needs"])
+        self.result: Optional[Dict[str, Any]] = None
+        self.version: Optional[str] = None
+        self.rows_folded = 0
+
+    def rebuild(self, df: pd.DataFrame, version: Optional[str]):
+        """Recompute the view from a complete frame"""
+        self.partial = PartialAggregate(self.spec["metrics"], self.spec["group_col"], self.spec["order_col"],
+                                        self.spec["needs"])
+        self.rows_folded = 0
+        self.fold(df, version)
+
+    def fold(self, rows: pd.DataFrame, version: Optional[str]):
+        """Fold rows appended after everything folded so far"""
+        selected = self.engine._apply_filters(rows, self.spec["filters"])
+        selected = self.engine._apply_date_filter(selected, self.plan.get("date_filter") or {})
+        self.partial.update(selected)
+        self.rows_folded += len(rows)
+        self.result  = self.engine._partial_result(self.partial, self.plan, self.spec)
+        self.version = version
+
+
+class ViewRegistry:
+    """Materialized views per dataset, keyed by canonical plan"""
+
+    def __init__(self, engine: Optional[AnalyticsEngine] = None):
+        self.engine = engine or AnalyticsEngine()
+        self._views: Dict[str, MaterializedView] = {}
+        self._lock = threading.RLock()
+        self.counters = {"hits": 0, "misses": 0, "appends": 0, "rebuilds": 0}
+
+    # ── Registration ───────────────────────────────────────────────
+
+    def key(self, plan: Dict[str, Any]) -> str:
+        return json.dumps(canonical_plan(plan), sort_keys=True, default=str)
+
+    def register(self, plan: Dict[str, Any], df: pd.DataFrame, version: Optional[str]) -> Dict[str, Any]:
+        """Materialize plan over df; returns {"success", "view", "result"} or an error dict"""
+        if (plan.get("date_filter") or {}).get("type") == "relative":
+            return {"success": False, "error": "Relative date windows move as rows arrive; "
+                                               "use a fixed range for a materialized view"}
+        spec = self.engine._partial_spec(plan, list(df.columns))
+        if not spec.get("success", True):
+            return spec
+        key = self.key(plan)
+        with self._lock:
+            view = self._views.get(key)
+            if view is None:
+                view = MaterializedView(dict(plan), spec, self.engine)
+                view.rebuild(df, version)
+                self._views[key] = view
+                print(f"🪟 Materialized view on {plan.get('dataset', 'loan')} over {len(df):,} rows")
+            elif view.version != version:
+                view.rebuild(df, version)
+        return {"success": True, "view": key, "result": view.result}
+
+    def unregister(self, plan: Dict[str, Any]) -> bool:
+        with self._lock:
+            return self._views.pop(self.key(plan), None) is not None
+
+    # ── Maintenance ────────────────────────────────────────────────
+
+    def on_append(self, dataset: str, rows: pd.DataFrame, previous_version: str, version: str):
+        """rows were appended to dataset, moving it from previous_version to version"""
+        with self._lock:
+            for view in self._for(dataset):
+                if view.version == previous_version:
+                    view.fold(rows, version)
+                    self.counters["appends"] += 1
+
+    def on_load(self, dataset: str, df: pd.DataFrame, version: str):
+        """df is dataset's complete frame at version; views that missed the change rebuild"""
+        with self._lock:
+            for view in self._for(dataset):
+                if view.version != version:
+                    view.rebuild(df, version)
+                    self.counters["rebuilds"] += 1
+
+    def _for(self, dataset: str) -> List[MaterializedView]:
+        return [v for v in self._views.values() if v.plan.get("dataset", "loan") == dataset]
+
+    # ── Lookup ─────────────────────────────────────────────────────
+
+    def lookup(self, plan: Dict[str, Any], version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The view's result for plan at version, or None when no current view holds it"""
+        with self._lock:
+            view = self._views.get(self.key(plan))
+            if view is None or view.result is None or view.version != version:
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits"] += 1
+            return dict(view.result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                "views": [{"dataset": v.plan.get("dataset", "loan"), "version": v.version,
+                           "rows_folded": v.rows_folded, "groups": len(v.partial.rows)}
+                          for v in self._views.values()],
+            }
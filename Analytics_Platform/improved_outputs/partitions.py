@@ -0,0 +1,138 @@
+"""
+Partitioned Datasets - Directories of CSV files split by month and/or branch
+A dataset directory holds hive-style partitions, nested in either order:
+    loan/month=2024-03/branch=Pune/part-0.csv
+    loan/branch=Pune/month=2024-03.csv
+Partition values come from the path alone, so a plan's date_filter and
+filters['branch'] can rule files out before any of them is opened. Pruning is
+conservative (a partition is kept whenever it might hold matching rows); the
+engine still applies the exact filters to whatever is read.
+"""
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+
+PARTITION_KEYS = ("month", "branch")
+
+
+def month_key(ts) -> int:
+    """Months since year 0, so consecutive months are consecutive integers"""
+    ts = pd.Timestamp(ts)
+    return ts.year * 12 + ts.month - 1
+
+
+class PartitionedDataset:
+    """File listing of one partitioned dataset directory"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def partitions(self) -> List[Dict[str, Any]]:
+        """Every CSV under root with its partition values (rescanned on each call)"""
+        parts = []
+        for path in sorted(self.root.rglob("*.csv")):
+            values: Dict[str, Any] = {}
+            segments = path.relative_to(self.root).parts
+            for seg in segments[:-1] + (path.stem,):
+                key, sep, val = seg.partition("=")
+                if sep and key in PARTITION_KEYS:
+                    values[key] = val
+            if "month" in values:
+                try:
+                    values["month"] = month_key(pd.Timestamp(values["month"] + "-01"))
+                except ValueError:
+                    values.pop("month")
+            parts.append({"path": path, **values})
+        return parts
+
+    def prune(self, date_filter: Optional[Dict[str, Any]] = None,
+              filters: Optional[Dict[str, Any]] = None) -> Tuple[List[Path], int]:
+        """Paths of the partitions a plan can touch, plus the total partition count"""
+        parts = self.partitions()
+        window = self.month_window(date_filter or {}, parts)
+
+        branches = (filters or {}).get("branch")
+        if branches is not None and not isinstance(branches, (list, tuple, set)):
+            branches = [branches]
+        branches = {str(b) for b in branches} if branches is not None else None
+
+        keep = []
+        for p in parts:
+            if window and "month" in p:
+                lo, hi = window
+                if (lo is not None and p["month"] < lo) or (hi is not None and p["month"] > hi):
+                    continue
+            if branches is not None and "branch" in p and p["branch"] not in branches:
+                continue
+            keep.append(p["path"])
+        return keep, len(parts)
+
+    def month_window(self, date_filter: Dict[str, Any],
+                     parts: List[Dict[str, Any]]) -> Optional[Tuple[Optional[int], Optional[int]]]:
+        """Inclusive (first, last) month keys a date filter can match, None when unbounded"""
+        t = date_filter.get("type")
+        if t == "range":
+            start, end = date_filter.get("start"), date_filter.get("end")
+            return (month_key(start) if start is not None else None,
+                    month_key(end) if end is not None else None)
+        if t == "quarter":
+            yr, months = date_filter.get("year"), date_filter.get("months", [])
+            if yr and months:
+                return yr * 12 + min(months) - 1, yr * 12 + max(months) - 1
+        if t == "month":
+            yr, mo = date_filter.get("year"), date_filter.get("month")
+            if yr and mo:
+                return yr * 12 + mo - 1, yr * 12 + mo - 1
+            if yr:
+                return yr * 12, yr * 12 + 11
+        if t == "year":
+            yr = date_filter.get("year")
+            if yr:
+                return yr * 12, yr * 12 + 11
+        if t == "relative":
+            months = [p["month"] for p in parts if "month" in p]
+            if not months:
+                return None
+            # The newest partition's first day is a lower bound on the data's
+            # last date, so the window start computed from it never excludes too much
+            latest = max(months)
+            anchor = pd.Timestamp(year=latest // 12, month=latest % 12 + 1, day=1)
+            start  = self._relative_start(date_filter, anchor)
+            return (month_key(start) if start is not None else None), None
+        return None
+
+    def _relative_start(self, date_filter: Dict[str, Any], end: pd.Timestamp) -> Optional[pd.Timestamp]:
+        # Mirrors AnalyticsEngine._relative_start
+        n     = date_filter.get("n", 1)
+        unit  = date_filter.get("unit", "month")
+        if unit == "month" or "months" in date_filter:
+            return end - pd.DateOffset(months=date_filter.get("months", n))
+        if unit == "day" or "days" in date_filter:
+            return end - pd.Timedelta(days=date_filter.get("days", n))
+        if unit == "week":
+            return end - pd.Timedelta(days=n * 7)
+        if unit == "year" or "years" in date_filter:
+            return end - pd.DateOffset(years=date_filter.get("years", n))
+        return None
+
+
+def write_partitions(df: pd.DataFrame, root: Path, by=PARTITION_KEYS, date_col: str = "date") -> int:
+    """Split df into root/month=YYYY-MM/branch=Name/part-0.csv files; returns the file count"""
+    root = Path(root)
+    keys = []
+    if "month" in by:
+        keys.append(pd.to_datetime(df[date_col]).dt.strftime("%Y-%m").rename("month"))
+    if "branch" in by:
+        keys.append(df["branch"].astype(str).rename("branch"))
+    written = 0
+    for values, part in df.groupby(keys, sort=True):
+        values = values if isinstance(values, tuple) else (values,)
+        target = root.joinpath(*(f"{k.name}={v}" for k, v in zip(keys, values)))
+        target.mkdir(parents=True, exist_ok=True)
+        out = part.copy()
+        if pd.api.types.is_datetime64_any_dtype(out[date_col]):
+            out[date_col] = out[date_col].dt.strftime("%Y-%m-%d")
+        out.to_csv(target / "part-0.csv", index=False)
+        written += 1
+    return written
@@ -77,7 +77,7 @@ COMPARISON_KEYWORDS = [
     "highest", "lowest", "best", "worst", "top", "bottom",
     "all branches", "each branch", "by branch", "across branches",
     "ranking", "rank", "growing faster", "outperform",
-    "find branches", "branches where", "faster than",
+    "find branches", "branches where", "branches with", "faster than",
 ]
 
 CROSS_GROWTH_PATTERNS = [
@@ -95,6 +95,24 @@ GROWTH_KEYWORDS = [
     "growing", "declining", "over time", "timeline", "progression",
 ]
 
+# Trend granularity phrases, finest first ("last 3 months" / "this quarter" are date filters, not these)
+GRANULARITY_PATTERNS: List[Tuple[str, str]] = [
+    ("day",     r"\bdaily\b|\bday[- ]?(wise|by[- ]day)\b|\b(by|per|each|every) day\b"),
+    ("week",    r"\bweekly\b|\bweek[- ]?(wise|on[- ]week)\b|\b(by|per|each|every) week\b"),
+    ("month",   r"\bmonthly\b|\bmonth[- ]?(wise|on[- ]month)\b|\b(by|per|each|every) month\b"),
+    ("quarter", r"\bquarterly\b|\bquarter[- ]?(wise|on[- ]quarter)\b|\b(by|per|each|every) quarter\b"),
+    ("year",    r"\b(yearly|annual|annually)\b|\byear[- ]?(wise|on[- ]year)\b|\b(by|per|each|every) year\b"),
+]
+
+# Window phrases: period-over-period shorthands, and "N-month rolling average" style windows
+WINDOW_PATTERNS: List[Tuple[str, str]] = [
+    ("mom", r"\bmom\b|\bmonth[- ]?(over|on)[- ]?month\b"),
+    ("qoq", r"\bqoq\b|\bquarter[- ]?(over|on)[- ]?quarter\b"),
+    ("yoy", r"\byoy\b|\byear[- ]?(over|on)[- ]?year\b"),
+]
+ROLLING_PATTERN = (r"\b(?:(\d+)[- ]?(day|week|month|quarter)s?[- ])?(?:rolling|moving)[- ]"
+                   r"(average|mean|avg|sum|total)\b")
+
 DEFAULT_METRICS = {
     "loan":     "gold_loan_amt",
     "payment":  "upi_volume",
@@ -190,6 +208,27 @@ class QueryDetector:
 
         return {}
 
+    def extract_granularity(self, query: str) -> Optional[str]:
+        """Calendar granularity a trend is asked at ("monthly", "by quarter", ...), None if unstated"""
+        q = query.lower()
+        return next((g for g, pattern in GRANULARITY_PATTERNS if re.search(pattern, q)), None)
+
+    def extract_window(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Window a query asks for ("MoM", "year over year", "3-month rolling
+        average", ...) as {"function", "periods"} plus the "granularity" a
+        rolling window names; None if unstated
+        """
+        q = query.lower()
+        m = re.search(ROLLING_PATTERN, q)
+        if m:
+            function = "rolling_sum" if m.group(3) in ("sum", "total") else "rolling_mean"
+            window: Dict[str, Any] = {"function": function, "periods": int(m.group(1)) if m.group(1) else 3}
+            if m.group(2):
+                window["granularity"] = m.group(2)
+            return window
+        return next(({"function": f, "periods": 1} for f, pattern in WINDOW_PATTERNS if re.search(pattern, q)), None)
+
     def build_comparison_plan(self, query: str) -> Dict[str, Any]:
         if self.is_cross_growth_query(query):
             return self.build_cross_growth_plan(query)
@@ -239,6 +278,20 @@ class QueryDetector:
         plan["limit"]           = limit
         plan["comparison_type"] = "branch_comparison"
         plan["metric"]          = metrics[0] if metrics else DEFAULT_METRICS.get(dataset, "gold_loan_amt")
+        self.add_window(plan, query)
+        return plan
+
+    def add_window(self, plan: Dict[str, Any], query: str) -> Dict[str, Any]:
+        """plan with the window the query asks for (if any), its granularity, and a per-period aggregation"""
+        window = self.extract_window(query)
+        if not window:
+            return plan
+        granularity = window.pop("granularity", None) or self.extract_granularity(query)
+        plan["window"] = window
+        if granularity:
+            plan["granularity"] = granularity
+        if plan.get("aggregation") in ("growth", "sum"):    # the window is the growth; rates average per period
+            plan["aggregation"] = self._aggregation("", plan.get("metric") or "")
         return plan
 
     def build_cross_growth_plan(self, query: str) -> Dict[str, Any]:
@@ -274,10 +327,24 @@ class QueryDetector:
     def _aggregation(self, q: str, metric: str) -> str:
         if any(w in q for w in GROWTH_KEYWORDS):       return "growth"
         if any(w in q for w in ["average","mean","avg"]): return "mean"
+        if self._distinct_metric(q, metric):            return "distinct"
         if "count" in q or "how many" in q:            return "count"
         if any(x in metric for x in ["percent","rate","score"]): return "mean"
         return "sum"
 
+    def _distinct_metric(self, q: str, metric: str) -> bool:
+        """
+        "distinct"/"unique" modifies the metric itself ("unique credit scores",
+        "distinct count of upi"), not some other noun ("how many unique branches
+        have NPA above 5%" stays a count)
+        """
+        names = [kw for kw, col, _ in METRIC_MAP if metric in (col, VALUE_UPGRADES.get(col))]
+        if not names:
+            return False
+        pattern = (r"\b(?:distinct|unique)\s+(?:(?:count|number|values?)\s+of\s+)?(?:the\s+)?(?:"
+                   + "|".join(re.escape(n) for n in names) + r")s?\b")
+        return re.search(pattern, q) is not None
+
     def _infer_dataset(self, q: str) -> str:
         scores = {
             "payment":  sum(1 for s in ["payment","transaction","digital","transfer"] if s in q),
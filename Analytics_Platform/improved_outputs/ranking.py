@@ -0,0 +1,30 @@
+"""
+Ranking - Top-K positions of a grouped result without sorting every group
+A ranked comparison only shows its first `limit` groups, so the K best values
+are found with a partial selection (np.partition, linear in the number of
+groups) and only those survivors, plus any group tied with the K-th value,
+are sorted. The order matches a stable sort_values(...).head(K): ties keep
+the grouped order (group key order), so the same plan always returns the
+same groups in the same order, and missing values rank last either way.
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional, Union
+
+
+def top_k(values: Union[pd.Series, np.ndarray], k: Optional[int] = None, ascending: bool = False) -> np.ndarray:
+    """Positions of the k first values in ranked order (all of them when k is None)"""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    k = n if k is None else max(min(int(k), n), 0)
+    key = values if ascending else -values      # NaN stays NaN: last either way
+
+    if k < n and k > 0:
+        kth = np.partition(key, k - 1)[k - 1]
+        if not np.isnan(kth):
+            # every value up to the k-th, ties with it included, so the tie-break sees all of them
+            survivors = np.flatnonzero(key <= kth)
+            order = survivors[np.argsort(key[survivors], kind="stable")]
+            return order[:k]
+    order = np.argsort(key, kind="stable")
+    return order[:k]
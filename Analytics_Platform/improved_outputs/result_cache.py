@@ -0,0 +1,157 @@
+"""
+Result Cache - In-memory cache of execute_plan results
+Entries are keyed on a canonical form of the plan (filters and date filters
+normalised, the aggregation resolved to what the engine actually runs) plus
+the dataset version, so a reloaded dataset can never serve an old result.
+Eviction is LRU under an entry count and byte cap, with a TTL on top;
+results are stored pickled, so every hit hands back a private copy.
+Hit/miss/eviction counters are exposed through stats().
+"""
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import pandas as pd
+
+from improved_outputs.calendar_buckets import BUCKETED
+
+# Plan fields that change what execute_plan returns
+PLAN_FIELDS = ("dataset", "comparison_type", "metric", "metrics", "metric_a", "metric_b",
+               "aggregation", "filters", "date_filter", "group_by", "comparison_column",
+               "sort_order", "limit", "approximate", "granularity", "window")
+AGGREGATIONS = {"sum", "mean", "count", "min", "max", "median", "distinct", "growth"}
+
+
+def canonical_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a plan execute_plan reads, with equivalent spellings collapsed"""
+    out = {k: plan[k] for k in PLAN_FIELDS if plan.get(k) not in (None, [], {})}
+
+    agg = out.get("aggregation", "sum")
+    agg = "mean" if agg == "avg" else agg
+    out["aggregation"] = agg if agg in AGGREGATIONS else "sum"    # _agg/_scalar fall back to sum
+    out["comparison_column"] = out.get("comparison_column", "branch")
+    out["sort_order"] = "ascending" if out.get("sort_order") == "ascending" else "descending"
+    if out.get("granularity") not in BUCKETED:
+        out.pop("granularity", None)      # "day" groups on the raw dates, like no granularity
+
+    if "filters" in out:
+        filters = {}
+        for col in sorted(out["filters"]):
+            val = out["filters"][col]
+            if isinstance(val, (list, tuple)):
+                val = sorted(dict.fromkeys(val), key=str)
+                val = val[0] if len(val) == 1 else val     # isin([x]) keeps the rows == x keeps
+            elif isinstance(val, dict):
+                val = {k: val[k] for k in sorted(val)}
+            filters[col] = val
+        out["filters"] = filters
+
+    if "date_filter" in out:
+        out["date_filter"] = _canonical_date_filter(out["date_filter"])
+    return out
+
+
+def _canonical_date_filter(date_filter: Dict[str, Any]) -> Dict[str, Any]:
+    t = date_filter.get("type")
+    if t == "quarter":
+        return {"type": t, "year": date_filter.get("year"),
+                "months": sorted(set(int(m) for m in date_filter.get("months", [])))}
+    if t == "month":
+        return {"type": t, "year": date_filter.get("year"), "month": date_filter.get("month")}
+    if t == "year":
+        return {"type": t, "year": date_filter.get("year")}
+    if t == "range":
+        return {"type": t, **{k: pd.Timestamp(date_filter[k]).isoformat()
+                               for k in ("start", "end") if date_filter.get(k) is not None}}
+    return {k: date_filter[k] for k in sorted(date_filter)}
+
+
+class ResultCache:
+    """LRU + TTL cache of plan results for versioned datasets"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: Optional[float] = 600.0,
+                 max_bytes: int = 32_000_000):
+        """ttl_seconds=None keeps entries until they are evicted or invalidated"""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidated": 0}
+
+    # ── Public API ─────────────────────────────────────────────────
+
+    def key(self, plan: Dict[str, Any], version: str) -> str:
+        return json.dumps([version, canonical_plan(plan)], sort_keys=True, default=str)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._drop(key)
+                self.counters["expired"] += 1
+                entry = None
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            blob = entry["blob"]
+        return pickle.loads(blob)
+
+    def put(self, key: str, dataset: Optional[str], version: str, result: Dict[str, Any]):
+        """Store a result; entries of the dataset's older versions are dropped on the way"""
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            self.invalidate(dataset, keep_version=version)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = {"blob": blob, "dataset": dataset, "version": version,
+                                  "stored": time.monotonic()}
+            self._bytes += len(blob)
+            self._enforce()
+
+    def invalidate(self, dataset: Optional[str] = None, keep_version: Optional[str] = None) -> int:
+        """Drop entries of dataset (all datasets if None) except those of keep_version"""
+        with self._lock:
+            stale = [k for k, e in self._entries.items()
+                     if (dataset is None or e["dataset"] == dataset) and e["version"] != keep_version]
+            for k in stale:
+                self._drop(k)
+            self.counters["invalidated"] += len(stale)
+            return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate":    self.counters["hits"] / lookups if lookups else 0.0,
+                "entries":     len(self._entries),
+                "bytes":       self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes":   self.max_bytes,
+            }
+
+    # ── Policy ─────────────────────────────────────────────────────
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - entry["stored"] > self.ttl_seconds
+
+    def _enforce(self):
+        for key in [k for k, e in self._entries.items() if self._expired(e)]:
+            self._drop(key)
+            self.counters["expired"] += 1
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry["blob"])
@@ -0,0 +1,196 @@
+"""
+Rollup Cube - Per (branch, month) pre-aggregates built once per dataset version
+Each cell holds, for every metric, the sum, non-null count, min, max and the
+first/last non-null values in date order, plus the cell's row count and date
+span. Plans that filter only on branch and on whole months (month, quarter,
+year, or a range/relative window whose edges fall between cells) are answered
+from the cells; anything finer falls back to scanning the raw rows.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+NO_MONTH = -1   # cell for rows without a parseable date
+STATS    = ["sum", "count", "min", "max", "first", "first_at", "last", "last_at"]
+
+# Aggregations the cells can reproduce exactly
+CUBE_AGGREGATIONS = {"sum", "mean", "avg", "count", "min", "max", "growth"}
+
+# Calendar granularities made of whole month cells → months per period
+PERIOD_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+
+
+def month_keys(dates: pd.Series) -> np.ndarray:
+    """year * 12 + month - 1 per row (NO_MONTH for missing dates)"""
+    dates = pd.to_datetime(dates, errors="coerce")
+    keys = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype="float64")
+    return np.where(np.isnan(keys), NO_MONTH, keys).astype(np.int32)
+
+
+class RollupCube:
+    """Pre-aggregated (group, month) cells for a dataset's numeric columns"""
+
+    def __init__(self, cells: pd.DataFrame, metrics: List[str], date_col: str,
+                 group_col: str = "branch", columns: Optional[List[str]] = None):
+        """
+        cells: one row per (group_col, month) with "rows", "min_at", "max_at"
+        and "<metric>.<stat>" columns for every stat in STATS
+        columns: columns of the dataset the cube summarises
+        """
+        self.cells     = cells
+        self.metrics   = list(metrics)
+        self.date_col  = date_col
+        self.group_col = group_col
+        self.columns   = list(columns or [])
+
+    # ── Building ───────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, metrics: List[str], date_col: str,
+              group_col: str = "branch") -> "RollupCube":
+        dates  = pd.to_datetime(df[date_col], errors="coerce")
+        months = month_keys(dates)
+        keys   = [df[group_col].rename(group_col), pd.Series(months, index=df.index, name="month")]
+        g      = df.groupby(keys, observed=True, dropna=False, sort=True)
+
+        cells = pd.DataFrame({"rows": g.size()})
+        dg = dates.groupby(keys, observed=True, dropna=False, sort=True)
+        cells["min_at"] = dg.min()
+        cells["max_at"] = dg.max()
+
+        # Stable date order so first/last tie-break on row position, like a sort + scan
+        order   = np.argsort(dates.to_numpy(), kind="stable")
+        o_dates = dates.iloc[order].reset_index(drop=True)
+        o_keys  = [k.iloc[order].reset_index(drop=True) for k in keys]
+        parts: Dict[str, pd.Series] = {}     # joined once: wide tables carry dozens of metrics
+        for m in metrics:
+            mg = df[m].groupby(keys, observed=True, dropna=False, sort=True)
+            parts[f"{m}.sum"]   = mg.sum()
+            parts[f"{m}.count"] = mg.count()
+            parts[f"{m}.min"]   = mg.min()
+            parts[f"{m}.max"]   = mg.max()
+
+            values = df[m].iloc[order].reset_index(drop=True)
+            valid  = values.notna()
+            ordered = pd.DataFrame({"v": values[valid], "at": o_dates[valid]})
+            og = ordered.groupby([k[valid] for k in o_keys], observed=True, dropna=False, sort=True)
+            first, last = og.first(), og.last()
+            parts[f"{m}.first"]    = first["v"]
+            parts[f"{m}.first_at"] = first["at"]
+            parts[f"{m}.last"]     = last["v"]
+            parts[f"{m}.last_at"]  = last["at"]
+
+        cells = pd.concat([cells, pd.DataFrame(parts, index=cells.index)], axis=1)
+        return cls(cells.reset_index(), metrics, date_col, group_col, list(df.columns))
+
+    # ── Selection ──────────────────────────────────────────────────
+
+    def select(self, filters: Dict[str, Any], date_filter: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """
+        Cells covering exactly the rows a plan's filters keep, or None when the
+        filters cut through a cell (or touch columns the cube does not key on).
+        """
+        cells = self.cells
+        for col, val in (filters or {}).items():
+            if col not in self.columns:
+                continue            # the raw path skips unknown filter columns too
+            if col != self.group_col or isinstance(val, dict):
+                return None
+            vals = list(val) if isinstance(val, (list, tuple)) else [val]
+            cells = cells[cells[self.group_col].isin(vals)]
+
+        if not date_filter:
+            return cells
+
+        cells = cells[cells["month"] != NO_MONTH]
+        t = date_filter.get("type")
+        if t == "quarter":
+            yr, months = date_filter.get("year"), date_filter.get("months", [])
+            if yr and months:
+                cells = cells[cells["month"].isin([yr * 12 + m - 1 for m in months])]
+        elif t == "month":
+            yr, mo = date_filter.get("year"), date_filter.get("month")
+            if yr and mo:
+                cells = cells[cells["month"] == yr * 12 + mo - 1]
+            elif yr:
+                cells = cells[cells["month"] // 12 == yr]
+        elif t == "year":
+            yr = date_filter.get("year")
+            if yr:
+                cells = cells[cells["month"] // 12 == yr]
+        elif t == "range":
+            cells = self._within(cells, date_filter.get("start"), date_filter.get("end"))
+        elif t == "relative":
+            return None     # resolved to a range by the engine before selection
+        return cells
+
+    def _within(self, cells: pd.DataFrame, start, end) -> Optional[pd.DataFrame]:
+        lo = pd.Timestamp(start) if start is not None else None
+        hi = pd.Timestamp(end) if end is not None else None
+        inside  = pd.Series(True, index=cells.index)
+        outside = pd.Series(False, index=cells.index)
+        if lo is not None:
+            inside  &= cells["min_at"] >= lo
+            outside |= cells["max_at"] < lo
+        if hi is not None:
+            inside  &= cells["max_at"] <= hi
+            outside |= cells["min_at"] > hi
+        if not (inside | outside).all():
+            return None     # a window edge falls inside a month
+        return cells[inside]
+
+    def latest(self, cells: pd.DataFrame) -> Optional[pd.Timestamp]:
+        dated = cells.loc[cells["month"] != NO_MONTH, "max_at"]
+        return dated.max() if len(dated) else None
+
+    # ── Aggregation over selected cells ────────────────────────────
+
+    def grouped(self, cells: pd.DataFrame, metric: str, agg: str,
+                granularity: Optional[str] = None) -> pd.Series:
+        """Per-group result, matching AnalyticsEngine._agg on the raw rows
+        (granularity: per month/quarter/year calendar bucket key instead of per group)"""
+        if granularity is None:
+            g = cells.groupby(self.group_col, observed=True)
+        else:
+            cells = cells[cells["month"] != NO_MONTH]
+            g = cells.groupby(cells["month"] // PERIOD_MONTHS[granularity])
+        if agg in ("mean", "avg"):
+            count = g[f"{metric}.count"].sum()
+            out = g[f"{metric}.sum"].sum() / count.where(count > 0)
+        elif agg == "count":
+            out = g[f"{metric}.count"].sum()
+        elif agg == "min":
+            out = g[f"{metric}.min"].min()
+        elif agg == "max":
+            out = g[f"{metric}.max"].max()
+        elif agg == "growth":
+            s = g[f"{metric}.sum"].sum()
+            out = s.pct_change().fillna(0) * 100 if len(s) > 1 else s
+        else:
+            out = g[f"{metric}.sum"].sum()
+        out.name = metric
+        return out
+
+    def scalar(self, cells: pd.DataFrame, metric: str, agg: str) -> float:
+        """Ungrouped result, matching AnalyticsEngine._scalar (growth is not supported)"""
+        if agg in ("mean", "avg"):
+            count = cells[f"{metric}.count"].sum()
+            return float(cells[f"{metric}.sum"].sum() / count) if count else float("nan")
+        if agg == "count":
+            return float(cells[f"{metric}.count"].sum())
+        if agg == "min":
+            return float(cells[f"{metric}.min"].min())
+        if agg == "max":
+            return float(cells[f"{metric}.max"].max())
+        return float(cells[f"{metric}.sum"].sum())
+
+    def endpoints(self, cells: pd.DataFrame, metric: str) -> pd.DataFrame:
+        """Per group: first and last non-null value in date order and the non-null count"""
+        cells = cells.dropna(subset=[self.group_col])
+        first = cells.sort_values(f"{metric}.first_at", kind="stable", na_position="last")
+        last  = cells.sort_values(f"{metric}.last_at", kind="stable", na_position="first")
+        return pd.DataFrame({
+            "first": first.groupby(self.group_col, observed=True)[f"{metric}.first"].first(),
+            "last":  last.groupby(self.group_col, observed=True)[f"{metric}.last"].last(),
+            "count": cells.groupby(self.group_col, observed=True)[f"{metric}.count"].sum(),
+        })
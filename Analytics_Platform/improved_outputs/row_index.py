@@ -0,0 +1,132 @@
+"""
+Row Index - Sorted date index and label → row-position postings per dataset version
+Rows are ordered by date once (stable, missing dates last), overall and within
+every label value (branch, ...). A date window then resolves to contiguous
+slices of that order through binary search, and a branch filter to that
+branch's own slices, so a filtered selection costs time proportional to the
+rows it returns rather than to the table. Only the filters the index covers are
+resolved here; the engine applies any others to the selected rows.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+ALL = object()   # postings key for "every row"
+
+
+class RowIndex:
+    """Date-sorted row positions, overall and per label value"""
+
+    def __init__(self, date_col: str, postings: Dict[str, Dict[Any, Tuple[np.ndarray, np.ndarray]]],
+                 rows: int):
+        """
+        postings[col][value] = (positions, dates): positions of the rows with
+        that value ordered by date (missing dates last) and the sorted non-missing
+        dates, so dates[i] is the date of positions[i]; postings[date_col][ALL]
+        covers every row
+        """
+        self.date_col = date_col
+        self.postings = postings
+        self.rows     = rows
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, date_col: str, label_cols: List[str]) -> Optional["RowIndex"]:
+        if date_col not in df.columns or not pd.api.types.is_datetime64_any_dtype(df[date_col].dtype):
+            return None
+        dates = df[date_col].to_numpy()
+        order = np.argsort(dates, kind="stable")        # NaT sorts last
+        valid = int((~np.isnat(dates)).sum())
+        postings: Dict[str, Dict[Any, Tuple[np.ndarray, np.ndarray]]] = {
+            date_col: {ALL: (order, dates[order[:valid]])},
+        }
+        for col in label_cols:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col].to_numpy()[order], sort=False)
+            by_code = np.argsort(codes, kind="stable")  # keeps date order inside each value
+            bounds  = np.searchsorted(codes[by_code], np.arange(len(uniques) + 1))
+            entries = {}
+            for i, value in enumerate(uniques):
+                pos = order[by_code[bounds[i]:bounds[i + 1]]]
+                d   = dates[pos]
+                entries[value] = (pos, d[~np.isnat(d)])
+            postings[col] = entries
+        return cls(date_col, postings, len(df))
+
+    # ── Lookup ─────────────────────────────────────────────────────
+
+    def lookup(self, filters: Dict[str, Any],
+               date_filter: Dict[str, Any]) -> Optional[Tuple[np.ndarray, Dict[str, Any], Dict[str, Any]]]:
+        """
+        (row positions in table order, filters left over, date filter left over),
+        or None when the index covers none of the plan's filters.
+        """
+        filters = dict(filters or {})
+        label   = self._label(filters)
+        windows = self._windows(date_filter or {})
+        if label is None and windows is None:
+            return None
+
+        if label is not None:
+            val  = filters.pop(label)
+            vals = list(val) if isinstance(val, (list, tuple)) else [val]
+            entries = [self.postings[label][v] for v in dict.fromkeys(vals) if v in self.postings[label]]
+        else:
+            entries = [self.postings[self.date_col][ALL]]
+
+        parts = []
+        for positions, dates in entries:
+            if windows is None:
+                parts.append(positions)
+                continue
+            for lo, hi, closed in windows:
+                start = np.searchsorted(dates, lo, "left") if lo is not None else 0
+                stop  = np.searchsorted(dates, hi, "right" if closed else "left") if hi is not None else len(dates)
+                parts.append(positions[start:stop])
+        selected = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+        return selected, filters, ({} if windows is not None else (date_filter or {}))
+
+    def covered(self, filters: Dict[str, Any], date_filter: Dict[str, Any]) -> List[Optional[str]]:
+        """Filter columns lookup() would resolve, with None standing for the date filter"""
+        label = self._label(filters or {})
+        return ([label] if label is not None else []) + \
+               ([None] if self._windows(date_filter or {}) is not None else [])
+
+    def _label(self, filters: Dict[str, Any]) -> Optional[str]:
+        """First filter on an indexed label column (the one lookup() resolves)"""
+        return next((c for c, v in filters.items()
+                     if c in self.postings and c != self.date_col and not isinstance(v, dict)), None)
+
+    def _windows(self, date_filter: Dict[str, Any]) -> Optional[List[Tuple[Any, Any, bool]]]:
+        """date_filter as (lo, hi, hi_inclusive) datetime64 windows, None if not indexable"""
+        t = date_filter.get("type")
+        if t == "range":
+            start, end = date_filter.get("start"), date_filter.get("end")
+            return [(pd.Timestamp(start).to_datetime64() if start is not None else None,
+                     pd.Timestamp(end).to_datetime64() if end is not None else None, True)]
+        if t == "quarter":
+            yr, months = date_filter.get("year"), date_filter.get("months", [])
+            return self._month_windows(yr, months) if yr and months else None
+        if t == "month":
+            yr, mo = date_filter.get("year"), date_filter.get("month")
+            if yr and mo:
+                return self._month_windows(yr, [mo])
+            return self._month_windows(yr, range(1, 13)) if yr else None
+        if t == "year":
+            yr = date_filter.get("year")
+            return self._month_windows(yr, range(1, 13)) if yr else None
+        return None     # relative windows depend on the filtered rows; stats resolve them first
+
+    def _month_windows(self, year: int, months) -> List[Tuple[Any, Any, bool]]:
+        out = []
+        for m in sorted(set(int(m) for m in months)):
+            lo = pd.Timestamp(year=int(year), month=m, day=1)
+            hi = lo + pd.DateOffset(months=1)
+            if out and out[-1][1] == lo.to_datetime64():
+                out[-1] = (out[-1][0], hi.to_datetime64(), False)     # contiguous months merge
+            else:
+                out.append((lo.to_datetime64(), hi.to_datetime64(), False))
+        return out
+
+    def nbytes(self) -> int:
+        return sum(p.nbytes + d.nbytes for entries in self.postings.values() for p, d in entries.values())
@@ -0,0 +1,153 @@
+"""
+Sharded Execution - Branch-sharded, multi-process plan execution
+The dataset is split by branch into one shard per worker (branches are dealt
+largest-first to the least-loaded shard, so shards hold similar row counts)
+and each shard lives in its own worker process for the executor's lifetime.
+A plan is mapped to every shard, which filters its rows and folds them into a
+PartialAggregate; the parent merges the partials and finalises them exactly
+as the streaming path does. Only the small per-group partial state crosses
+process boundaries, never the rows. Results match the serial path (sums to
+floating-point rounding); plans that need every value (median, distinct) or
+first/last ordering across shards run serially instead.
+"""
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from improved_outputs.analytics_engine import AnalyticsEngine
+from improved_outputs.streaming import PartialAggregate
+from improved_outputs.calendar_buckets import parse_bucket_column
+
+ROW = "__row__"     # each shard row's position in the full frame, orders first/last across shards
+
+# Worker process state: the shard this process holds
+_shard: Optional[pd.DataFrame] = None
+_engine: Optional[AnalyticsEngine] = None
+
+
+def _load_shard(frame: pd.DataFrame):
+    global _shard, _engine
+    _shard, _engine = frame, AnalyticsEngine()
+
+
+def _shard_rows() -> int:
+    return len(_shard)
+
+
+def _shard_latest(filters: Dict[str, Any], date_col: str) -> Optional[pd.Timestamp]:
+    """Latest date among the shard rows filters keep (for relative date windows)"""
+    mask  = _engine._row_mask(_shard, filters, {})
+    dates = _shard[date_col] if mask is None else _shard[date_col][mask]
+    latest = pd.to_datetime(dates, errors="coerce").max()
+    return None if pd.isna(latest) else latest
+
+
+def _shard_partial(spec: Dict[str, Any], date_filter: Dict[str, Any]) -> PartialAggregate:
+    """Map step: the shard's rows kept by the plan, folded into partial state"""
+    order_col = spec["order_col"] or ROW
+    mask = _engine._row_mask(_shard, spec["filters"], date_filter)
+    bucket = parse_bucket_column(spec["group_col"])
+    if bucket and spec["group_col"] not in _shard.columns:
+        group = [bucket[0]]     # PartialAggregate keys the rows from their dates
+    else:
+        group = [spec["group_col"]]
+    columns = [c for c in dict.fromkeys(spec["metrics"] + group + [order_col]) if c]
+    rows = _shard[columns] if mask is None else _shard[columns][mask]
+    partial = PartialAggregate(spec["metrics"], spec["group_col"], order_col, spec["needs"])
+    partial.update(rows)
+    return partial
+
+
+class ShardedExecutor:
+    """Runs plans over branch shards held by worker processes"""
+
+    def __init__(self, df: pd.DataFrame, workers: int = 4, shard_col: str = "branch",
+                 engine: Optional[AnalyticsEngine] = None):
+        """
+        df: the complete dataset; workers: number of shards (one process each);
+        shard_col: column whose values are kept together in one shard
+        engine: used for planning and finalising, and for plans run serially
+        """
+        self.df        = df
+        self.shard_col = shard_col if shard_col in df.columns else None
+        self.engine    = engine or AnalyticsEngine()
+        self.columns   = list(df.columns)
+        self.counters  = {"sharded": 0, "serial": 0}
+
+        shards = self._assign(df, workers)
+        self.pools = []
+        for positions in shards:
+            frame = df.take(positions)
+            frame[ROW] = positions
+            self.pools.append(ProcessPoolExecutor(max_workers=1, initializer=_load_shard, initargs=(frame,)))
+        self.shard_rows = [f.result() for f in [pool.submit(_shard_rows) for pool in self.pools]]
+        print(f"🧩 {len(self.pools)} shards by {self.shard_col or 'row'}: "
+              f"{', '.join(f'{n:,}' for n in self.shard_rows)} rows")
+
+    def _assign(self, df: pd.DataFrame, workers: int) -> List[np.ndarray]:
+        """Row positions of each shard; every shard_col value (and missing values) stays in one shard"""
+        workers = max(1, workers)
+        if self.shard_col is None:
+            return [p for p in np.array_split(np.arange(len(df)), workers) if len(p)]
+        codes, uniques = pd.factorize(df[self.shard_col], sort=True)
+        sizes = np.bincount(codes + 1, minlength=len(uniques) + 1)     # slot 0: missing values
+        load  = np.zeros(workers, dtype=np.int64)
+        shard_of = np.empty(len(sizes), dtype=np.intp)
+        for value in np.argsort(-sizes, kind="stable"):
+            shard_of[value] = int(np.argmin(load))
+            load[shard_of[value]] += sizes[value]
+        row_shard = shard_of[codes + 1]
+        return [p for p in (np.flatnonzero(row_shard == s) for s in range(workers)) if len(p)]
+
+    # ── Execution ──────────────────────────────────────────────────
+
+    def supports(self, plan: Dict[str, Any]) -> bool:
+        """True when plan folds from per-shard partial state"""
+        spec = self.engine._partial_spec(plan, self.columns)
+        if not spec.get("success", True):
+            return False
+        # Ties in the order column are broken by row position inside a shard, not across shards
+        return not (spec["order_col"] and spec["group_col"] != self.shard_col)
+
+    def execute_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """The result AnalyticsEngine.execute_plan(df, plan) would return"""
+        if not self.supports(plan):
+            self.counters["serial"] += 1
+            return self.engine.execute_plan(self.df, plan)
+        spec = self.engine._partial_spec(plan, self.columns)
+        date_filter = self._resolve_relative(plan.get("date_filter") or {}, spec["filters"])
+
+        futures  = [pool.submit(_shard_partial, spec, date_filter) for pool in self.pools]
+        partials = [f.result() for f in futures]
+        merged = partials[0]
+        for partial in partials[1:]:
+            merged.merge(partial)
+        self.counters["sharded"] += 1
+        return self.engine._partial_result(merged, plan, spec)
+
+    def _resolve_relative(self, date_filter: Dict[str, Any], filters: Dict[str, Any]) -> Dict[str, Any]:
+        """A relative window as a fixed range ending at the latest date across all shards"""
+        date_col = self.engine._date_column(self.columns)
+        if date_filter.get("type") != "relative" or not date_col:
+            return date_filter
+        latest = [f.result() for f in [pool.submit(_shard_latest, filters, date_col) for pool in self.pools]]
+        latest = [d for d in latest if d is not None]
+        end   = max(latest) if latest else None
+        start = self.engine._relative_start(date_filter, end) if end is not None else None
+        if start is None:
+            return date_filter      # nothing to anchor the window on: shards keep rows with a date, as serially
+        print(f"📅 Date filter: {start.date()} → {end.date()}")
+        return {"type": "range", "start": start, "end": end}
+
+    def close(self):
+        """Stop the workers once the plans already submitted to them finish"""
+        for pool in self.pools:
+            pool.shutdown()
+        self.pools = []
+
+    def __enter__(self) -> "ShardedExecutor":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
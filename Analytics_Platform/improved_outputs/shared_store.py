@@ -0,0 +1,222 @@
+"""
+Shared Dataset Store - Publish DataFrames once, attach from any process
+A single loader process publishes each dataset's columns into
+multiprocessing.shared_memory blocks (numeric and datetime columns as-is,
+categoricals and strings as integer codes plus a category list). Any number of
+consumer processes attach read-only, zero-copy views, so memory stays flat no
+matter how many CLI processes or Streamlit workers run AnalyticsEngine.
+
+Layout per dataset (names kept short for macOS' 31-char shm limit):
+    <prefix><name>h        head block: current version + manifest size
+    <prefix><name><v>m     JSON manifest for version v
+    <prefix><name><v>c<i>  column i of version v
+Republishing writes a new version and then flips the head, so consumers that
+attached earlier keep reading their own snapshot.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Tuple
+
+
+HEAD_FORMAT = "<qq"   # version, manifest length
+HEAD_SIZE   = struct.calcsize(HEAD_FORMAT)
+
+
+def _open_shm(name: str, create: bool = False, size: int = 0) -> shared_memory.SharedMemory:
+    """
+    Open a block without handing its lifetime to this process' resource
+    tracker, which would otherwise unlink the publisher's blocks when a
+    consumer (or a short-lived publisher) exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _map_block(name: str) -> mmap.mmap:
+    """
+    Map a block and hand back the bare mmap. Arrays built on it with
+    np.frombuffer hold a buffer export, so the mapping stays valid exactly as
+    long as some view of it is alive (SharedMemory.close() would unmap it
+    underneath them).
+    """
+    shm = _open_shm(name)
+    mapped = shm._mmap
+    shm._buf.release()
+    shm._buf, shm._mmap = None, None
+    shm.close()   # only the file descriptor is left to close
+    return mapped
+
+
+def _unlink_shm(shm: shared_memory.SharedMemory):
+    """Unlink an untracked block (SharedMemory.unlink would also untrack it again)"""
+    shm.close()
+    if sys.version_info >= (3, 13) or os.name != "posix":
+        shm.unlink()
+        return
+    import _posixshmem
+    try:
+        _posixshmem.shm_unlink(shm._name)
+    except FileNotFoundError:
+        pass
+
+
+class SharedDatasetStore:
+    """Publishes datasets to shared memory and attaches to them read-only"""
+
+    def __init__(self, prefix: str = "mcp"):
+        self.prefix = prefix
+        self._published: Dict[str, List[shared_memory.SharedMemory]] = {}
+        self.attached_versions: Dict[str, int] = {}   # name → version of the last attach
+
+    # ── Publisher side ─────────────────────────────────────────────
+
+    def publish(self, name: str, df: pd.DataFrame) -> int:
+        """Publish df as the newest version of `name`; returns the version number"""
+        head = self._head(name, create=True)
+        version = self._read_head(head)[0] + 1
+        blocks: List[shared_memory.SharedMemory] = []
+
+        try:
+            columns = []
+            for i, col in enumerate(df.columns):
+                spec, arr = self._encode(df[col])
+                shm = _open_shm(self._column_name(name, version, i), create=True, size=max(arr.nbytes, 1))
+                np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+                blocks.append(shm)
+                spec.update({"name": str(col), "dtype": arr.dtype.str, "shm": shm.name})
+                columns.append(spec)
+
+            manifest = json.dumps({"version": version, "rows": len(df), "columns": columns}).encode()
+            mshm = _open_shm(self._manifest_name(name, version), create=True, size=len(manifest))
+            mshm.buf[:len(manifest)] = manifest
+            blocks.append(mshm)
+        except Exception:
+            for shm in blocks:
+                _unlink_shm(shm)
+            raise
+
+        # Flip the head last so readers never see a half-written version
+        struct.pack_into(HEAD_FORMAT, head.buf, 0, version, len(manifest))
+        head.close()
+
+        for shm in self._published.pop(name, []):
+            _unlink_shm(shm)
+        self._published[name] = blocks
+        print(f"📡 Published {name} v{version}: {len(df):,} rows in {len(columns)} shared blocks")
+        return version
+
+    def unpublish(self, name: str):
+        for shm in self._published.pop(name, []):
+            _unlink_shm(shm)
+        try:
+            _unlink_shm(_open_shm(self._head_name(name)))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """Unlink everything this process published"""
+        for name in list(self._published):
+            self.unpublish(name)
+
+    # ── Consumer side ──────────────────────────────────────────────
+
+    def attach(self, name: str) -> Optional[pd.DataFrame]:
+        """
+        Zero-copy, read-only view of the latest published version (None if
+        absent). The view stays valid after the publisher moves on to a newer
+        version or exits; its memory is released when the frame is dropped.
+        """
+        try:
+            head = _open_shm(self._head_name(name))
+        except FileNotFoundError:
+            return None
+        version, length = self._read_head(head)
+        head.close()
+        if version == 0:
+            return None
+
+        try:
+            manifest_map = _map_block(self._manifest_name(name, version))
+            manifest = json.loads(bytes(manifest_map[:length]).decode())
+            manifest_map.close()
+
+            data = {}
+            rows = manifest["rows"]
+            for spec in manifest["columns"]:
+                arr = np.frombuffer(_map_block(spec["shm"]), dtype=np.dtype(spec["dtype"]), count=rows)
+                arr.setflags(write=False)
+                data[spec["name"]] = self._decode(spec, arr)
+        except FileNotFoundError:
+            # Republished (and old version unlinked) while we were attaching
+            return None
+        self.attached_versions[name] = version
+        return pd.DataFrame(data, copy=False)
+
+    def version(self, name: str) -> int:
+        try:
+            head = _open_shm(self._head_name(name))
+        except FileNotFoundError:
+            return 0
+        version = self._read_head(head)[0]
+        head.close()
+        return version
+
+    # ── Encoding ───────────────────────────────────────────────────
+
+    def _encode(self, series: pd.Series) -> Tuple[Dict[str, Any], np.ndarray]:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return ({"kind": "category", "categories": series.cat.categories.tolist(),
+                     "ordered": bool(series.cat.ordered)},
+                    np.ascontiguousarray(series.array.codes))
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return {"kind": "datetime"}, series.to_numpy(dtype="datetime64[ns]")
+        if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+            arr = series.to_numpy()
+            if arr.dtype == object:
+                arr = series.to_numpy(dtype="float64", na_value=np.nan)
+            return {"kind": "numeric"}, np.ascontiguousarray(arr)
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        return ({"kind": "category", "categories": [str(u) for u in uniques], "ordered": False},
+                codes.astype(np.int32))
+
+    def _decode(self, spec: Dict[str, Any], arr: np.ndarray):
+        if spec["kind"] == "category":
+            return pd.Categorical.from_codes(arr, categories=spec["categories"], ordered=spec["ordered"])
+        return arr
+
+    # ── Naming ─────────────────────────────────────────────────────
+
+    def _head(self, name: str, create: bool) -> shared_memory.SharedMemory:
+        try:
+            return _open_shm(self._head_name(name))
+        except FileNotFoundError:
+            if not create:
+                raise
+            head = _open_shm(self._head_name(name), create=True, size=HEAD_SIZE)
+            struct.pack_into(HEAD_FORMAT, head.buf, 0, 0, 0)
+            return head
+
+    def _read_head(self, head: shared_memory.SharedMemory) -> Tuple[int, int]:
+        return struct.unpack_from(HEAD_FORMAT, head.buf, 0)
+
+    def _head_name(self, name: str) -> str:
+        return f"{self.prefix}{name}h"
+
+    def _manifest_name(self, name: str, version: int) -> str:
+        return f"{self.prefix}{name}{version}m"
+
+    def _column_name(self, name: str, version: int, i: int) -> str:
+        return f"{self.prefix}{name}{version}c{i}"
@@ -0,0 +1,151 @@
+"""
+Sketches - Mergeable quantile and distinct-count summaries
+QuantileSketch is a KLL sketch (Karnin, Lang, Liberty): a stack of compactors
+where level h keeps items of weight 2^h, each compaction sorts a level and
+promotes every other item, so roughly 3k items summarise any number of values
+with a rank error that depends only on k. HyperLogLog keeps, in each of 2^p
+registers, the longest run of leading zero bits seen among hashed values.
+Both merge exactly (level-wise concatenation, register-wise max), so sketches
+built per (branch, month) cell combine into any set of cells.
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+
+Z_95 = 1.96     # two-sided 95% normal quantile
+
+
+class QuantileSketch:
+    """KLL quantile sketch over float values"""
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values) -> "QuantileSketch":
+        v = np.asarray(values, dtype=np.float64)
+        v = v[~np.isnan(v)]
+        if len(v):
+            self.n += len(v)
+            self.levels[0] = np.concatenate([self.levels[0], v])
+            self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold other into this sketch (same k)"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    @classmethod
+    def union(cls, sketches, k: int = 200, seed: Optional[int] = None) -> "QuantileSketch":
+        """One sketch of everything the given sketches summarise (compacted once, not per merge)"""
+        out = cls(k, seed)
+        height = max((len(s.levels) for s in sketches), default=1)
+        out.levels = [np.concatenate([np.empty(0)] + [s.levels[h] for s in sketches if h < len(s.levels)])
+                      for h in range(height)]
+        out.n = sum(s.n for s in sketches)
+        out._compress()
+        return out
+
+    def _capacity(self, h: int) -> int:
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - h - 1))))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self._capacity(h):
+                items = np.sort(items)
+                keep, pair = items[:len(items) % 2], items[len(items) % 2:]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], pair[self._rng.integers(2)::2]])
+                self.levels[h] = keep
+            h += 1
+
+    # ── Queries ────────────────────────────────────────────────────
+
+    @property
+    def exact(self) -> bool:
+        """True while nothing has been compacted (every value is still held)"""
+        return len(self.levels) == 1
+
+    def rank_error(self) -> float:
+        """Normalised rank error bound (99% confidence, the DataSketches KLL approximation)"""
+        return 0.0 if self.exact else 2.296 / self.k ** 0.9723
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        items   = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2 ** h, dtype=np.int64) for h, lv in enumerate(self.levels)])
+        order   = np.argsort(items, kind="stable")
+        cum     = np.cumsum(weights[order])
+        i = min(int(np.searchsorted(cum, q * cum[-1], "left")), len(items) - 1)
+        return float(items[order][i])
+
+    def quantile_bounds(self, q: float) -> Tuple[float, float, float]:
+        """(estimate, lower, upper) for the q-quantile"""
+        eps = self.rank_error()
+        return self.quantile(q), self.quantile(max(0.0, q - eps)), self.quantile(min(1.0, q + eps))
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-value counter with 2^p registers"""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    @staticmethod
+    def hashes(values: pd.Series) -> np.ndarray:
+        """64-bit hashes of the non-missing values (equal values hash equally across dtypes)"""
+        values = values.dropna()
+        return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+    def update_hashes(self, h: np.ndarray) -> "HyperLogLog":
+        if len(h) == 0:
+            return self
+        p = np.uint64(self.p)
+        idx  = (h >> (np.uint64(64) - p)).astype(np.intp)
+        rest = h << p
+        hi, lo = (rest >> np.uint64(32)).astype(np.float64), (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bits = np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])     # bit length of rest
+        rank = np.minimum(64 - bits + 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        return self.update_hashes(self.hashes(values))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def relative_error(self) -> float:
+        """Standard error of the estimate relative to the true count"""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return float(m * np.log(m / zeros))     # linear counting for small cardinalities
+        return float(raw)
+
+    def estimate_bounds(self) -> Tuple[float, float, float]:
+        """(estimate, lower, upper) at 95% confidence"""
+        est = self.estimate()
+        margin = Z_95 * self.relative_error() * est
+        return est, max(est - margin, 0.0), est + margin
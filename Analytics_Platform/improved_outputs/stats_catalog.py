@@ -0,0 +1,160 @@
+"""
+Stats Catalog - Per-column statistics computed once per dataset version
+Holds row count, null counts, distinct counts and min/max for every column,
+sums for numeric columns, the value set and per-value row counts of
+low-cardinality labels and the date span (overall and per label). It is stored in the cached dataset's
+meta.json, so it is rebuilt only when the data changes. The engine uses it to
+answer trivial plans, reject filters that cannot match and resolve relative
+date windows without scanning.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+MAX_LISTED_VALUES = 1000   # label columns with more distinct values are not enumerated
+
+
+class StatsCatalog:
+    """Column statistics for one version of a dataset"""
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+        self.rows: int = payload["rows"]
+        self.columns: Dict[str, Dict[str, Any]] = payload["columns"]
+        self.date_col: Optional[str] = payload.get("date_col")
+        self.version: Optional[str] = payload.get("version")
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, date_col: Optional[str] = None,
+              version: Optional[str] = None) -> "StatsCatalog":
+        columns: Dict[str, Dict[str, Any]] = {}
+        dates = pd.to_datetime(df[date_col], errors="coerce") if date_col in df.columns else None
+
+        for name in df.columns:
+            s = df[name]
+            entry: Dict[str, Any] = {"nulls": int(s.isna().sum())}
+            if pd.api.types.is_datetime64_any_dtype(s.dtype):
+                lo, hi = s.min(), s.max()
+                entry.update({
+                    "kind":      "datetime",
+                    "distinct":  int(s.nunique()),
+                    "min":       lo.isoformat() if pd.notna(lo) else None,
+                    "max":       hi.isoformat() if pd.notna(hi) else None,
+                    "span_days": int((hi - lo).days) if pd.notna(lo) else 0,
+                })
+            elif pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+                entry.update({
+                    "kind":     "numeric",
+                    "distinct": int(s.nunique()),
+                    "min":      _plain(s.min()),
+                    "max":      _plain(s.max()),
+                    "sum":      _plain(s.sum()),
+                })
+            else:
+                counts = s.value_counts(sort=False)
+                counts = counts[counts > 0]
+                entry.update({"kind": "label", "distinct": int(len(counts))})
+                if len(counts) <= MAX_LISTED_VALUES:
+                    entry["values"] = sorted(str(v) for v in counts.index)
+                    entry["counts"] = {str(k): int(v) for k, v in counts.items()}
+                    if dates is not None:
+                        latest = dates.groupby(s, observed=True).max()
+                        entry["latest"] = {str(k): v.isoformat() for k, v in latest.items() if pd.notna(v)}
+            columns[str(name)] = entry
+
+        return cls({"rows": len(df), "columns": columns, "date_col": date_col, "version": version})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.payload
+
+    # ── Questions the engine asks ──────────────────────────────────
+
+    def impossible(self, filters: Dict[str, Any], date_filter: Dict[str, Any]) -> Optional[str]:
+        """Reason no row can pass the filters, or None if some might"""
+        for col, val in (filters or {}).items():
+            entry = self.columns.get(col)
+            if entry is None:
+                continue
+            if isinstance(val, dict):
+                if entry["kind"] != "numeric" or entry["min"] is None:
+                    continue
+                if "min" in val and val["min"] > entry["max"]:
+                    return f"{col} never reaches {val['min']} (max {entry['max']})"
+                if "max" in val and val["max"] < entry["min"]:
+                    return f"{col} never drops to {val['max']} (min {entry['min']})"
+            elif "values" in entry:
+                wanted = [str(v) for v in (val if isinstance(val, (list, tuple)) else [val])]
+                if not set(wanted) & set(entry["values"]):
+                    return f"no {col} named {', '.join(wanted)} (known: {', '.join(entry['values'][:10])})"
+
+        span = self.date_span()
+        if date_filter and span:
+            lo, hi = span
+            years = self._filter_years(date_filter)
+            if years and all(y < lo.year or y > hi.year for y in years):
+                return f"data covers {lo.date()} → {hi.date()}"
+            if date_filter.get("type") == "month" and date_filter.get("year") and date_filter.get("month"):
+                first = pd.Timestamp(year=date_filter["year"], month=date_filter["month"], day=1)
+                if first > hi or first + pd.offsets.MonthEnd(0) < lo.normalize():
+                    return f"data covers {lo.date()} → {hi.date()}"
+        return None
+
+    def latest_date(self, filters: Dict[str, Any]) -> Optional[pd.Timestamp]:
+        """
+        Last date among rows the filters keep, when the catalog can tell
+        (no filters, or only filters on enumerated labels); None otherwise.
+        """
+        span = self.date_span()
+        if span is None:
+            return None
+        if not filters:
+            return span[1]
+        if len(filters) != 1:
+            return None
+        col, val = next(iter(filters.items()))
+        entry = self.columns.get(col, {})
+        if isinstance(val, dict) or "latest" not in entry:
+            return None
+        wanted = [str(v) for v in (val if isinstance(val, (list, tuple)) else [val])]
+        found = [pd.Timestamp(entry["latest"][v]) for v in wanted if v in entry["latest"]]
+        return max(found) if found else None
+
+    def scalar(self, metric: str, agg: str) -> Optional[float]:
+        """Unfiltered scalar aggregate straight from the catalog (None if not stored)"""
+        entry = self.columns.get(metric)
+        if not entry or entry["kind"] != "numeric":
+            return None
+        count = self.rows - entry["nulls"]
+        if agg == "count":
+            return float(count)
+        if agg == "min":
+            return float(entry["min"]) if entry["min"] is not None else float("nan")
+        if agg == "max":
+            return float(entry["max"]) if entry["max"] is not None else float("nan")
+        if agg == "sum":
+            return float(entry["sum"])
+        if agg in ("mean", "avg"):
+            return float(entry["sum"]) / count if count else float("nan")
+        return None
+
+    def date_span(self) -> Optional[tuple]:
+        entry = self.columns.get(self.date_col or "", {})
+        if entry.get("kind") != "datetime" or entry.get("min") is None:
+            return None
+        return pd.Timestamp(entry["min"]), pd.Timestamp(entry["max"])
+
+    def distinct(self, col: str) -> Optional[int]:
+        entry = self.columns.get(col)
+        return entry["distinct"] if entry else None
+
+    def _filter_years(self, date_filter: Dict[str, Any]) -> List[int]:
+        if date_filter.get("type") in ("month", "quarter", "year") and date_filter.get("year"):
+            return [int(date_filter["year"])]
+        return []
+
+
+def _plain(value):
+    """numpy scalar → JSON-safe Python number (NaN → None)"""
+    if value is None or pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
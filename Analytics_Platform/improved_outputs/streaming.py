@@ -0,0 +1,241 @@
+"""
+Streaming Aggregation - Mergeable partial aggregates over DataFrame chunks
+Each chunk is folded into per-group partial state (sum, count, min, max and
+first/last non-null values with their ordering key), so a plan can run over a
+file that never fits in memory. Partials from different chunks (or shards)
+merge exactly; finalize() turns them back into the Series the in-memory
+AnalyticsEngine handlers would have computed.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Iterable
+
+from improved_outputs.group_kernels import EXACT_INT_SUM
+from improved_outputs.calendar_buckets import is_bucket_column, dated_rows
+
+
+ALL_ROWS = "__all__"
+STATE_COLUMNS = ["sum", "count", "min", "max", "first", "first_at", "last", "last_at"]
+
+# Aggregations that fold exactly from partial state (median needs every value)
+SUPPORTED_AGGREGATIONS = {"sum", "mean", "avg", "count", "min", "max", "growth"}
+
+# State each aggregation reads back (growth: sums for grouped trends, first/last for scalars and cross growth)
+STATE_NEEDED = {
+    "sum":    {"sum"},
+    "mean":   {"sum", "count"},
+    "avg":    {"sum", "count"},
+    "count":  {"count"},
+    "min":    {"min"},
+    "max":    {"max"},
+    "growth": {"sum", "count", "first", "last"},
+}
+
+
+class PartialAggregate:
+    """Per-group partial aggregates for a set of metrics"""
+
+    def __init__(self, metrics: List[str], group_col: Optional[str] = None,
+                 order_col: Optional[str] = None, needs: Optional[Iterable[str]] = None):
+        """
+        group_col: column to group by (None → one group over all rows)
+        order_col: column that orders rows for first/last (None → row position)
+        needs:     state to keep, from "sum", "count", "min", "max", "first",
+                   "last" (None → all; see STATE_NEEDED); the rest stays NaN
+        """
+        self.metrics   = list(metrics)
+        self.group_col = group_col
+        self.order_col = order_col
+        self.needs     = set(STATE_NEEDED["growth"] | {"min", "max"} if needs is None else needs)
+        self.state: Dict[str, pd.DataFrame] = {}
+        self.rows      = pd.Series(dtype="int64")
+        self._position = 0
+
+    # ── Folding ────────────────────────────────────────────────────
+
+    def update(self, chunk: pd.DataFrame):
+        """Fold one chunk (already filtered) into the running state."""
+        if is_bucket_column(self.group_col):
+            chunk = dated_rows(chunk, self.group_col)     # keyed from the chunk's dates when not loaded with it
+        n = len(chunk)
+        if n == 0:
+            return
+        other = PartialAggregate(self.metrics, self.group_col, self.order_col, self.needs)
+        other._from_chunk(chunk, self._position)
+        self._position += n
+        self.merge(other)
+
+    def merge(self, other: "PartialAggregate"):
+        """Merge partials computed over rows that come after this one's rows."""
+        self.rows = pd.concat([self.rows, other.rows]).groupby(level=0, sort=False).sum()
+        for m in self.metrics:
+            if m not in other.state:
+                continue
+            if m not in self.state:
+                self.state[m] = other.state[m]
+                continue
+            both = pd.concat([self.state[m], other.state[m]])
+            g = both.groupby(level=0, sort=False)
+            merged = pd.DataFrame({
+                "sum":   g["sum"].sum(),
+                "count": g["count"].sum(),
+                "min":   g["min"].min(),
+                "max":   g["max"].max(),
+            })
+            # Stable sorts keep earlier partials first, so ties resolve like a single pass
+            first = both.sort_values("first_at", kind="stable", na_position="last")
+            last  = both.sort_values("last_at", kind="stable", na_position="first")
+            merged[["first", "first_at"]] = first.groupby(level=0, sort=False)[["first", "first_at"]].first()
+            merged[["last", "last_at"]]   = last.groupby(level=0, sort=False)[["last", "last_at"]].last()
+            self.state[m] = merged
+        self._position = max(self._position, other._position)
+
+    def _from_chunk(self, chunk: pd.DataFrame, start: int):
+        """Partial state of one chunk: group codes once, then bincount / ufunc.at per metric"""
+        n = len(chunk)
+        if self.group_col:
+            keys = chunk[self.group_col]
+            if isinstance(keys.dtype, pd.CategoricalDtype):
+                codes, uniques = keys.cat.codes.to_numpy(), pd.Index(keys.cat.categories.astype(object))
+            else:
+                codes, uniques = pd.factorize(keys)             # missing keys → -1
+                uniques = pd.Index(np.asarray(uniques))
+        else:
+            codes, uniques = np.zeros(n, dtype=np.intp), pd.Index([ALL_ROWS], dtype=object)
+        codes = codes.astype(np.intp, copy=False)      # bincount and ufunc.at index with intp
+        live = codes >= 0
+        if live.all():
+            live = None
+        else:
+            codes = codes[live]
+        size = len(uniques)
+        rows = np.bincount(codes, minlength=size)
+        observed = np.flatnonzero(rows)
+        index = uniques[observed]
+        self.rows = pd.Series(rows[observed], index=index)
+        self._position = start + n
+
+        perm = None
+        if self.needs & {"first", "last"}:
+            order = chunk[self.order_col].to_numpy() if self.order_col else np.arange(start, start + n)
+            order = order if live is None else order[live]
+            ordered = len(order) < 2 or bool(np.all(order[1:] >= order[:-1]))
+            perm = np.arange(len(order)) if ordered else np.argsort(order, kind="stable")
+
+        for m in self.metrics:
+            values = chunk[m].to_numpy()
+            values = values if live is None else values[live]
+            if values.dtype.kind not in "iuf":
+                self.state[m] = self._state_pandas(values, codes, uniques, order if perm is not None else None)
+                continue
+            nan = np.isnan(values) if values.dtype.kind == "f" else None
+            if nan is not None and not nan.any():
+                nan = None
+            c = codes if nan is None else codes[~nan]
+            v = values if nan is None else values[~nan]
+            state = pd.DataFrame(np.nan, index=index, columns=STATE_COLUMNS)
+            if "count" in self.needs:
+                state["count"] = np.bincount(c, minlength=size)[observed]
+            if "sum" in self.needs:
+                if values.dtype.kind in "iu" and int(np.abs(v).max(initial=0)) * len(v) >= EXACT_INT_SUM:
+                    sums = pd.Series(v).groupby(c).sum().reindex(observed, fill_value=0).to_numpy()
+                else:
+                    sums = np.bincount(c, weights=v.astype(np.float64, copy=False), minlength=size)[observed]
+                state["sum"] = sums.astype(np.int64 if values.dtype.kind in "iu" else values.dtype)
+            for name, reduce in (("min", np.fmin), ("max", np.fmax)):
+                if name in self.needs:
+                    if values.dtype.kind == "f":
+                        acc = np.full(size, np.nan, dtype=values.dtype)
+                    else:
+                        info = np.iinfo(values.dtype)
+                        acc  = np.full(size, info.max if name == "min" else info.min, dtype=values.dtype)
+                    reduce.at(acc, codes, values)
+                    state[name] = acc[observed]
+            if perm is not None:
+                keep = perm if nan is None else perm[~nan[perm]]     # non-null rows, in order
+                kc   = codes[keep]
+                rank = np.arange(len(keep))
+                first = np.full(size, len(keep), dtype=np.intp)
+                last  = np.full(size, -1, dtype=np.intp)
+                np.minimum.at(first, kc, rank)
+                np.maximum.at(last, kc, rank)
+                hit = observed[first[observed] < len(keep)]
+                for name, at in (("first", first[hit]), ("last", last[hit])):
+                    state[name]         = pd.Series(values[keep[at]], index=uniques[hit]).reindex(index)
+                    state[f"{name}_at"] = pd.Series(order[keep[at]], index=uniques[hit]).reindex(index)
+            self.state[m] = state
+
+    def _state_pandas(self, values: np.ndarray, codes: np.ndarray, uniques: pd.Index,
+                      order: Optional[np.ndarray]) -> pd.DataFrame:
+        """Partial state for value dtypes the NumPy path does not cover (nullable, object)"""
+        keys = uniques[codes]
+        g = pd.Series(values).groupby(keys, sort=False)
+        state = pd.DataFrame({
+            "sum":   g.sum(),
+            "count": g.count(),
+            "min":   g.min(),
+            "max":   g.max(),
+        })
+        if order is not None:
+            perm = np.argsort(order, kind="stable")
+            ordered = pd.DataFrame({"key": keys[perm], "v": values[perm], "at": order[perm]})
+            ordered = ordered[ordered["v"].notna()]
+            vg = ordered.groupby("key", sort=False)
+            state["first"]    = vg["v"].first()
+            state["first_at"] = vg["at"].first()
+            state["last"]     = vg["v"].last()
+            state["last_at"]  = vg["at"].last()
+        return state.reindex(columns=STATE_COLUMNS)
+
+    # ── Results ────────────────────────────────────────────────────
+
+    def finalize(self, metric: str, agg: str) -> pd.Series:
+        """Grouped result for metric, matching AnalyticsEngine._agg on the full data."""
+        st = self.state.get(metric)
+        if st is None:
+            return pd.Series(dtype="float64", name=metric)
+        st = st.sort_index()
+        if agg in ("mean", "avg"):
+            out = st["sum"] / st["count"].where(st["count"] > 0)
+        elif agg == "count":
+            out = st["count"]
+        elif agg == "min":
+            out = st["min"]
+        elif agg == "max":
+            out = st["max"]
+        elif agg == "growth":
+            s = st["sum"]
+            out = s.pct_change().fillna(0) * 100 if len(s) > 1 else s
+        else:
+            out = st["sum"]
+        out = out.copy()
+        out.name = metric
+        if self.group_col:
+            out.index.name = self.group_col
+        return out
+
+    def scalar(self, metric: str, agg: str) -> float:
+        """Ungrouped result for metric, matching AnalyticsEngine._scalar."""
+        st = self.state.get(metric)
+        if st is None or st.empty:
+            return 0.0
+        if agg == "growth":
+            if int(st["count"].sum()) > 1:
+                f, l = self.first(metric).iloc[0], self.last(metric).iloc[0]
+                return float((l - f) / f * 100) if f != 0 else 0.0
+            return 0.0
+        return float(self.finalize(metric, agg).iloc[0])
+
+    def first(self, metric: str) -> pd.Series:
+        return self.state[metric]["first"].sort_index()
+
+    def last(self, metric: str) -> pd.Series:
+        return self.state[metric]["last"].sort_index()
+
+    def count(self, metric: str) -> pd.Series:
+        return self.state[metric]["count"].sort_index()
+
+    @property
+    def total_rows(self) -> int:
+        return int(self.rows.sum()) if len(self.rows) else 0
+
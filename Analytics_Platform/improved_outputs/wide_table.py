@@ -0,0 +1,127 @@
+"""
+Wide Table - loan, payment and customer joined on their shared (date, branch) grain
+Each source holds at most one row per (date, branch); the wide table holds one
+row per key any source has, with every source's metric columns side by side
+and NaN where a source has no row for the key, so an aggregation over a wide
+column matches the same aggregation over its source (where the sources cover
+different keys, first/last-row growth can land on a gap, and a branch missing
+from one source still forms an empty group). Keys are dense integers
+(day × branch code), so the join sorts no rows: the keys present in any source
+are marked on a presence grid, whose running count places each source row
+(keys are sorted and binary-searched only when the grid would be sparse).
+Plans whose metrics come from more than one dataset run against it in a
+single scan instead of merging the sources per query.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+from improved_outputs.calendar_buckets import is_bucket_column
+from improved_outputs.schemas import DATASET_SCHEMAS
+
+WIDE       = "wide"
+SOURCES    = ("loan", "payment", "customer")
+KEYS       = ("date", "branch")
+GRID_SLOTS = 4      # a presence grid up to this many slots per source row, else a sort of the keys
+
+WIDE_SCHEMA: Dict[str, Any] = {
+    "sources":      list(SOURCES),
+    "dates":        ["date"],
+    "categoricals": ["branch"],
+    **{role: [c for name in SOURCES for c in DATASET_SCHEMAS[name][role]]
+       for role in ("counts", "amounts", "rates")},
+}
+
+
+def metric_dataset(column: Optional[str]) -> Optional[str]:
+    """Source dataset whose schema declares column as a metric"""
+    return next((name for name in SOURCES
+                 if any(column in DATASET_SCHEMAS[name][role] for role in ("counts", "amounts", "rates"))), None)
+
+
+def plan_dataset(plan: Dict[str, Any]) -> str:
+    """Dataset a plan runs against: the wide table when its metrics come from more than one source"""
+    metrics = [plan.get("metric"), plan.get("metric_a"), plan.get("metric_b")] + list(plan.get("metrics") or [])
+    owners  = {metric_dataset(m) for m in metrics if m} - {None}
+    return WIDE if len(owners) > 1 else plan.get("dataset", "loan")
+
+
+def build_wide(frames: Dict[str, pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    frames (source name → frame with date and branch columns) as one frame
+    ordered by date, then branch in the order branches first appear in the
+    sources (so first/last-row results match a source sharing that order);
+    None when a source has two rows for one key.
+    Rows without a date or branch have no key and are left out; calendar
+    bucket columns are not carried over (the loader adds them for the table).
+    """
+    date_col, branch_col = KEYS
+    labels: List[Any] = sorted({v for f in frames.values() for v in _branch_values(f[branch_col])}, key=str)
+    branches = pd.Index(labels, dtype=object)
+    width    = max(len(branches), 1)
+
+    keyed = {}
+    for name, frame in frames.items():
+        days  = np.asarray(frame[date_col], dtype="datetime64[ns]").astype("datetime64[D]")
+        codes = _branch_codes(frame[branch_col], branches)
+        rows  = np.flatnonzero(~np.isnat(days) & (codes >= 0))
+        keyed[name] = (days[rows].astype(np.int64), codes[rows], rows)
+    first = min((d.min() for d, _, _ in keyed.values() if len(d)), default=0)
+    last  = max((d.max() for d, _, _ in keyed.values() if len(d)), default=-1)
+    rank  = _appearance_rank([c for _, c, _ in keyed.values()], width)
+    keys  = {name: (d - first) * width + rank[c] for name, (d, c, _) in keyed.items()}
+
+    slots = (last - first + 1) * width
+    if slots <= GRID_SLOTS * max(sum(len(k) for k in keys.values()), 1):
+        present = np.zeros(max(slots, 0), dtype=bool)
+        for k in keys.values():
+            present[k] = True
+        wide_keys = np.flatnonzero(present)
+        slot = np.cumsum(present) - 1       # grid slot → wide row
+        at   = {name: slot[k] for name, k in keys.items()}
+    else:
+        wide_keys = np.unique(np.concatenate(list(keys.values())))
+        at = {name: np.searchsorted(wide_keys, k) for name, k in keys.items()}
+
+    columns: Dict[str, Any] = {
+        date_col:   ((wide_keys // width) + first).astype("datetime64[D]").astype("datetime64[ns]"),
+        branch_col: pd.Categorical.from_codes(np.argsort(rank)[wide_keys % width], categories=branches),
+    }
+    for name, frame in frames.items():
+        if len(at[name]) and np.bincount(at[name], minlength=len(wide_keys)).max() > 1:
+            print(f"⚠️  {name} has more than one row per ({date_col}, {branch_col}); no wide table")
+            return None
+        positions = np.full(len(wide_keys), -1, dtype=np.intp)
+        positions[at[name]] = keyed[name][2]
+        for col in frame.columns:
+            if col in KEYS or is_bucket_column(col):
+                continue
+            out = f"{name}_{col}" if col in columns else col
+            values = frame[col]
+            values = values.array if isinstance(values.dtype, pd.api.extensions.ExtensionDtype) else values.to_numpy()
+            columns[out] = pd.api.extensions.take(values, positions, allow_fill=True)     # ints widen only on gaps
+    return pd.DataFrame(columns)
+
+
+def _appearance_rank(codes: List[np.ndarray], width: int) -> np.ndarray:
+    """Rank of each branch code by its first row across the sources (never-seen codes last)"""
+    seen  = np.concatenate(codes) if codes else np.empty(0, dtype=np.intp)
+    first = np.full(width, len(seen), dtype=np.int64)
+    np.minimum.at(first, seen, np.arange(len(seen)))
+    rank = np.empty(width, dtype=np.int64)
+    rank[np.argsort(first, kind="stable")] = np.arange(width)
+    return rank
+
+
+def _branch_values(branches: pd.Series):
+    if isinstance(branches.dtype, pd.CategoricalDtype):
+        return branches.cat.categories
+    return branches.dropna().unique()
+
+
+def _branch_codes(branches: pd.Series, categories: pd.Index) -> np.ndarray:
+    """Position of each row's branch in categories (-1 = missing)"""
+    if isinstance(branches.dtype, pd.CategoricalDtype):
+        remap = np.append(categories.get_indexer(branches.cat.categories), -1)
+        return remap[branches.cat.codes.to_numpy()]     # code -1 picks the trailing -1
+    return categories.get_indexer(branches)
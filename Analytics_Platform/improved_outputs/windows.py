@@ -0,0 +1,90 @@
+"""
+Window Functions - Rolling, lag/lead and period-over-period metrics per group
+A plan's metric is aggregated once per (partition, calendar period) into a
+dense partitions × periods grid; periods without rows stay NaN, so gaps in
+the calendar stay gaps. Each window function is then one array operation
+along the period axis of the whole grid: lag/lead shift it, rolling sums and
+means are differences of running sums, and change / MoM / QoQ / YoY compare
+every cell with the cell a fixed number of periods earlier. Offsets count
+calendar periods, not rows, so a missing month is never compared with the
+month before it.
+"""
+import numpy as np
+from typing import Dict, Any, Optional, Union
+
+from improved_outputs.calendar_buckets import GRANULARITIES
+
+WINDOW_FUNCTIONS = ("rolling_sum", "rolling_mean", "lag", "lead", "change", "mom", "qoq", "yoy")
+PERIODS_PER_YEAR = {"week": 52, "month": 12, "quarter": 4, "year": 1}
+
+# Period-over-period shorthands → (function, granularity, periods)
+SHORTHANDS = {
+    "mom": ("change", "month", 1),
+    "qoq": ("change", "quarter", 1),
+}
+LABELS = {
+    "rolling_sum":  "{n}-{unit} rolling sum",
+    "rolling_mean": "{n}-{unit} rolling mean",
+    "lag":          "value {n} {unit}(s) earlier",
+    "lead":         "value {n} {unit}(s) later",
+    "change":       "% change vs {n} {unit}(s) earlier",
+}
+
+
+def resolve_window(window: Union[str, Dict[str, Any]], granularity: Optional[str]) -> Dict[str, Any]:
+    """
+    The function ("rolling_sum", "rolling_mean", "lag", "lead" or "change"),
+    offset or width in periods, granularity, partition column and label a
+    plan's "window" asks for (a bare function name is shorthand for
+    {"function": name}); an error dict when it names no known function
+    """
+    window   = {"function": window} if isinstance(window, str) else dict(window)
+    named    = str(window.get("function") or "").lower()
+    function = named
+    if function not in WINDOW_FUNCTIONS:
+        return {"success": False, "value": 0,
+                "error": f"Unknown window function '{function}'. Use one of: {', '.join(WINDOW_FUNCTIONS)}"}
+    granularity = granularity if granularity in GRANULARITIES else "day"
+    default = 3 if function.startswith("rolling") else 1
+    periods = window.get("periods") or default
+    if function in SHORTHANDS:
+        function, granularity, periods = SHORTHANDS[function]
+    elif function == "yoy":
+        granularity = granularity if granularity in PERIODS_PER_YEAR else "month"
+        function, periods = "change", PERIODS_PER_YEAR[granularity]
+    periods = int(periods)
+    if periods < 1:
+        return {"success": False, "value": 0, "error": "Window periods must be at least 1"}
+    label = f"{named.upper()} % change" if named in ("mom", "qoq", "yoy") else \
+        LABELS[function].format(n=periods, unit=granularity)
+    return {"function": function, "periods": periods, "granularity": granularity,
+            "partition_by": window.get("partition_by"), "label": label}
+
+
+def apply_window(grid: np.ndarray, function: str, periods: int) -> np.ndarray:
+    """function over every row of a partitions × periods grid (NaN = no rows in that period)"""
+    grid = np.asarray(grid, dtype=np.float64)
+    out  = np.full(grid.shape, np.nan)
+    k    = periods
+    if k > grid.shape[1] or (k == grid.shape[1] and not function.startswith("rolling")):
+        return out      # no period has a k-period neighbour / full window
+
+    if function == "lead":
+        out[:, :-k] = grid[:, k:]
+        return out
+    if function in ("lag", "change"):
+        out[:, k:] = grid[:, :-k]
+        if function == "lag":
+            return out
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(out != 0, (grid - out) / out * 100, np.nan)
+
+    # Rolling: windows of k periods, all of which must have rows (min_periods = k)
+    present = ~np.isnan(grid)
+    zero    = np.zeros((grid.shape[0], 1))
+    sums    = np.concatenate([zero, np.cumsum(np.where(present, grid, 0.0), axis=1)], axis=1)
+    counts  = np.concatenate([zero, np.cumsum(present, axis=1)], axis=1)
+    wsum = sums[:, k:] - sums[:, :-k]
+    full = (counts[:, k:] - counts[:, :-k]) == k
+    out[:, k - 1:] = np.where(full, wsum / k if function == "rolling_mean" else wsum, np.nan)
+    return out
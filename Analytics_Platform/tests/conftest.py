@@ -0,0 +1,20 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))      # modules import as `improved_outputs.<name>`, as in the app
+
+from improved_outputs.schemas import DATASET_SCHEMAS
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    """A private copy of the bundled CSVs (tests may append to or rewrite them)"""
+    target = tmp_path / "data"
+    target.mkdir()
+    for schema in DATASET_SCHEMAS.values():
+        shutil.copy(ROOT / schema["file"], target / schema["file"])
+    return target
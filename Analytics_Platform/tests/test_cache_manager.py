@@ -0,0 +1,39 @@
+import json
+
+import pandas as pd
+
+from improved_outputs.cache_manager import CacheManager
+from improved_outputs.column_store import ColumnStore
+
+FRAME = pd.DataFrame({"x": [1, 2, 3]})
+
+
+def _index(root):
+    with open(root / CacheManager.INDEX_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_hit_does_not_rewrite_index_until_flush(tmp_path):
+    manager = CacheManager(ColumnStore(tmp_path))
+    manager.put("k1", FRAME, "a.csv")
+    written = _index(tmp_path)["k1"]["last_access"]
+
+    assert manager.get("k1") is not None
+    assert _index(tmp_path)["k1"]["last_access"] == written
+    manager.flush()
+    assert _index(tmp_path)["k1"]["last_access"] == manager.index["k1"]["last_access"] > written
+
+
+def test_managers_sharing_a_cache_keep_each_others_entries(tmp_path):
+    first, second = CacheManager(ColumnStore(tmp_path)), CacheManager(ColumnStore(tmp_path))
+    first.put("k1", FRAME, "a.csv")
+    second.put("k2", FRAME, "b.csv")         # second never indexed k1
+    assert set(_index(tmp_path)) == {"k1", "k2"}
+
+
+def test_new_snapshot_drops_one_written_by_another_manager(tmp_path):
+    first, second = CacheManager(ColumnStore(tmp_path)), CacheManager(ColumnStore(tmp_path))
+    first.put("k1", FRAME, "a.csv")
+    second.put("k2", FRAME, "a.csv")
+    assert set(_index(tmp_path)) == {"k2"}
+    assert not ColumnStore(tmp_path).exists("k1")
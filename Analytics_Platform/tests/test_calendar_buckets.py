@@ -0,0 +1,40 @@
+import contextlib
+import io
+
+import pandas as pd
+
+from improved_outputs.analytics_engine import AnalyticsEngine
+from improved_outputs.calendar_buckets import data_columns, is_bucket_column
+from improved_outputs.data_loader import DataLoader
+from improved_outputs.schemas import DATASET_SCHEMAS
+
+
+def _load(data_dir, tmp_path, name="payment"):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataLoader(data_dir=str(data_dir), cache_dir=str(tmp_path / "cache")).load_dataset(name)
+
+
+def test_data_columns_are_the_csv_columns(data_dir, tmp_path):
+    df = _load(data_dir, tmp_path)
+    header = pd.read_csv(data_dir / DATASET_SCHEMAS["payment"]["file"], nrows=0).columns
+    assert any(is_bucket_column(c) for c in df.columns)
+    assert data_columns(df.columns) == list(header)
+
+
+def test_missing_column_error_lists_only_data_columns(data_dir, tmp_path):
+    df = _load(data_dir, tmp_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = AnalyticsEngine().execute_plan(df, {"metric": "no_such_metric", "aggregation": "sum"})
+    assert not result["success"]
+    assert "__" not in result["error"]
+
+
+def test_trend_without_bucket_columns_matches(data_dir, tmp_path):
+    """A frame without the keys (as attached from shared memory) derives them per query"""
+    df = _load(data_dir, tmp_path)
+    plan = {"metric": "upi_volume", "aggregation": "sum", "group_by": "date", "granularity": "quarter"}
+    engine = AnalyticsEngine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        keyed = engine.execute_plan(df, plan)
+        derived = engine.execute_plan(df[data_columns(df.columns)], plan)
+    pd.testing.assert_series_equal(derived["trend_data"], keyed["trend_data"])
@@ -0,0 +1,41 @@
+import contextlib
+import io
+
+import pandas as pd
+import pytest
+
+from improved_outputs.data_loader import DataLoader
+from improved_outputs.schemas import DATASET_SCHEMAS
+
+
+def _load(data_dir, cache_dir, name="payment"):
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = DataLoader(data_dir=str(data_dir), cache_dir=str(cache_dir)).load_dataset(name)
+    return df.copy(deep=True)       # cached columns are read-only memory maps
+
+
+def _append_rows(path, branch: str, rows: int = 3):
+    tail = pd.read_csv(path).tail(rows).assign(date="2025-01-01", branch=branch)
+    tail.to_csv(path, mode="a", header=False, index=False)
+
+
+@pytest.mark.parametrize("branch", ["Mumbai", "Nagpur", "Zirakpur"],
+                         ids=["known branch", "new branch sorting among", "new branch sorting last"])
+def test_append_matches_fresh_parse(data_dir, tmp_path, branch):
+    cache = tmp_path / "cache"
+    _load(data_dir, cache)                          # cold load: cached and ingest state recorded
+    _append_rows(data_dir / DATASET_SCHEMAS["payment"]["file"], branch)
+
+    appended = _load(data_dir, cache)               # tail merged into the cached entry (or reloaded)
+    fresh    = _load(data_dir, tmp_path / "fresh")  # parsed from scratch
+
+    pd.testing.assert_frame_equal(appended, fresh)
+    assert list(appended["branch"].cat.categories) == list(fresh["branch"].cat.categories)
+    assert appended["date"].dtype == fresh["date"].dtype
+
+
+def test_cache_hit_matches_cold_load(data_dir, tmp_path):
+    cache = tmp_path / "cache"
+    cold = _load(data_dir, cache)
+    hit  = _load(data_dir, cache)
+    pd.testing.assert_frame_equal(hit, cold)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from improved_outputs.group_kernels import grouped_reduce
+
+AGGREGATIONS = ("sum", "count", "mean", "min", "max")
+ROWS = 5_000
+
+
+def _keys(kind: str, groups: int, rng) -> pd.Series:
+    raw = rng.integers(0, groups, ROWS)
+    if kind == "category":              # int8 codes up to 127 categories, int16 beyond
+        return pd.Series(pd.Categorical(raw.astype(str)), name="branch")
+    if kind == "empty groups":          # categories no row uses
+        return pd.Series(pd.Categorical.from_codes(raw, [f"b{i}" for i in range(groups)] + ["never"]),
+                         name="branch")
+    if kind == "str + missing":
+        return pd.Series(np.where(rng.random(ROWS) < 0.05, None, raw.astype(str)), dtype="str", name="branch")
+    return pd.Series((raw * 3).astype(kind), name="branch")     # integer keys: int8 / int16 / int32 / int64
+
+
+def _values(rng) -> pd.DataFrame:
+    floats = rng.normal(100, 50, ROWS)
+    floats[rng.random(ROWS) < 0.1] = np.nan
+    return pd.DataFrame({
+        "f64":           floats,
+        "f32":           floats.astype(np.float32),
+        "i64":           rng.integers(-1_000, 1_000, ROWS),
+        "i32":           rng.integers(0, 5_000, ROWS).astype(np.int32),     # apply_schema's count dtype
+        "i32 wide sums": rng.integers(0, 2 ** 31 - 1, ROWS).astype(np.int32),
+        "i16":           rng.integers(-2 ** 15, 2 ** 15, ROWS).astype(np.int16),
+        "i8":            rng.integers(-128, 128, ROWS).astype(np.int8),
+        "u16":           rng.integers(0, 2 ** 16, ROWS).astype(np.uint16),
+        "all_nan":       np.full(ROWS, np.nan),
+    })
+
+
+def _assert_matches_pandas(key: pd.Series, values: pd.DataFrame, agg: str):
+    fast = grouped_reduce(key, values, agg)
+    slow = getattr(values.groupby(key, observed=True), agg)()
+    assert fast is not None
+    pd.testing.assert_index_equal(fast.index, slow.index)
+    for col in values.columns:          # float32 differs by rounding: kernels accumulate in float64
+        pd.testing.assert_series_equal(fast[col], slow[col], check_exact=False,
+                                       rtol=1e-5 if col == "f32" else 1e-9, obj=col)
+
+
+@pytest.mark.parametrize("agg", AGGREGATIONS)
+@pytest.mark.parametrize("kind", ["category", "empty groups", "str + missing", "int8", "int16", "int32", "int64"])
+@pytest.mark.parametrize("groups", [1, 7, 40, 300])
+def test_matches_pandas(agg, kind, groups):
+    if kind == "int8" and groups * 3 > 127:
+        pytest.skip("keys would not fit int8")
+    rng = np.random.default_rng(groups)
+    _assert_matches_pandas(_keys(kind, groups, rng), _values(rng), agg)
+
+
+@pytest.mark.parametrize("agg", AGGREGATIONS)
+@pytest.mark.parametrize("col", ["f64", "f32", "i64", "i32", "i32 wide sums", "i16", "i8", "u16", "all_nan"])
+def test_single_column_matches_pandas(agg, col):
+    """Each dtype on its own (groupby narrows integer sums per same-dtype block)"""
+    rng = np.random.default_rng(0)
+    values = _values(rng)[[col]]
+    _assert_matches_pandas(_keys("category", 7, rng), values, agg)
+
+
+def test_unsupported_inputs_fall_back():
+    rng = np.random.default_rng(0)
+    key, values = _keys("int64", 7, rng), _values(rng)
+    assert grouped_reduce(key, values, "median") is None
+    assert grouped_reduce(key, values.astype({"f64": "Float64"}), "sum") is None
+    assert grouped_reduce(key.iloc[:0], values.iloc[:0], "sum") is None
+
+
+def test_int_sums_past_float_precision_fall_back():
+    key = pd.Series(np.zeros(4, dtype=np.int64), name="branch")
+    values = pd.DataFrame({"big": np.full(4, 2 ** 52, dtype=np.int64)})
+    assert grouped_reduce(key, values, "sum") is None
@@ -0,0 +1,31 @@
+import pytest
+
+from improved_outputs.llm_query_parser import _keyword_fallback
+from improved_outputs.query_detector import QueryDetector
+
+
+@pytest.mark.parametrize("query, metric", [
+    ("distinct count of upi by branch",                  "upi_volume"),
+    ("which branch has the most unique UPI values",      "upi_value"),
+    ("number of distinct card transactions per branch",  "card_txn_volume"),
+    ("compare unique credit score across branches",      "avg_credit_score"),
+])
+def test_distinct_modifying_the_metric(query, metric):
+    plan = QueryDetector().build_comparison_plan(query)
+    assert plan["metric"] == metric
+    assert plan["aggregation"] == "distinct"
+
+
+@pytest.mark.parametrize("query", [
+    "How many unique branches have NPA above 5%",
+    "how many distinct branches have fraud rate above 2",
+])
+def test_distinct_modifying_another_noun_stays_a_count(query):
+    plan = QueryDetector().build_comparison_plan(query)
+    assert plan["comparison_type"] == "branch_comparison"
+    assert plan["aggregation"] == "count"
+
+
+def test_keyword_fallback_keeps_distinct_on_the_metric():
+    plan = _keyword_fallback("compare distinct count of upi by branch")
+    assert (plan["metric"], plan["aggregation"]) == ("upi_volume", "distinct")
@@ -0,0 +1,131 @@
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from improved_outputs.analytics_engine import AnalyticsEngine
+from improved_outputs.data_loader import DataLoader
+from improved_outputs.schemas import DATASET_SCHEMAS
+
+BUDGET_MB = 64
+SCALE     = 300      # ~90 MB of CSV, several times what the budget can hold in memory
+
+STREAMED_PLANS = [
+    {"comparison_type": "multi_metric_branch_comparison", "comparison_column": "branch",
+     "metrics": ["upi_volume", "card_txn_volume"], "aggregation": "sum"},
+    {"comparison_type": "cross_metric_growth_comparison", "comparison_column": "branch",
+     "metric_a": "upi_value", "metric_b": "card_txn_value",
+     "date_filter": {"type": "relative", "n": 6, "unit": "month"}},
+    {"metric": "fraud_rate_percent", "aggregation": "mean", "filters": {"branch": ["Pune"]}},
+]
+
+# Runs in a fresh interpreter so ru_maxrss reflects only the streamed work
+RSS_SCRIPT = textwrap.dedent("""
+    import json, resource, sys
+    sys.path.insert(0, sys.argv[1])
+    from improved_outputs.analytics_engine import AnalyticsEngine
+    from improved_outputs.data_loader import DataLoader
+
+    data_dir, budget, plans = sys.argv[2], float(sys.argv[3]), json.loads(sys.argv[4])
+    loader = DataLoader(data_dir=data_dir, cache_dir=data_dir + "/.cache", max_memory_mb=budget)
+    engine = AnalyticsEngine()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    loader.load_all_datasets()
+    columns = loader.dataset_columns("payment")
+    rows = sum(len(chunk) for chunk in loader.iter_dataset_chunks("payment", ["branch", "upi_volume"]))
+    ok = [engine.execute_plan_streaming(lambda usecols: loader.iter_dataset_chunks("payment", usecols),
+                                        columns, plan).get("success") for plan in plans]
+    growth_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    print(json.dumps({"streamed": "payment" in loader.streamed, "rows": rows, "ok": ok,
+                      "growth_mb": growth_kb / (1e6 if sys.platform == "darwin" else 1e3)}))
+""")
+
+
+@pytest.fixture
+def scaled_dir(tmp_path):
+    """The payment CSV repeated SCALE times (header once), without holding it in memory"""
+    name = DATASET_SCHEMAS["payment"]["file"]
+    with open(ROOT / name, "rb") as f:
+        header, body = f.readline(), f.read()
+    with open(tmp_path / name, "wb") as f:
+        f.write(header)
+        for _ in range(SCALE):
+            f.write(body if body.endswith(b"\n") else body + b"\n")
+    return tmp_path
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="ru_maxrss needs the resource module")
+def test_streamed_peak_rss_stays_under_budget(scaled_dir):
+    proc = subprocess.run(
+        [sys.executable, "-c", RSS_SCRIPT, str(ROOT), str(scaled_dir), str(BUDGET_MB), json.dumps(STREAMED_PLANS)],
+        capture_output=True, text=True, timeout=600, check=True)
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    assert report["streamed"], "the scaled dataset should exceed the budget and be streamed"
+    assert report["rows"] == (sum(1 for _ in open(ROOT / DATASET_SCHEMAS["payment"]["file"])) - 1) * SCALE
+    assert all(report["ok"])
+    assert report["growth_mb"] < BUDGET_MB
+
+
+# ── Streamed results equal in-memory results ────────────────────────────
+
+def _plans():
+    quarter = {"type": "quarter", "year": 2024, "months": [4, 5, 6]}
+    for agg in ("sum", "mean", "min", "max", "count"):
+        for metric in ("upi_volume", "fraud_rate_percent"):
+            for filters in ({}, {"branch": ["Pune", "Delhi"]}):
+                for date_filter in (None, quarter):
+                    base = {"metric": metric, "aggregation": agg, "filters": filters}
+                    if date_filter:
+                        base["date_filter"] = date_filter
+                    yield base
+                    yield {**base, "comparison_type": "branch_comparison"}
+                    yield {**base, "comparison_type": "multi_metric_branch_comparison",
+                           "metrics": ["upi_volume", "card_txn_volume"]}
+                    yield {**base, "group_by": "date", "granularity": "month"}
+
+
+@pytest.fixture(scope="module")
+def loaders(tmp_path_factory):
+    cache = tmp_path_factory.mktemp("cache")
+    with contextlib.redirect_stdout(io.StringIO()):
+        in_memory = DataLoader(data_dir=str(ROOT), cache_dir=str(cache / "memory")).load_dataset("payment")
+        # A 1 MB budget streams the bundled file in 1,000-row chunks
+        streamed = DataLoader(data_dir=str(ROOT), cache_dir=str(cache / "streamed"), max_memory_mb=1)
+    return in_memory, streamed
+
+
+def _labelled(data):
+    """Grouped output with its labels as strings (streamed chunks group on plain strings, not categories)"""
+    return data.set_axis(data.index.astype(str))
+
+
+@pytest.mark.parametrize("plan", list(_plans()), ids=lambda p: json.dumps(p, sort_keys=True))
+def test_streamed_matches_in_memory(loaders, plan):
+    in_memory, streamed = loaders
+    engine = AnalyticsEngine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = engine.execute_plan(in_memory, plan)
+        got = engine.execute_plan_streaming(lambda usecols: streamed.iter_dataset_chunks("payment", usecols),
+                                            streamed.dataset_columns("payment"), plan)
+
+    assert got.get("success", True) == expected.get("success", True)
+    for key in ("value", "comparison_data", "grouped_data", "multi_metric_comparison", "trend_data", "count"):
+        if key not in expected:
+            continue
+        assert key in got, key
+        if isinstance(expected[key], pd.Series):
+            pd.testing.assert_series_equal(_labelled(got[key]), _labelled(expected[key]),
+                                           check_dtype=False, check_names=False)
+        elif isinstance(expected[key], pd.DataFrame):
+            pd.testing.assert_frame_equal(_labelled(got[key]), _labelled(expected[key]),
+                                          check_dtype=False, check_names=False)
+        else:
+            assert np.isclose(got[key], expected[key]), key